@@ -1,5 +1,6 @@
 from rllm.tools.web_tools.firecrawl_tool import FirecrawlTool
 from rllm.tools.web_tools.gsearch_tool import GoogleSearchTool
+from rllm.tools.web_tools.response_cache import ResponseCache
 from rllm.tools.web_tools.tavily_tool import TavilyExtractTool, TavilySearchTool
 
-__all__ = ["GoogleSearchTool", "FirecrawlTool", "TavilyExtractTool", "TavilySearchTool"]
+__all__ = ["GoogleSearchTool", "FirecrawlTool", "TavilyExtractTool", "TavilySearchTool", "ResponseCache"]
@@ -0,0 +1,206 @@
+# One login per run, shared by many Playwright contexts.
+
+# A persistent user-data directory ties the session to a single browser context, and
+# probing a logged-in selector before every run costs up to its full timeout whenever
+# the session is gone. AuthSession instead:
+
+#     1. Logs in once (or loads the storage_state saved by the previous run) and keeps
+#        the exported storage_state (cookies + localStorage).
+#     2. Opens any number of independent contexts from that state, so N workers crawl
+#        in parallel with the same authenticated session.
+#     3. Detects expiry from the navigation response itself: a redirect to a login /
+#        auth-wall URL or an auth-failure status (no selector waits).
+#     4. Re-logs in single-flight: the first worker that sees an expired session logs in
+#        under a lock and bumps a generation counter; workers that saw the same expired
+#        generation wait for that login instead of starting their own, then copy the new
+#        cookies into their context and retry.
+#     5. Backs off after a failed login: workers queued behind it get False instead of
+#        logging in again, the next attempt waits LOGIN_RETRY_BACKOFF_SECONDS (doubling),
+#        and after MAX_LOGIN_FAILURES consecutive failures the session gives up, so an
+#        expired session cannot turn into a stream of failed logins against the site.
+
+# Usage:
+#     session = AuthSession(browser, login_function, "storage_state.json", expired_url_pattern=r"/login")
+#     await session.start()
+#     context = await session.new_context()
+#     response = await readiness_engine.goto(page, url)
+#     if session.is_expired(response):
+#         await session.refresh(context, await session.relogin(session.generation_of(context)))
+
+import os
+import re
+import json
+import time
+import asyncio
+from typing import TYPE_CHECKING, Awaitable, Callable
+from urllib.parse import urlparse
+
+if TYPE_CHECKING: # Only for annotations, so the module imports without Playwright installed
+    from playwright.async_api import Browser, BrowserContext, Response
+
+# --- Configuration ---
+# Statuses that mean "not authenticated" (999 is LinkedIn's auth-wall / bot status)
+SESSION_EXPIRED_STATUS_CODES = (401, 999)
+# Consecutive failed logins after which no further login is attempted this run
+MAX_LOGIN_FAILURES = 3
+# Wait before the login is retried after a failure; doubles with every further failure
+LOGIN_RETRY_BACKOFF_SECONDS = 60.0
+# Permissions of the saved storage_state: it holds live session cookies
+STATE_FILE_MODE = 0o600
+
+
+class AuthSession:
+    """An exported login session fanned out to several browser contexts, with single-flight re-login."""
+
+    def __init__(
+        self,
+        browser: "Browser",
+        login: Callable[["BrowserContext"], Awaitable[bool]],
+        state_path: str | None = None,
+        domain: str | None = None,
+        expired_url_pattern: str = r"/(login|signin|authwall|checkpoint)\b",
+        expired_status_codes: tuple[int, ...] = SESSION_EXPIRED_STATUS_CODES,
+        context_options: dict | None = None,
+        max_login_failures: int = MAX_LOGIN_FAILURES,
+        login_retry_backoff_seconds: float = LOGIN_RETRY_BACKOFF_SECONDS,
+    ):
+        """
+        Args:
+            browser (Browser): Browser the contexts are created in.
+            login (callable): Coroutine that logs in within the given (fresh) context and returns True on success.
+            state_path (str, optional): File the storage_state is saved to and loaded from, so the next run can skip the login.
+            domain (str, optional): Site the session belongs to (e.g. "linkedin.com"); responses from other hosts
+                never count as an expired session. None checks every response.
+            expired_url_pattern (str): Regex matched against the final URL of a navigation; a match means the site
+                redirected to its login page, i.e. the session expired.
+            expired_status_codes (tuple): Navigation statuses that mean the session expired.
+            context_options (dict, optional): Extra keyword arguments for browser.new_context().
+            max_login_failures (int): Consecutive failed logins after which the session stops logging in.
+            login_retry_backoff_seconds (float): Wait before retrying after a failed login (doubles per failure).
+        """
+        self.browser = browser
+        self.login = login
+        self.state_path = state_path
+        self.domain = domain
+        self.expired_url = re.compile(expired_url_pattern)
+        self.expired_status_codes = expired_status_codes
+        self.context_options = context_options or {}
+        self.max_login_failures = max_login_failures
+        self.login_retry_backoff_seconds = login_retry_backoff_seconds
+
+        self.storage_state: dict | None = None
+        self.generation = 0 # Bumped on every successful login
+        self.logins = 0
+        self.failed_logins = 0
+        self.consecutive_login_failures = 0
+        self.expirations_detected = 0
+        self._next_login_at = 0.0 # time.monotonic() before which no login is attempted (backoff)
+        self._login_lock = asyncio.Lock()
+        self._context_generations: dict["BrowserContext", int] = {}
+
+    @property
+    def gave_up(self) -> bool:
+        """Whether too many consecutive logins failed for any further attempt this run."""
+        return self.consecutive_login_failures >= self.max_login_failures
+
+    async def _login_and_export(self) -> bool:
+        """
+        Logs in in a throwaway context and exports its storage_state. Caller holds the login lock.
+        Returns False without trying while a previous failure is backing off or after giving up.
+        """
+        if self.gave_up or time.monotonic() < self._next_login_at:
+            return False
+        login_context = await self.browser.new_context(**self.context_options)
+        try:
+            logged_in = await self.login(login_context)
+            if logged_in:
+                self.storage_state = await login_context.storage_state()
+        except Exception as e:
+            print(f"  Login raised {type(e).__name__}: {e}")
+            logged_in = False
+        finally:
+            await login_context.close()
+        if not logged_in:
+            self.failed_logins += 1
+            self.consecutive_login_failures += 1
+            if self.gave_up:
+                print(f"  Login failed {self.consecutive_login_failures} times in a row; not logging in again this run.")
+            else:
+                backoff = self.login_retry_backoff_seconds * 2 ** (self.consecutive_login_failures - 1)
+                self._next_login_at = time.monotonic() + backoff
+                print(f"  Login failed; next attempt no sooner than {backoff:.0f}s from now.")
+            return False
+        self.consecutive_login_failures = 0
+        if self.state_path:
+            self._save_storage_state()
+        self.generation += 1
+        self.logins += 1
+        return True
+
+    def _save_storage_state(self):
+        """Writes the session cookies to state_path, readable by the owner only (they grant account access)."""
+        fd = os.open(self.state_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, STATE_FILE_MODE)
+        os.chmod(self.state_path, STATE_FILE_MODE) # os.open's mode only applies when it creates the file
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(self.storage_state, f)
+
+    async def start(self) -> bool:
+        """Loads the saved session if there is one, otherwise logs in. Returns False if the login failed."""
+        async with self._login_lock:
+            if self.storage_state is not None:
+                return True
+            if self.state_path and os.path.exists(self.state_path):
+                with open(self.state_path, encoding='utf-8') as f:
+                    self.storage_state = json.load(f)
+                self.generation += 1
+                print(f"  Loaded saved session from {self.state_path} (re-login happens only if it turns out to be expired)")
+                return True
+            return await self._login_and_export()
+
+    async def new_context(self) -> "BrowserContext":
+        """Opens a new context carrying the current session."""
+        context = await self.browser.new_context(storage_state=self.storage_state, **self.context_options)
+        self._context_generations[context] = self.generation
+        return context
+
+    def generation_of(self, context: "BrowserContext") -> int:
+        """Session generation whose cookies the context currently holds."""
+        return self._context_generations.get(context, 0)
+
+    def is_expired(self, response: "Response | None") -> bool:
+        """Whether a navigation response shows the session is no longer valid."""
+        if response is None:
+            return False
+        if self.domain is not None:
+            host = urlparse(response.url).hostname or ""
+            if host != self.domain and not host.endswith(f".{self.domain}"):
+                return False
+        expired = response.status in self.expired_status_codes or bool(self.expired_url.search(response.url))
+        if expired:
+            self.expirations_detected += 1
+        return expired
+
+    async def relogin(self, expired_generation: int) -> bool:
+        """
+        Logs in again unless another worker already replaced `expired_generation`.
+        Concurrent callers that saw the same expired session share a single login; if it
+        failed, they (and later callers until the backoff ends) get False without a login of their own.
+        """
+        async with self._login_lock:
+            if self.generation != expired_generation:
+                return self.storage_state is not None # Someone else already logged in again
+            if self.gave_up or time.monotonic() < self._next_login_at:
+                return False # A login for this session just failed; do not try again yet
+            print(f"  Session expired (generation {expired_generation}), logging in again...")
+            return await self._login_and_export()
+
+    async def refresh(self, context: "BrowserContext", logged_in: bool = True):
+        """Replaces a context's cookies with those of the current session."""
+        if not logged_in or self._context_generations.get(context) == self.generation:
+            return
+        await context.clear_cookies()
+        await context.add_cookies(self.storage_state.get("cookies", []))
+        self._context_generations[context] = self.generation
+
+    def stats(self) -> dict:
+        return {"logins": self.logins, "failed_logins": self.failed_logins, "generation": self.generation, "expirations_detected": self.expirations_detected, "contexts": len(self._context_generations)}
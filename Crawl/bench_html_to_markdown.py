@@ -0,0 +1,177 @@
+# Golden-output check and micro-benchmark for html_to_markdown.py.
+
+# Converts a corpus of HTML pages with the shared converter and with the original
+# per-script implementations (kept below as the reference), reports any page whose
+# markdown differs, and prints the throughput of each in MB/s of HTML.
+
+# Usage:
+#     python bench_html_to_markdown.py                     # built-in corpus
+#     python bench_html_to_markdown.py crawled_website_data # every *.html file under a directory
+#     python bench_html_to_markdown.py DIR --repeat 5
+
+# The crawlers save each page's URL only in the filename hash, so pages loaded from a
+# directory are converted against a fixed base URL (BENCH_BASE_URL).
+
+import os
+import re
+import sys
+import time
+import argparse
+import difflib
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup
+from markdownify import MarkdownConverter
+
+from html_to_markdown import HTML_PARSER, convert_html_to_markdown, convert_html_to_markdown_for_llm
+
+BENCH_BASE_URL = "https://www.example.com/docs/guide/"
+
+
+# --- Reference implementations (the original per-script copies) ---
+# The scripts called md.MarkdownConverter with md bound to the markdownify *function*,
+# which raised AttributeError; the references use the class they meant to use.
+
+def legacy_convert_html_to_markdown_for_llm(html_content: str, base_url: str = "") -> str:
+    if not html_content:
+        return ""
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for img in soup.find_all('img', src=True):
+        img['src'] = urljoin(base_url, img['src'])
+    for a in soup.find_all('a', href=True):
+        a['href'] = urljoin(base_url, a['href'])
+    converter = MarkdownConverter(
+        strong_em_symbol='**',
+        bullets='*',
+        code_language='python',
+        strip=['script', 'style', 'header', 'footer', 'nav', 'aside', 'form', 'button', '.sidebar', '#comments']
+    )
+    markdown_output = converter.convert(str(soup))
+    markdown_output = re.sub(r'\n\s*\n', '\n\n', markdown_output).strip()
+    markdown_output = re.sub(r'\[]\(([^)]+)\)', r'(\1)', markdown_output)
+    markdown_output = re.sub(r'\n\n\n+', '\n\n', markdown_output)
+    return markdown_output
+
+
+def legacy_convert_html_to_markdown(html_content: str, base_url: str) -> str:
+    class CustomMarkdownConverter(MarkdownConverter):
+        def convert_img(self, el, text, parent_tags):
+            src = el.get('src')
+            alt = el.get('alt', '')
+            if src:
+                return f"![{alt}]({urljoin(base_url, src)})\n\n"
+            return ""
+
+        def convert_a(self, el, text, parent_tags):
+            href = el.get('href')
+            if href:
+                return f"[{text}]({urljoin(base_url, href)})"
+            return text
+
+    converter = CustomMarkdownConverter(strong_em_symbol='**', bullets='*', code_language='python')
+    markdown_output = converter.convert(html_content)
+    markdown_output = re.sub(r'\n\s*\n', '\n\n', markdown_output)
+    markdown_output = re.sub(r'\[]\(([^)]+)\)', r'(\1)', markdown_output)
+    return markdown_output
+
+
+PAIRS = {
+    "llm": (legacy_convert_html_to_markdown_for_llm, convert_html_to_markdown_for_llm),
+    "search_result": (legacy_convert_html_to_markdown, convert_html_to_markdown),
+}
+
+
+# --- Corpus ---
+
+def builtin_corpus() -> list[tuple[str, str]]:
+    """Representative pages: navigation chrome, articles, tables, code, lists, odd links and sloppy markup."""
+    article_paragraphs = "".join(
+        f"<p>Paragraph {i} with <strong>bold</strong>, <em>emphasis</em>, <code>inline_code()</code> and "
+        f"<a href=\"../ref/{i}.html\">a relative link</a> plus <a href=\"https://other.example.org/x?y={i}#z\">an absolute one</a>.</p>\n"
+        for i in range(40)
+    )
+    pages = [
+        ("article", f"""<!DOCTYPE html><html><head><title>Guide</title><style>p {{ color: red; }}</style><script>var x = 1;</script></head>
+<body><header><a href="/">Home</a></header><nav><ul><li><a href="/a">A</a></li><li><a href="/b">B</a></li></ul></nav>
+<main><article><h1>Getting started</h1><h2>Install</h2>{article_paragraphs}
+<img src="img/diagram.png" alt="Diagram"><p><img src="/static/inline.gif"> inline image</p>
+<pre><code>def main():\n    return 42\n</code></pre>
+<blockquote><p>Quoted text</p></blockquote></article></main>
+<aside class="sidebar"><a href="related.html">Related</a></aside><footer>&copy; 2024 Example</footer></body></html>"""),
+        ("table", "<html><body><h1>Prices</h1><table><thead><tr><th>Plan</th><th>Price</th></tr></thead><tbody>"
+                  + "".join(f"<tr><td><a href='plan-{i}'>Plan {i}</a></td><td>${i}.00</td></tr>" for i in range(30))
+                  + "</tbody></table></body></html>"),
+        ("lists", "<html><body><ul>" + "".join(f"<li>Item {i}<ul><li><a href='sub/{i}'>Sub {i}</a></li></ul></li>" for i in range(25))
+                  + "</ul><ol><li>First</li><li>Second</li></ol></body></html>"),
+        ("odd_links", "<html><body><p><a href=''>empty href</a> <a>no href</a> <a href='#top'>fragment</a> "
+                      "<a href='mailto:a@b.c'>mail</a> <a href='//cdn.example.com/x'>protocol-relative</a> "
+                      "<a href='page'><img src='thumb.png' alt=''></a> <a href='x'></a></p>"
+                      "<form><button>Go</button><input name='q'></form></body></html>"),
+        ("sloppy", "<div><p>Unclosed paragraph<p>Another <b>bold <i>nested</b> text</i><br>line"
+                   "<a href=rel/path>unquoted</a> &amp; entities &lt;tag&gt; &nbsp; done</div>"),
+        ("empty", ""),
+    ]
+    return [(name, html) for name, html in pages]
+
+
+def directory_corpus(directory: str) -> list[tuple[str, str]]:
+    corpus = []
+    for root, _, files in os.walk(directory):
+        for filename in sorted(files):
+            if filename.endswith(".html"):
+                path = os.path.join(root, filename)
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    corpus.append((os.path.relpath(path, directory), f.read()))
+    return corpus
+
+
+# --- Check and benchmark ---
+
+def check_golden(corpus: list[tuple[str, str]]) -> int:
+    """Prints a diff for every page where the new converter's output differs; returns the number of mismatches."""
+    mismatches = 0
+    for preset, (reference, candidate) in PAIRS.items():
+        for name, html_content in corpus:
+            expected = reference(html_content, BENCH_BASE_URL)
+            actual = candidate(html_content, BENCH_BASE_URL)
+            if expected != actual:
+                mismatches += 1
+                print(f"MISMATCH [{preset}] {name}")
+                diff = difflib.unified_diff(expected.splitlines(), actual.splitlines(), "reference", "html_to_markdown", lineterm="", n=1)
+                print("\n".join(list(diff)[:40]))
+    return mismatches
+
+
+def throughput_mb_per_second(convert_function, corpus: list[tuple[str, str]], repeat: int) -> float:
+    total_bytes = sum(len(html_content.encode('utf-8')) for _, html_content in corpus) * repeat
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        for _, html_content in corpus:
+            convert_function(html_content, BENCH_BASE_URL)
+    elapsed_seconds = time.perf_counter() - start_time
+    return total_bytes / 2**20 / elapsed_seconds if elapsed_seconds > 0 else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Golden check and MB/s benchmark for html_to_markdown.py")
+    parser.add_argument("directory", nargs="?", help="Directory of saved .html pages (defaults to a built-in corpus)")
+    parser.add_argument("--repeat", type=int, default=20, help="Passes over the corpus per measurement")
+    args = parser.parse_args()
+
+    corpus = directory_corpus(args.directory) if args.directory else builtin_corpus()
+    corpus_mb = sum(len(html_content.encode('utf-8')) for _, html_content in corpus) / 2**20
+    print(f"Corpus: {len(corpus)} pages, {corpus_mb:.2f} MB; parser: {HTML_PARSER}")
+
+    mismatches = check_golden(corpus)
+    print(f"Golden check: {mismatches} mismatching outputs" if mismatches else "Golden check: all outputs match the reference implementations")
+
+    for preset, (reference, candidate) in PAIRS.items():
+        reference_speed = throughput_mb_per_second(reference, corpus, args.repeat)
+        candidate_speed = throughput_mb_per_second(candidate, corpus, args.repeat)
+        print(f"  {preset:<14} reference {reference_speed:6.2f} MB/s | html_to_markdown {candidate_speed:6.2f} MB/s "
+              f"({candidate_speed / reference_speed if reference_speed else 0:.1f}x)")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,7 @@ import os
 import re
 import asyncio
 import hashlib
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 from playwright.async_api import async_playwright, Page, BrowserContext
 
 # Ensure these are installed:
@@ -10,8 +10,15 @@ from playwright.async_api import async_playwright, Page, BrowserContext
 # playwright install
 
 from tavily import TavilyClient
-from markdownify import markdownify as md
-from bs4 import BeautifulSoup
+from html_to_markdown import convert_html_to_markdown_for_llm
+
+from auth_session import AuthSession
+from fetch_resilience import RETRYABLE_STATUS_CODES, CircuitBreaker, RetryPolicy
+from link_extractor import extract_links
+from page_pool import PagePool
+from page_readiness import ReadinessEngine
+from relevance import PriorityFrontier, RelevanceScorer
+from url_seen import SeenUrlStore
 
 # --- Configuration ---
 TAVILY_API_KEY = os.environ.get("TAVILY_API_KEY")
@@ -23,7 +30,15 @@ LINKEDIN_USERNAME = os.environ.get("LINKEDIN_USERNAME") # Store securely!
 LINKEDIN_PASSWORD = os.environ.get("LINKEDIN_PASSWORD") # Store securely!
 LINKEDIN_LOGIN_URL = "https://www.linkedin.com/login"
 LINKEDIN_HOME_URL = "https://www.linkedin.com/feed/" # Or any known post-login URL
-USER_DATA_DIR = "playwright_user_data" # Directory to store Playwright session data (cookies, etc.)
+LINKEDIN_DOMAIN = "linkedin.com"
+# A navigation that ends on one of these LinkedIn paths means the session has expired
+LINKEDIN_EXPIRED_URL_PATTERN = r"/(login|authwall|checkpoint|uas/login)\b"
+STORAGE_STATE_PATH = "playwright_storage_state.json" # Exported session (cookies, localStorage), reused by the next run
+
+# Independent browser contexts sharing the one login; search results and domain pages are fetched in parallel across them
+NUM_SESSION_CONTEXTS = 3
+# How long an idle crawl worker waits for the pages in flight to queue more links
+IDLE_WORKER_POLL_SECONDS = 0.2
 
 SEARCH_QUERY = "DeepMind latest research on AI ethics"
 MAX_SEARCH_RESULTS_TO_PROCESS = 3
@@ -34,43 +49,15 @@ OUTPUT_BASE_DIR = "scraped_data"
 # Initialize Tavily Client
 tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
 
-# --- Helper Functions (Same as before) ---
+# Decides when a navigated page is ready, learning per domain instead of always waiting for networkidle
+readiness_engine = ReadinessEngine()
 
-def convert_html_to_markdown_for_llm(html_content: str, base_url: str = "") -> str:
-    """
-    Converts raw HTML content to Markdown, making it suitable for LLMs.
-    Handles relative links/images and performs additional cleanup.
-    """
-    if not html_content:
-        return ""
+# Retries transient navigation failures with jittered exponential backoff; a host that keeps
+# failing gets its circuit opened, so its remaining pages fail fast instead of each timing out
+retry_policy = RetryPolicy()
+circuit_breaker = CircuitBreaker()
 
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        for img in soup.find_all('img', src=True):
-            img['src'] = urljoin(base_url, img['src'])
-        for a in soup.find_all('a', href=True):
-            a['href'] = urljoin(base_url, a['href'])
-
-        converter = md.MarkdownConverter(
-            strong_em_symbol='**',
-            bullets='*',
-            code_language='python',
-            strip=['script', 'style', 'header', 'footer', 'nav', 'aside', 'form', 'button', '.sidebar', '#comments']
-        )
-        markdown_output = converter.convert(str(soup))
-
-        markdown_output = re.sub(r'\n\s*\n', '\n\n', markdown_output).strip()
-        markdown_output = re.sub(r'\[]\(([^)]+)\)', r'(\1)', markdown_output)
-        markdown_output = re.sub(r'\n\n\n+', '\n\n', markdown_output)
-        
-        return markdown_output
-    except ImportError:
-        print("Warning: BeautifulSoup4 or markdownify not installed. Cannot convert HTML to Markdown.")
-        return html_content
-    except Exception as e:
-        print(f"Error converting HTML to Markdown: {e}")
-        return html_content
+# --- Helper Functions (Same as before) ---
 
 def generate_filename(url: str, suffix: str = "") -> str:
     """Generates a safe filename from a URL."""
@@ -110,15 +97,32 @@ async def step1_search_and_get_urls(query: str, max_results: int) -> list[dict]:
         print("  No search results found.")
     return search_results_info
 
-async def extract_content_and_save_with_playwright(page: Page, url: str, output_dir: str) -> tuple[str, str]:
+async def navigate(page: Page, url: str):
+    """
+    Opens a URL through the readiness engine, retrying network errors and 429/5xx answers.
+    Raises CircuitOpenError without navigating while the host's circuit is open.
+    """
+    return await retry_policy.run(lambda: readiness_engine.goto(page, url), url, circuit_breaker, status_of=lambda response: response.status if response else None)
+
+async def extract_content_and_save_with_playwright(page: Page, url: str, output_dir: str, auth_session: AuthSession | None = None) -> tuple[str, str]:
     """
     Navigates Playwright to a URL, extracts HTML, converts to Markdown, and saves both.
+    If the navigation shows that `auth_session` expired, logs in again (once for all workers) and retries.
     Returns (markdown_content, html_content) or (None, None) if failed.
     """
     html_content = None
     markdown_content = None
     try:
-        await page.goto(url, wait_until="networkidle", timeout=60000)
+        # domcontentloaded + learned per-domain wait instead of networkidle; transient failures are retried
+        response = await navigate(page, url)
+        if auth_session is not None and auth_session.is_expired(response):
+            logged_in = await auth_session.relogin(auth_session.generation_of(page.context))
+            await auth_session.refresh(page.context, logged_in)
+            if logged_in:
+                response = await navigate(page, url)
+        if response is not None and response.status in RETRYABLE_STATUS_CODES:
+            print(f"  Still failing after {retry_policy.max_attempts} attempts (HTTP {response.status}): {url}")
+            return None, None
         html_content = await page.content()
         markdown_content = convert_html_to_markdown_for_llm(html_content, url)
 
@@ -145,25 +149,16 @@ async def extract_content_and_save_with_playwright(page: Page, url: str, output_
         print(f"  Playwright failed to load, extract, or save content from {url}: {e}")
         return None, None
 
-# --- NEW: Login Handling Function ---
+# --- Login Handling Function ---
 async def login_to_linkedin(context: BrowserContext, username: str, password: str, login_url: str, home_url: str) -> bool:
     """
-    Handles logging into LinkedIn using a Playwright persistent context.
-    If already logged in, it will skip.
+    Logs into LinkedIn in the given (fresh) context; AuthSession exports the resulting session
+    and shares it with every crawl context. Whether a session is still valid is judged from
+    navigation responses (see AuthSession.is_expired), so there is no logged-in probe here.
     """
     print(f"\nAttempting to log in to LinkedIn at {login_url}...")
     page = await context.new_page()
     try:
-        await page.goto(home_url, wait_until="load", timeout=30000)
-        # Check if already logged in (e.g., by checking for a known element on the home page)
-        # LinkedIn's homepage after login might have a specific global navigation or feed element
-        try:
-            await page.wait_for_selector('div.global-nav__primary-items', timeout=10000)
-            print("  Already logged in to LinkedIn, skipping login steps.")
-            return True # Already logged in
-        except:
-            print("  Not logged in, proceeding with login process.")
-
         await page.goto(login_url, wait_until="domcontentloaded", timeout=30000)
 
         # Fill in credentials (use more robust locators if possible, e.g., byLabel, byPlaceholder)
@@ -177,9 +172,8 @@ async def login_to_linkedin(context: BrowserContext, username: str, password: st
         await page.click('button[type="submit"][data-litms-control-urn="login-submit"]')
         # Or a more general one: await page.click('button[type="submit"]')
 
-        # Wait for navigation to the home page or a known post-login element
+        # Landing on the home page (not a checkpoint or back on the login form) means the login worked
         await page.wait_for_url(home_url, timeout=60000) # Wait up to 60 seconds for redirect
-        await page.wait_for_selector('div.global-nav__primary-items', timeout=10000) # Verify an element
         print("  Successfully logged in to LinkedIn!")
         return True
     except Exception as e:
@@ -192,79 +186,97 @@ async def login_to_linkedin(context: BrowserContext, username: str, password: st
         await page.close()
 
 
+async def extract_search_result(item: dict, page_pool: PagePool, base_output_dir: str, auth_session: AuthSession | None = None) -> dict:
+    """
+    Visits one search result with a pooled page, saves its HTML and Markdown,
+    and returns its content record.
+    """
+    url = item['url']
+    print(f"  Visiting: {url}")
+
+    # LinkedIn pages need the login; pooled pages of a session context carry it
+    is_linkedin_url = "linkedin.com" in urlparse(url).netloc
+    if is_linkedin_url and not (LINKEDIN_USERNAME and LINKEDIN_PASSWORD):
+        print(f"  Skipping LinkedIn URL {url} because LinkedIn credentials are not provided.")
+        return {
+            "title": item['title'],
+            "url": url,
+            "markdown_content": "[LinkedIn content skipped: credentials missing]",
+            "html_content": "[LinkedIn content skipped: credentials missing]"
+        }
+
+    async with page_pool.page() as page:
+        markdown_content, html_content = await extract_content_and_save_with_playwright(page, url, base_output_dir, auth_session)
+
+    if markdown_content:
+        return {
+            "title": item['title'],
+            "url": url,
+            "markdown_content": markdown_content,
+            "html_content": html_content
+        }
+    print(f"  Skipping {url} due to content extraction/saving failure.")
+    return {
+        "title": item['title'],
+        "url": url,
+        "markdown_content": "[Content not available]",
+        "html_content": "[Content not available]"
+    }
+
 async def step2_extract_content_from_urls_with_playwright(
-    urls_info: list[dict], browser_context: BrowserContext, base_output_dir: str
+    urls_info: list[dict], browser_context: BrowserContext, base_output_dir: str, page_pool: PagePool | None = None,
+    page_pools: list[PagePool] | None = None, auth_session: AuthSession | None = None
 ) -> list[dict]:
     """
     Uses Playwright to visit each URL, extract its full HTML content,
     converts it to Markdown, and saves both to files.
+    With `page_pools` (one per session context), one worker per pool extracts URLs in parallel;
+    otherwise pages come from `page_pool` (a private pool is created if none is given).
+    Results are returned in the order of `urls_info`.
     """
     print("\nStep 2: Extracting content from URLs using Playwright...")
-    extracted_content_list = []
-    
-    for item in urls_info:
-        url = item['url']
-        print(f"  Visiting: {url}")
-        
-        # Check if it's a LinkedIn URL and we need to ensure login
-        is_linkedin_url = "linkedin.com" in urlparse(url).netloc
-        if is_linkedin_url:
-            # For LinkedIn, ensure login and then navigate
-            if not (LINKEDIN_USERNAME and LINKEDIN_PASSWORD):
-                print(f"  Skipping LinkedIn URL {url} because LinkedIn credentials are not provided.")
-                extracted_content_list.append({
-                    "title": item['title'],
-                    "url": url,
-                    "markdown_content": "[LinkedIn content skipped: credentials missing]",
-                    "html_content": "[LinkedIn content skipped: credentials missing]"
-                })
-                continue
-            
-            # The context should already be logged in from main if successful.
-            # Just create a new page in the logged-in context and proceed.
-            page = await browser_context.new_page()
-            # It's good practice to navigate to the LinkedIn home first to confirm session
-            # await page.goto(LINKEDIN_HOME_URL, wait_until="load", timeout=30000)
-            # await page.wait_for_selector('div.global-nav__primary-items', timeout=10000) # Optional check
-            # print(f"  Confirmed active LinkedIn session before navigating to {url}")
-        else:
-            page = await browser_context.new_page()
 
-        markdown_content, html_content = await extract_content_and_save_with_playwright(page, url, base_output_dir)
-        await page.close()
+    owns_page_pool = page_pools is None and page_pool is None
+    if page_pools is None:
+        page_pools = [page_pool if page_pool is not None else PagePool(browser_context)]
 
-        if markdown_content:
-            extracted_content_list.append({
-                "title": item['title'],
-                "url": url,
-                "markdown_content": markdown_content,
-                "html_content": html_content
-            })
-        else:
-            print(f"  Skipping {url} due to content extraction/saving failure.")
-            extracted_content_list.append({
-                "title": item['title'],
-                "url": url,
-                "markdown_content": "[Content not available]",
-                "html_content": "[Content not available]"
-            })
-            
+    pending_items = asyncio.Queue()
+    for position, item in enumerate(urls_info):
+        pending_items.put_nowait((position, item))
+    extracted_content = {}
+
+    async def extract_worker(worker_page_pool: PagePool):
+        while not pending_items.empty():
+            position, item = pending_items.get_nowait()
+            extracted_content[position] = await extract_search_result(item, worker_page_pool, base_output_dir, auth_session)
+
+    await asyncio.gather(*(extract_worker(worker_page_pool) for worker_page_pool in page_pools))
+    extracted_content_list = [extracted_content[position] for position in sorted(extracted_content)]
+
+    if owns_page_pool:
+        await page_pools[0].close()
     print(f"  Finished Playwright extraction for {len(extracted_content_list)} URLs.")
     return extracted_content_list
 
 async def step3_crawl_domain_for_more_pages_with_playwright(
-    domain_url: str, max_pages: int, browser_context: BrowserContext, base_output_dir: str
+    domain_url: str, max_pages: int, browser_context: BrowserContext, base_output_dir: str, page_pool: PagePool | None = None,
+    query: str = SEARCH_QUERY, auth_session: AuthSession | None = None, page_pools: list[PagePool] | None = None
 ) -> list[dict]:
     """
     Crawls a specific domain for more relevant pages using Playwright,
     extracting and saving their HTML and Markdown content. Limited to max_pages.
+    With `page_pools` (one per session context), one worker per pool crawls in parallel;
+    otherwise pages come from `page_pool` (a private pool is created if none is given).
+    The crawl is best-first: each discovered link is scored against `query` (anchor text,
+    URL tokens, relevance of the linking page) and the highest-scoring URL is visited next.
     """
     print(f"\nStep 3: Recursively crawling domain: {domain_url} for more pages (Max {max_pages})...")
     crawled_pages_info = []
     
-    visited_urls = set()
-    to_visit_queue = asyncio.Queue()
-    await to_visit_queue.put(domain_url)
+    visited_urls = SeenUrlStore()
+    relevance_scorer = RelevanceScorer(query)
+    to_visit_queue = PriorityFrontier()
+    to_visit_queue.push(domain_url)
     visited_urls.add(domain_url)
 
     parsed_domain = urlparse(domain_url).netloc
@@ -275,41 +287,71 @@ async def step3_crawl_domain_for_more_pages_with_playwright(
         print(f"  Skipping recursive crawl for LinkedIn domain {domain_url}: credentials not provided.")
         return [] # Don't attempt to crawl if no credentials
 
-    while not to_visit_queue.empty() and len(crawled_pages_info) < max_pages:
-        current_url = await to_visit_queue.get()
-        print(f"  Crawling (Playwright): {current_url} (Count: {len(crawled_pages_info)}/{max_pages})")
+    owns_page_pool = page_pools is None and page_pool is None
+    if page_pools is None:
+        page_pools = [page_pool if page_pool is not None else PagePool(browser_context)]
+
+    in_flight = 0 # Pages being visited; their links may still refill an empty queue
 
-        page = await browser_context.new_page()
-        markdown_content, html_content = await extract_content_and_save_with_playwright(page, current_url, base_output_dir)
+    async def crawl_url(current_url: str, link_score: float, worker_page_pool: PagePool):
+        print(f"  Crawling (Playwright): {current_url} (Count: {len(crawled_pages_info)}/{max_pages}, link score: {link_score:.2f})")
+
+        async with worker_page_pool.page() as page:
+            markdown_content, html_content = await extract_content_and_save_with_playwright(page, current_url, base_output_dir, auth_session)
         
-        if markdown_content:
-            crawled_pages_info.append({
-                "title": f"Crawled Page from {urlparse(current_url).netloc}",
-                "url": current_url,
-                "markdown_content": markdown_content,
-                "html_content": html_content
-            })
+            if markdown_content:
+                page_relevance = relevance_scorer.score_page(markdown_content)
+                print(f"    Relevance to query: {page_relevance:.2f}")
+                crawled_pages_info.append({
+                    "title": f"Crawled Page from {urlparse(current_url).netloc}",
+                    "url": current_url,
+                    "markdown_content": markdown_content,
+                    "html_content": html_content
+                })
             
-            # Find new links on the current page
-            link_elements = await page.locator("a").all()
-            for link_element in link_elements:
-                href = await link_element.get_attribute("href")
-                if href:
-                    absolute_url = urljoin(current_url, href)
+                # Find new links on the current page (one in-page evaluation for all anchors)
+                try:
+                    page_links = await extract_links(page)
+                except Exception as e:
+                    print(f"    Could not extract links from {current_url}: {e}")
+                    page_links = []
+                for link in page_links:
+                    absolute_url = link["href"]
                     parsed_absolute_url = urlparse(absolute_url)
 
                     if parsed_absolute_url.scheme in ('http', 'https') and \
                        parsed_absolute_url.netloc == parsed_domain and \
                        absolute_url not in visited_urls:
-                        
+
                         if len(parsed_absolute_url.path.split('/')) < 6 and \
                            not (parsed_absolute_url.path.lower().endswith(('.pdf', '.zip', '.doc', '.docx', '.xls', '.xlsx'))):
-                            await to_visit_queue.put(absolute_url)
+                            to_visit_queue.push(absolute_url, relevance_scorer.score_link(absolute_url, link["text"], page_relevance))
                             visited_urls.add(absolute_url)
-                        
-        await page.close()
 
+    async def crawl_worker(worker_page_pool: PagePool):
+        """Visits the best queued URL until max_pages are collected or nothing is left to visit."""
+        nonlocal in_flight
+        while len(crawled_pages_info) + in_flight < max_pages:
+            if not to_visit_queue:
+                if in_flight == 0:
+                    return # Nothing queued and no page in flight that could queue more
+                await asyncio.sleep(IDLE_WORKER_POLL_SECONDS)
+                continue
+            current_url, link_score, _ = to_visit_queue.pop()
+            in_flight += 1
+            try:
+                await crawl_url(current_url, link_score, worker_page_pool)
+            except Exception as e:
+                print(f"  Unexpected error while crawling {current_url}: {e}")
+            finally:
+                in_flight -= 1
+
+    await asyncio.gather(*(crawl_worker(worker_page_pool) for worker_page_pool in page_pools))
+
+    if owns_page_pool:
+        await page_pools[0].close()
     print(f"  Finished crawling {domain_url}. Collected {len(crawled_pages_info)} additional pages.")
+    print(f"  Relevance per fetch: {relevance_scorer.relevance_per_fetch():.2f} over {relevance_scorer.pages_scored} pages")
     return crawled_pages_info
 
 # --- Main Orchestration ---
@@ -318,41 +360,49 @@ async def main():
     print(f"All scraped data will be saved in: {os.path.abspath(OUTPUT_BASE_DIR)}")
     print(f"\nStarting web research for query: \"{SEARCH_QUERY}\"")
 
-    # Define the user data directory for persistent context
-    os.makedirs(USER_DATA_DIR, exist_ok=True)
-    print(f"Playwright user data (cookies, cache) will be stored in: {os.path.abspath(USER_DATA_DIR)}")
-
     async with async_playwright() as p:
-        # Launch a persistent context
-        # This will either load an existing session or create a new one
-        browser_context = await p.chromium.launch_persistent_context(
-            user_data_dir=USER_DATA_DIR,
-            headless=True # Set to False for the first run to manually log in
-        )
-        
+        browser = await p.chromium.launch(headless=True)
+
         # --- LinkedIn Login Section ---
-        # Check if LinkedIn credentials are provided and attempt to log in
+        # Log in once (or reuse the session saved by the previous run) and share it with every context
+        auth_session = None
         if LINKEDIN_USERNAME and LINKEDIN_PASSWORD:
-            print("\nChecking LinkedIn login status...")
-            await login_to_linkedin(browser_context, LINKEDIN_USERNAME, LINKEDIN_PASSWORD, LINKEDIN_LOGIN_URL, LINKEDIN_HOME_URL)
+            print("\nPreparing the LinkedIn session...")
+            auth_session = AuthSession(
+                browser,
+                lambda context: login_to_linkedin(context, LINKEDIN_USERNAME, LINKEDIN_PASSWORD, LINKEDIN_LOGIN_URL, LINKEDIN_HOME_URL),
+                state_path=STORAGE_STATE_PATH,
+                domain=LINKEDIN_DOMAIN,
+                expired_url_pattern=LINKEDIN_EXPIRED_URL_PATTERN,
+            )
+            if not await auth_session.start():
+                print("  LinkedIn login failed; LinkedIn pages will likely be inaccessible.")
         else:
             print("\nLinkedIn credentials (LINKEDIN_USERNAME, LINKEDIN_PASSWORD) not provided. Will not attempt LinkedIn login.")
             print("Note: If search results include LinkedIn URLs, they might be inaccessible.")
 
+        # Independent contexts for parallel crawling, all carrying the same session
+        browser_contexts = []
+        for _ in range(NUM_SESSION_CONTEXTS):
+            browser_contexts.append(await auth_session.new_context() if auth_session else await browser.new_context())
+        page_pools = [PagePool(context) for context in browser_contexts]
+        browser_context = browser_contexts[0]
 
         # Step 1: Perform initial search and get relevant URLs
         search_results_info = await step1_search_and_get_urls(SEARCH_QUERY, MAX_SEARCH_RESULTS_TO_PROCESS)
 
         if not search_results_info:
             print("No initial search results to process. Exiting.")
-            await browser_context.close()
+            for context_page_pool in page_pools:
+                await context_page_pool.close()
+            await browser.close()
             return
 
         print(f"\nSuccessfully found {len(search_results_info)} initial search results.")
 
         # Step 2: Extract content from the initial search results using Playwright
         extracted_content_from_search = await step2_extract_content_from_urls_with_playwright(
-            search_results_info, browser_context, OUTPUT_BASE_DIR
+            search_results_info, browser_context, OUTPUT_BASE_DIR, page_pools=page_pools, auth_session=auth_session
         )
         all_collected_content = list(extracted_content_from_search)
 
@@ -370,7 +420,7 @@ async def main():
             print(f"\nIdentified unique domains for optional deeper crawl: {list(unique_domains_to_crawl)}")
             for domain_url in list(unique_domains_to_crawl):
                 crawled_pages = await step3_crawl_domain_for_more_pages_with_playwright(
-                    domain_url, MAX_PAGES_TO_EXTRACT_PER_DOMAIN, browser_context, OUTPUT_BASE_DIR
+                    domain_url, MAX_PAGES_TO_EXTRACT_PER_DOMAIN, browser_context, OUTPUT_BASE_DIR, page_pools=page_pools, auth_session=auth_session
                 )
                 if crawled_pages:
                     print(f"  Successfully crawled {len(crawled_pages)} additional pages from {domain_url}")
@@ -380,7 +430,15 @@ async def main():
                 else:
                     print(f"  No additional pages crawled from {domain_url}")
 
-        await browser_context.close() # Close persistent context at the end
+        print(f"Page pool stats: {[context_page_pool.stats() for context_page_pool in page_pools]}")
+        print(f"Page readiness wait times: {readiness_engine.wait_stats()}")
+        print(f"Retries: {retry_policy.stats()}")
+        print(f"Circuit breaker (time saved on failing hosts): {circuit_breaker.stats()}")
+        if auth_session:
+            print(f"Auth session: {auth_session.stats()}")
+        for context_page_pool in page_pools:
+            await context_page_pool.close()
+        await browser.close() # Also closes every context
 
         print("\n--- All Collected Content for LLM ---")
         if all_collected_content:
@@ -1,8 +1,9 @@
 import os
 import re
+import time
 import asyncio
 import hashlib # For creating unique filenames
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 
 # Ensure these are installed:
 # pip install tavily-python markdownify beautifulsoup4 playwright
@@ -10,8 +11,15 @@ from urllib.parse import urljoin, urlparse
 
 from tavily import TavilyClient
 from playwright.async_api import async_playwright, Page
-from markdownify import markdownify as md
-from bs4 import BeautifulSoup
+from html_to_markdown import convert_html_to_markdown_for_llm
+
+from fetch_profiles import ResourceBlocker
+from fetch_resilience import RETRYABLE_STATUS_CODES, CircuitBreaker, RetryPolicy
+from link_extractor import extract_links
+from page_pool import PagePool
+from page_readiness import ReadinessEngine
+from relevance import PriorityFrontier, RelevanceScorer
+from url_seen import SeenUrlStore
 
 # --- Configuration ---
 TAVILY_API_KEY = os.environ.get("TAVILY_API_KEY")
@@ -21,49 +29,35 @@ if not TAVILY_API_KEY:
 SEARCH_QUERY = "DeepMind latest research on AI ethics"
 MAX_SEARCH_RESULTS_TO_PROCESS = 3 # Limit for demonstration
 MAX_PAGES_TO_EXTRACT_PER_DOMAIN = 1 # Limit for demonstration for recursive crawl
+MAX_DOMAINS_TO_CRAWL = 1 # Domains (in search result order) that get a deeper crawl
+
+# Pipeline: search results stream into extraction workers, and each extracted result's domain
+# streams into domain-crawl workers, through bounded queues (a full queue holds back the stage before it)
+EXTRACT_WORKERS = 3
+CRAWL_WORKERS = 2
+PIPELINE_QUEUE_SIZE = 8
 
 OUTPUT_BASE_DIR = "scraped_data" # Base directory for all scraped output
 
+# Fetch profile for route interception: "text" skips images, media, fonts, stylesheets and trackers;
+# "full" loads everything
+FETCH_PROFILE = "text"
+
 # Initialize Tavily Client
 tavily_client = TavilyClient(api_key=TAVILY_API_KEY)
 
-# --- Helper Functions ---
+# Aborts requests the fetch profile does not need; installed on every pooled page
+resource_blocker = ResourceBlocker(FETCH_PROFILE)
 
-def convert_html_to_markdown_for_llm(html_content: str, base_url: str = "") -> str:
-    """
-    Converts raw HTML content to Markdown, making it suitable for LLMs.
-    Handles relative links/images and performs additional cleanup.
-    """
-    if not html_content:
-        return ""
+# Decides when a navigated page is ready, learning per domain instead of always waiting for networkidle
+readiness_engine = ReadinessEngine()
 
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        for img in soup.find_all('img', src=True):
-            img['src'] = urljoin(base_url, img['src'])
-        for a in soup.find_all('a', href=True):
-            a['href'] = urljoin(base_url, a['href'])
-
-        converter = md.MarkdownConverter(
-            strong_em_symbol='**',
-            bullets='*',
-            code_language='python',
-            strip=['script', 'style', 'header', 'footer', 'nav', 'aside', 'form', 'button', '.sidebar', '#comments']
-        )
-        markdown_output = converter.convert(str(soup))
-
-        markdown_output = re.sub(r'\n\s*\n', '\n\n', markdown_output).strip()
-        markdown_output = re.sub(r'\[]\(([^)]+)\)', r'(\1)', markdown_output)
-        markdown_output = re.sub(r'\n\n\n+', '\n\n', markdown_output)
-        
-        return markdown_output
-    except ImportError:
-        print("Warning: BeautifulSoup4 or markdownify not installed. Cannot convert HTML to Markdown.")
-        return html_content
-    except Exception as e:
-        print(f"Error converting HTML to Markdown: {e}")
-        return html_content
+# Retries transient navigation failures with jittered exponential backoff; a host that keeps
+# failing gets its circuit opened, so its remaining pages fail fast instead of each timing out
+retry_policy = RetryPolicy()
+circuit_breaker = CircuitBreaker()
+
+# --- Helper Functions ---
 
 def generate_filename(url: str, suffix: str = "") -> str:
     """Generates a safe filename from a URL."""
@@ -84,7 +78,8 @@ async def step1_search_and_get_urls(query: str, max_results: int) -> list[dict]:
     Performs a Tavily search and returns a list of relevant URL information.
     """
     print(f"Step 1: Performing Tavily search for: \"{query}\"")
-    response = tavily_client.search(
+    response = await asyncio.to_thread( # The Tavily client blocks; keep the event loop free for the other stages
+        tavily_client.search,
         query=query,
         search_depth="advanced",
         max_results=max_results,
@@ -106,6 +101,13 @@ async def step1_search_and_get_urls(query: str, max_results: int) -> list[dict]:
         print("  No search results found.")
     return search_results_info
 
+async def navigate(page: Page, url: str):
+    """
+    Opens a URL through the readiness engine, retrying network errors and 429/5xx answers.
+    Raises CircuitOpenError without navigating while the host's circuit is open.
+    """
+    return await retry_policy.run(lambda: readiness_engine.goto(page, url), url, circuit_breaker, status_of=lambda response: response.status if response else None)
+
 async def extract_content_and_save_with_playwright(page: Page, url: str, output_dir: str) -> tuple[str, str]:
     """
     Navigates Playwright to a URL, extracts HTML, converts to Markdown, and saves both.
@@ -114,7 +116,11 @@ async def extract_content_and_save_with_playwright(page: Page, url: str, output_
     html_content = None
     markdown_content = None
     try:
-        await page.goto(url, wait_until="networkidle", timeout=60000)
+        # domcontentloaded + learned per-domain wait instead of networkidle; transient failures are retried
+        response = await navigate(page, url)
+        if response is not None and response.status in RETRYABLE_STATUS_CODES:
+            print(f"  Still failing after {retry_policy.max_attempts} attempts (HTTP {response.status}): {url}")
+            return None, None
         html_content = await page.content()
         markdown_content = convert_html_to_markdown_for_llm(html_content, url)
 
@@ -141,97 +147,232 @@ async def extract_content_and_save_with_playwright(page: Page, url: str, output_
         print(f"  Playwright failed to load, extract, or save content from {url}: {e}")
         return None, None
 
+async def extract_search_result(item: dict, page_pool: PagePool, base_output_dir: str) -> dict:
+    """
+    Visits one search result with a pooled page, saves its HTML and Markdown,
+    and returns its content record ("[Content not available]" if extraction failed).
+    """
+    url = item['url']
+    print(f"  Visiting: {url}")
+    async with page_pool.page() as page:
+        markdown_content, html_content = await extract_content_and_save_with_playwright(page, url, base_output_dir)
+        blocked_stats = resource_blocker.pop_page_stats(page)
+    print(f"    Blocked {blocked_stats['blocked_requests']} requests (~{blocked_stats['estimated_bytes_saved'] / 1024:.0f} KiB saved)")
+
+    if markdown_content:
+        return {
+            "title": item['title'],
+            "url": url,
+            "markdown_content": markdown_content,
+            "html_content": html_content # Store HTML too if needed later in combined output
+        }
+    print(f"  Skipping {url} due to content extraction/saving failure.")
+    return {
+        "title": item['title'],
+        "url": url,
+        "markdown_content": "[Content not available]",
+        "html_content": "[Content not available]"
+    }
+
 async def step2_extract_content_from_urls_with_playwright(
-    urls_info: list[dict], browser_context, base_output_dir: str
+    urls_info: list[dict], browser_context, base_output_dir: str, page_pool: PagePool | None = None
 ) -> list[dict]:
     """
     Uses Playwright to visit each URL, extract its full HTML content,
     converts it to Markdown, and saves both to files.
+    Pages come from `page_pool` (a private pool is created if none is given).
     """
     print("\nStep 2: Extracting content from URLs using Playwright...")
     extracted_content_list = []
+
+    owns_page_pool = page_pool is None
+    if owns_page_pool:
+        page_pool = PagePool(browser_context, on_new_page=resource_blocker.attach)
     
     for item in urls_info:
-        url = item['url']
-        print(f"  Visiting: {url}")
-        page = await browser_context.new_page()
-        markdown_content, html_content = await extract_content_and_save_with_playwright(page, url, base_output_dir)
-        await page.close()
-
-        if markdown_content:
-            extracted_content_list.append({
-                "title": item['title'],
-                "url": url,
-                "markdown_content": markdown_content,
-                "html_content": html_content # Store HTML too if needed later in combined output
-            })
-        else:
-            print(f"  Skipping {url} due to content extraction/saving failure.")
-            extracted_content_list.append({
-                "title": item['title'],
-                "url": url,
-                "markdown_content": "[Content not available]",
-                "html_content": "[Content not available]"
-            })
+        extracted_content_list.append(await extract_search_result(item, page_pool, base_output_dir))
             
+    if owns_page_pool:
+        await page_pool.close()
     print(f"  Finished Playwright extraction for {len(extracted_content_list)} URLs.")
     return extracted_content_list
 
 async def step3_crawl_domain_for_more_pages_with_playwright(
-    domain_url: str, max_pages: int, browser_context, base_output_dir: str
+    domain_url: str, max_pages: int, browser_context, base_output_dir: str, page_pool: PagePool | None = None,
+    query: str = SEARCH_QUERY
 ) -> list[dict]:
     """
     Crawls a specific domain for more relevant pages using Playwright,
     extracting and saving their HTML and Markdown content. Limited to max_pages.
+    Pages come from `page_pool` (a private pool is created if none is given).
+    The crawl is best-first: each discovered link is scored against `query` (anchor text,
+    URL tokens, relevance of the linking page) and the highest-scoring URL is visited next.
     """
     print(f"\nStep 3: Recursively crawling domain: {domain_url} for more pages (Max {max_pages})...")
     crawled_pages_info = []
     
-    visited_urls = set()
-    to_visit_queue = asyncio.Queue()
-    await to_visit_queue.put(domain_url)
+    visited_urls = SeenUrlStore()
+    relevance_scorer = RelevanceScorer(query)
+    to_visit_queue = PriorityFrontier()
+    to_visit_queue.push(domain_url)
     visited_urls.add(domain_url)
 
     parsed_domain = urlparse(domain_url).netloc
 
-    while not to_visit_queue.empty() and len(crawled_pages_info) < max_pages:
-        current_url = await to_visit_queue.get()
-        print(f"  Crawling (Playwright): {current_url} (Count: {len(crawled_pages_info)}/{max_pages})")
+    owns_page_pool = page_pool is None
+    if owns_page_pool:
+        page_pool = PagePool(browser_context, on_new_page=resource_blocker.attach)
+
+    while to_visit_queue and len(crawled_pages_info) < max_pages:
+        current_url, link_score, _ = to_visit_queue.pop()
+        print(f"  Crawling (Playwright): {current_url} (Count: {len(crawled_pages_info)}/{max_pages}, link score: {link_score:.2f})")
 
-        page = await browser_context.new_page()
-        markdown_content, html_content = await extract_content_and_save_with_playwright(page, current_url, base_output_dir)
+        async with page_pool.page() as page:
+            markdown_content, html_content = await extract_content_and_save_with_playwright(page, current_url, base_output_dir)
+            blocked_stats = resource_blocker.pop_page_stats(page)
+            print(f"    Blocked {blocked_stats['blocked_requests']} requests (~{blocked_stats['estimated_bytes_saved'] / 1024:.0f} KiB saved)")
         
-        if markdown_content:
-            crawled_pages_info.append({
-                "title": f"Crawled Page from {urlparse(current_url).netloc}",
-                "url": current_url,
-                "markdown_content": markdown_content,
-                "html_content": html_content
-            })
+            if markdown_content:
+                page_relevance = relevance_scorer.score_page(markdown_content)
+                print(f"    Relevance to query: {page_relevance:.2f}")
+                crawled_pages_info.append({
+                    "title": f"Crawled Page from {urlparse(current_url).netloc}",
+                    "url": current_url,
+                    "markdown_content": markdown_content,
+                    "html_content": html_content
+                })
             
-            # Find new links on the current page
-            link_elements = await page.locator("a").all()
-            for link_element in link_elements:
-                href = await link_element.get_attribute("href")
-                if href:
-                    absolute_url = urljoin(current_url, href)
+                # Find new links on the current page (one in-page evaluation for all anchors)
+                try:
+                    page_links = await extract_links(page)
+                except Exception as e:
+                    print(f"    Could not extract links from {current_url}: {e}")
+                    page_links = []
+                for link in page_links:
+                    absolute_url = link["href"]
                     parsed_absolute_url = urlparse(absolute_url)
 
                     if parsed_absolute_url.scheme in ('http', 'https') and \
                        parsed_absolute_url.netloc == parsed_domain and \
                        absolute_url not in visited_urls:
-                        
+
                         # Avoid very deep paths or specific file types for demo
                         if len(parsed_absolute_url.path.split('/')) < 6 and \
                            not (parsed_absolute_url.path.lower().endswith(('.pdf', '.zip', '.doc', '.docx', '.xls', '.xlsx'))):
-                            await to_visit_queue.put(absolute_url)
+                            to_visit_queue.push(absolute_url, relevance_scorer.score_link(absolute_url, link["text"], page_relevance))
                             visited_urls.add(absolute_url)
-                        
-        await page.close()
 
+    if owns_page_pool:
+        await page_pool.close()
     print(f"  Finished crawling {domain_url}. Collected {len(crawled_pages_info)} additional pages.")
+    print(f"  Relevance per fetch: {relevance_scorer.relevance_per_fetch():.2f} over {relevance_scorer.pages_scored} pages")
     return crawled_pages_info
 
+# --- Pipeline ---
+async def run_research_pipeline(query: str, browser_context, page_pool: PagePool, base_output_dir: str) -> list[dict]:
+    """
+    Runs search -> extraction -> domain crawl as a streaming pipeline and returns the collected pages.
+
+    Search results are queued for EXTRACT_WORKERS extraction workers as soon as the search returns;
+    once a result is extracted, its domain (if among the first MAX_DOMAINS_TO_CRAWL domains of the
+    search results) is queued for CRAWL_WORKERS domain-crawl workers. Queues are bounded by
+    PIPELINE_QUEUE_SIZE, and each stage tells the next one it is done with one None sentinel per worker.
+    Errors are caught per item (a failed extraction is recorded as "[Content not available]"), and
+    sentinels are sent from `finally`, so one bad page or domain cannot stall or abort the pipeline.
+    Search results are listed first in the returned pages, then crawled pages, each URL once.
+    """
+    extract_queue: asyncio.Queue[dict | None] = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    crawl_queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    extracted_pages: dict[int, dict] = {} # Search result position -> content record
+    crawled_pages: list[dict] = []
+    stage_seconds = {"search": 0.0, "extract": 0.0, "crawl": 0.0} # Busy time summed over each stage's workers
+    domains_to_crawl: set[str] = set()
+    queued_domains: set[str] = set()
+
+    def domain_of(url: str) -> str | None:
+        parsed_url = urlparse(url)
+        return f"{parsed_url.scheme}://{parsed_url.netloc}" if parsed_url.netloc else None
+
+    async def search_stage():
+        start_time = time.monotonic()
+        try:
+            try:
+                search_results_info = await step1_search_and_get_urls(query, MAX_SEARCH_RESULTS_TO_PROCESS)
+            except Exception as e:
+                print(f"  Search failed: {e}")
+                search_results_info = []
+            stage_seconds["search"] += time.monotonic() - start_time
+            if not search_results_info:
+                print("No initial search results to process.")
+            for result in search_results_info:
+                domain = domain_of(result["url"])
+                if domain and len(domains_to_crawl) < MAX_DOMAINS_TO_CRAWL:
+                    domains_to_crawl.add(domain)
+            for position, result in enumerate(search_results_info):
+                await extract_queue.put({**result, "position": position})
+        finally:
+            for _ in range(EXTRACT_WORKERS):
+                await extract_queue.put(None)
+
+    async def extract_worker():
+        while (item := await extract_queue.get()) is not None:
+            start_time = time.monotonic()
+            try:
+                extracted_pages[item["position"]] = await extract_search_result(item, page_pool, base_output_dir)
+            except Exception as e:
+                print(f"  Extraction of {item['url']} failed: {e}")
+                extracted_pages[item["position"]] = {
+                    "title": item['title'],
+                    "url": item['url'],
+                    "markdown_content": "[Content not available]",
+                    "html_content": "[Content not available]"
+                }
+            finally:
+                stage_seconds["extract"] += time.monotonic() - start_time
+            domain = domain_of(item["url"])
+            if domain in domains_to_crawl and domain not in queued_domains:
+                queued_domains.add(domain)
+                await crawl_queue.put(domain)
+
+    async def crawl_worker():
+        while (domain_url := await crawl_queue.get()) is not None:
+            start_time = time.monotonic()
+            try:
+                pages = await step3_crawl_domain_for_more_pages_with_playwright(
+                    domain_url, MAX_PAGES_TO_EXTRACT_PER_DOMAIN, browser_context, base_output_dir, page_pool=page_pool, query=query
+                )
+            except Exception as e:
+                print(f"  Crawling {domain_url} failed: {e}")
+                pages = []
+            finally:
+                stage_seconds["crawl"] += time.monotonic() - start_time
+            if pages:
+                print(f"  Successfully crawled {len(pages)} additional pages from {domain_url}")
+                crawled_pages.extend(pages)
+            else:
+                print(f"  No additional pages crawled from {domain_url}")
+
+    async def extract_stage():
+        try:
+            await asyncio.gather(*(extract_worker() for _ in range(EXTRACT_WORKERS)))
+        finally:
+            for _ in range(CRAWL_WORKERS):
+                await crawl_queue.put(None)
+
+    start_time = time.monotonic()
+    await asyncio.gather(search_stage(), extract_stage(), *(crawl_worker() for _ in range(CRAWL_WORKERS)))
+    elapsed_seconds = time.monotonic() - start_time
+    print(f"\nPipeline finished in {elapsed_seconds:.1f}s (busy time per stage: "
+          + ", ".join(f"{stage} {seconds:.1f}s" for stage, seconds in stage_seconds.items()) + ")")
+
+    all_collected_content = [extracted_pages[position] for position in sorted(extracted_pages)]
+    collected_urls = {item["url"] for item in all_collected_content}
+    for page_info in crawled_pages:
+        if page_info["url"] not in collected_urls:
+            collected_urls.add(page_info["url"])
+            all_collected_content.append(page_info)
+    return all_collected_content
+
 # --- Main Orchestration ---
 async def main():
     # Ensure the base output directory exists
@@ -242,44 +383,16 @@ async def main():
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True)
         browser_context = await browser.new_context()
+        page_pool = PagePool(browser_context, max_size=EXTRACT_WORKERS + CRAWL_WORKERS, on_new_page=resource_blocker.attach)
 
-        search_results_info = await step1_search_and_get_urls(SEARCH_QUERY, MAX_SEARCH_RESULTS_TO_PROCESS)
-
-        if not search_results_info:
-            print("No initial search results to process. Exiting.")
-            await browser.close()
-            return
-
-        print(f"\nSuccessfully found {len(search_results_info)} initial search results.")
-
-        extracted_content_from_search = await step2_extract_content_from_urls_with_playwright(
-            search_results_info, browser_context, OUTPUT_BASE_DIR
-        )
-        all_collected_content = list(extracted_content_from_search)
-
-        unique_domains_to_crawl = set()
-        for result in search_results_info:
-            parsed_url = urlparse(result["url"])
-            domain = f"{parsed_url.scheme}://{parsed_url.netloc}"
-            if domain and parsed_url.netloc:
-                unique_domains_to_crawl.add(domain)
-                if len(unique_domains_to_crawl) >= 1:
-                    break
-        
-        if unique_domains_to_crawl:
-            print(f"\nIdentified unique domains for optional deeper crawl: {list(unique_domains_to_crawl)}")
-            for domain_url in list(unique_domains_to_crawl):
-                crawled_pages = await step3_crawl_domain_for_more_pages_with_playwright(
-                    domain_url, MAX_PAGES_TO_EXTRACT_PER_DOMAIN, browser_context, OUTPUT_BASE_DIR
-                )
-                if crawled_pages:
-                    print(f"  Successfully crawled {len(crawled_pages)} additional pages from {domain_url}")
-                    for page_info in crawled_pages:
-                        if not any(item['url'] == page_info['url'] for item in all_collected_content):
-                            all_collected_content.append(page_info)
-                else:
-                    print(f"  No additional pages crawled from {domain_url}")
+        all_collected_content = await run_research_pipeline(SEARCH_QUERY, browser_context, page_pool, OUTPUT_BASE_DIR)
 
+        print(f"Page pool stats: {page_pool.stats()}")
+        print(f"Fetch profile '{FETCH_PROFILE}' savings: {resource_blocker.total_stats}")
+        print(f"Page readiness wait times: {readiness_engine.wait_stats()}")
+        print(f"Retries: {retry_policy.stats()}")
+        print(f"Circuit breaker (time saved on failing hosts): {circuit_breaker.stats()}")
+        await page_pool.close()
         await browser.close()
 
         print("\n--- All Collected Content for LLM ---")
@@ -0,0 +1,100 @@
+# Off-event-loop HTML-to-Markdown conversion.
+
+# BeautifulSoup parsing, markdownify and the regex cleanup are CPU-bound. Run inside
+# a crawl coroutine they stall the event loop, and every in-flight navigation with it.
+# ConversionPool runs the conversion function in a process pool instead:
+
+#     await pool.convert(html, url) returns the markdown while the event loop keeps
+#     driving navigations and HTTP requests.
+
+#     At most `max_workers + max_queue_size` conversions are submitted at once. Further
+#     callers wait for a slot (backpressure), so a fast fetcher cannot pile up an
+#     unbounded backlog of HTML in memory.
+
+#     Every conversion is logged with its time in the worker and the queue depth seen
+#     when it was submitted.
+
+# The conversion function must be a module-level function (it is pickled by reference).
+
+import os
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable
+
+# --- Configuration ---
+DEFAULT_MAX_WORKERS = max(1, (os.cpu_count() or 2) - 1) # Leave one core for the event loop and the browser
+DEFAULT_MAX_QUEUE_SIZE = 16 # Conversions waiting for a worker before callers are held back
+
+
+def _timed_call(convert_function: Callable[[str, str], Any], html_content: str, base_url: str) -> tuple[Any, float]:
+    start_time = time.perf_counter()
+    result = convert_function(html_content, base_url)
+    return result, time.perf_counter() - start_time
+
+
+class ConversionPool:
+    """Runs an HTML-to-Markdown function in worker processes with a bounded queue."""
+
+    def __init__(self, convert_function: Callable[[str, str], Any], max_workers: int = DEFAULT_MAX_WORKERS, max_queue_size: int = DEFAULT_MAX_QUEUE_SIZE, log: bool = True):
+        """
+        Args:
+            convert_function (Callable): Module-level function (html_content, base_url) -> markdown, or any
+                picklable result derived from the page (e.g. near_duplicates.convert_with_main_text).
+            max_workers (int): Worker processes.
+            max_queue_size (int): Conversions allowed to wait for a worker before convert() blocks.
+            log (bool): Print per-page conversion time and queue depth.
+        """
+        self.convert_function = convert_function
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        self.log = log
+        self.executor = ProcessPoolExecutor(max_workers=max_workers)
+        self._slots: asyncio.Semaphore | None = None # Created on first use, inside the running loop
+
+        self.submitted = 0 # Conversions currently submitted (running or waiting for a worker)
+        self.conversions = 0
+        self.total_conversion_seconds = 0.0
+        self.total_wait_seconds = 0.0 # Time callers spent blocked by backpressure
+        self.max_queue_depth = 0
+
+    def queue_depth(self) -> int:
+        """Conversions submitted but not yet picked up by a worker."""
+        return max(0, self.submitted - self.max_workers)
+
+    async def convert(self, html_content: str, base_url: str = "") -> Any:
+        """Converts HTML in a worker process and returns the markdown (whatever convert_function returns)."""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_workers + self.max_queue_size)
+
+        wait_start = time.monotonic()
+        async with self._slots:
+            self.total_wait_seconds += time.monotonic() - wait_start
+            self.submitted += 1
+            queue_depth = self.queue_depth()
+            self.max_queue_depth = max(self.max_queue_depth, queue_depth)
+            try:
+                loop = asyncio.get_running_loop()
+                markdown_content, conversion_seconds = await loop.run_in_executor(
+                    self.executor, _timed_call, self.convert_function, html_content, base_url
+                )
+            finally:
+                self.submitted -= 1
+
+        self.conversions += 1
+        self.total_conversion_seconds += conversion_seconds
+        if self.log:
+            print(f"    Converted {base_url or 'page'} in {conversion_seconds * 1000:.0f} ms (conversion queue depth: {queue_depth})")
+        return markdown_content
+
+    def stats(self) -> dict:
+        """Returns conversion counts, mean conversion time and backpressure figures."""
+        return {
+            "conversions": self.conversions,
+            "mean_conversion_ms": round(self.total_conversion_seconds / self.conversions * 1000, 1) if self.conversions else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+            "backpressure_wait_seconds": round(self.total_wait_seconds, 2),
+        }
+
+    def close(self):
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,222 @@
+# Persistent, resumable crawl frontier backed by SQLite.
+
+# An in-memory queue and visited set lose the whole crawl when the process dies.
+# CrawlFrontier keeps every discovered URL on disk instead:
+
+#     frontier table: one row per unique URL (keyed by a 64-bit fingerprint of the
+#     normalized URL) with its depth, status and discovery order.
+#         status: queued -> in_progress -> done | failed
+
+#     Writes are batched and committed as a checkpoint every CHECKPOINT_EVERY_WRITES
+#     writes or CHECKPOINT_INTERVAL_SECONDS seconds, whichever comes first.
+
+#     On resume, rows left "in_progress" by the crashed run are put back in the
+#     queue and the crawl continues from the first queued URL.
+
+#     A queued URL can be parked with defer(url, not_before): it is skipped by
+#     claim_next() until that (wall-clock) time, e.g. while its host's circuit is open.
+
+#     Each URL carries a priority (default 0). claim_next() returns the highest-priority
+#     ready URL, oldest first among equals, so a crawl without priorities stays FIFO and
+#     a focused crawl (see relevance.py) is best-first.
+
+# Only the rows being claimed are ever loaded into memory, plus a compact
+# SeenUrlStore of fingerprints (about 16 bytes per URL) that answers "already queued?"
+# for every discovered link without an SQLite round trip. The store holds millions
+# of URLs without keeping them in RAM.
+
+import os
+import time
+import sqlite3
+from urllib.parse import urldefrag, urlparse, parse_qs, urlencode
+
+from url_seen import SeenUrlStore, fingerprint64
+
+# --- Configuration ---
+CHECKPOINT_EVERY_WRITES = 500
+CHECKPOINT_INTERVAL_SECONDS = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fingerprint INTEGER NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    depth INTEGER NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    not_before REAL NOT NULL DEFAULT 0,
+    priority REAL NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_frontier_status ON frontier (status, id);
+CREATE TABLE IF NOT EXISTS crawl_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def normalize_url(url: str) -> str:
+    """Removes the fragment and sorts query params so equivalent URLs compare equal."""
+    defragged_url, _ = urldefrag(url)
+    parsed_url = urlparse(defragged_url)
+    query_params = parse_qs(parsed_url.query)
+    sorted_query = urlencode(sorted(query_params.items()), doseq=True)
+    return parsed_url._replace(query=sorted_query).geturl()
+
+
+def url_fingerprint(url: str) -> int:
+    """Returns a signed 64-bit fingerprint of the normalized URL (fits an SQLite INTEGER)."""
+    fingerprint = fingerprint64(normalize_url(url))
+    return fingerprint - (1 << 64) if fingerprint >= 1 << 63 else fingerprint
+
+
+class CrawlFrontier:
+    """On-disk URL frontier with per-URL status and periodic checkpoints."""
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): SQLite file holding the frontier (created if missing).
+        """
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(frontier)")]
+        if "not_before" not in columns: # Frontier written before URLs could be deferred
+            self.connection.execute("ALTER TABLE frontier ADD COLUMN not_before REAL NOT NULL DEFAULT 0")
+        if "priority" not in columns: # Frontier written before best-first crawling
+            self.connection.execute("ALTER TABLE frontier ADD COLUMN priority REAL NOT NULL DEFAULT 0")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS idx_frontier_priority ON frontier (status, priority DESC, id)")
+        self.connection.commit()
+        self._pending_writes = 0
+        self._last_checkpoint = time.monotonic()
+        self._load_seen()
+
+    def _load_seen(self):
+        """Rebuilds the in-memory fingerprint store from the frontier table."""
+        self.seen = SeenUrlStore()
+        for (fingerprint,) in self.connection.execute("SELECT fingerprint FROM frontier"):
+            self.seen.add_fingerprint(fingerprint)
+
+    # --- Checkpointing ---
+
+    def _wrote(self, count: int = 1):
+        self._pending_writes += count
+        if self._pending_writes >= CHECKPOINT_EVERY_WRITES or time.monotonic() - self._last_checkpoint >= CHECKPOINT_INTERVAL_SECONDS:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Commits all pending writes to disk."""
+        self.connection.commit()
+        self._pending_writes = 0
+        self._last_checkpoint = time.monotonic()
+
+    # --- Lifecycle ---
+
+    def reset(self):
+        """Drops all frontier state for a fresh crawl."""
+        self.connection.execute("DELETE FROM frontier")
+        self.connection.execute("DELETE FROM crawl_meta")
+        self.checkpoint()
+        self.seen = SeenUrlStore()
+
+    def requeue_in_progress(self) -> int:
+        """Puts URLs a previous (crashed) run had claimed back into the queue. Returns how many."""
+        cursor = self.connection.execute(
+            "UPDATE frontier SET status = 'queued', updated_at = ? WHERE status = 'in_progress'", (time.time(),)
+        )
+        self.checkpoint()
+        return cursor.rowcount
+
+    def close(self):
+        self.checkpoint()
+        self.connection.close()
+
+    # --- Queue operations ---
+
+    def add(self, url: str, depth: int, priority: float = 0.0) -> bool:
+        """
+        Queues a URL unless it was seen before. Returns True if it was new.
+        A seen URL that is still queued has its priority raised to `priority` if that is higher.
+        """
+        fingerprint = url_fingerprint(url)
+        if not self.seen.add_fingerprint(fingerprint):
+            if priority > 0:
+                cursor = self.connection.execute(
+                    "UPDATE frontier SET priority = ? WHERE fingerprint = ? AND status = 'queued' AND priority < ?",
+                    (priority, fingerprint, priority),
+                )
+                if cursor.rowcount:
+                    self._wrote()
+            return False
+        cursor = self.connection.execute(
+            "INSERT OR IGNORE INTO frontier (fingerprint, url, depth, priority, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (fingerprint, url, depth, priority, time.time()),
+        )
+        if cursor.rowcount:
+            self._wrote()
+        return bool(cursor.rowcount)
+
+    def contains(self, url: str) -> bool:
+        """Returns True if the URL was ever queued (in any status)."""
+        return self.seen.contains_fingerprint(url_fingerprint(url))
+
+    def claim_next(self) -> tuple[str, int] | None:
+        """Marks the highest-priority (then oldest) ready queued URL as in progress and returns (url, depth), or None if none is ready."""
+        row = self.connection.execute(
+            "SELECT id, url, depth FROM frontier WHERE status = 'queued' AND not_before <= ? ORDER BY priority DESC, id LIMIT 1",
+            (time.time(),),
+        ).fetchone()
+        if row is None:
+            return None
+        row_id, url, depth = row
+        self.connection.execute("UPDATE frontier SET status = 'in_progress', updated_at = ? WHERE id = ?", (time.time(), row_id))
+        self._wrote()
+        return url, depth
+
+    def mark(self, url: str, status: str):
+        """Records the final status of a claimed URL (e.g. "done" or "failed")."""
+        self.connection.execute(
+            "UPDATE frontier SET status = ?, updated_at = ? WHERE fingerprint = ?", (status, time.time(), url_fingerprint(url))
+        )
+        self._wrote()
+
+    def defer(self, url: str, not_before: float):
+        """Puts a claimed URL back in the queue, to be claimed no earlier than `not_before` (a time.time() value)."""
+        self.connection.execute(
+            "UPDATE frontier SET status = 'queued', not_before = ?, updated_at = ? WHERE fingerprint = ?",
+            (not_before, time.time(), url_fingerprint(url)),
+        )
+        self._wrote()
+
+    def next_deferred_time(self) -> float | None:
+        """Earliest not_before among queued URLs that are not ready yet, or None if there are none."""
+        row = self.connection.execute(
+            "SELECT MIN(not_before) FROM frontier WHERE status = 'queued' AND not_before > ?", (time.time(),)
+        ).fetchone()
+        return row[0]
+
+    # --- Reporting ---
+
+    def counts(self) -> dict:
+        """Returns the number of URLs per status."""
+        rows = self.connection.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall()
+        return dict(rows)
+
+    def claimed_count(self) -> int:
+        """Number of URLs that have been (or are being) crawled, across all runs."""
+        counts = self.counts()
+        return sum(count for status, count in counts.items() if status != 'queued')
+
+    def set_meta(self, key: str, value: str):
+        self.connection.execute("INSERT OR REPLACE INTO crawl_meta (key, value) VALUES (?, ?)", (key, value))
+        self._wrote()
+
+    def get_meta(self, key: str, default: str | None = None) -> str | None:
+        row = self.connection.execute("SELECT value FROM crawl_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
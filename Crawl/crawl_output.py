@@ -0,0 +1,295 @@
+# Output sinks for crawled pages.
+
+# Writing a separate .html and .md file per page into per-domain folders costs two
+# inodes per page; at a million pages that exhausts the filesystem and makes every
+# downstream listing slow. ShardedJsonlSink appends records instead:
+
+#     shards/crawl-00000.jsonl.gz, crawl-00001.jsonl.gz, ...
+#         One JSON record per page (url, title, fetched_at, status, content_hash, html, markdown),
+#         each compressed as its own gzip member. Concatenated members are still a valid
+#         gzip file, so `zcat shard | jq` streams a whole shard.
+#         A new shard is started once the current one reaches `max_shard_bytes`.
+
+#     output_index.sqlite3
+#         url -> (shard, offset, length) of the page's latest record, so one page can be
+#         read back with a single seek + gzip.decompress (see ShardedJsonlSink.read).
+
+# DirectorySink keeps the original per-domain .html/.md layout as a compatibility mode.
+# Both sinks share the same write(url, html_content, markdown_content, status, title) and
+# read(url) calls; create_output_sink() picks one from a format name ("jsonl" or "directory").
+
+# CombinedLlmInputWriter streams the "## Source: ..." sections of combined_llm_input.md
+# to disk as pages complete, optionally split into several files that each stay under
+# a token budget, so the crawler never holds the whole site's markdown in memory.
+
+import os
+import re
+import json
+import gzip
+import time
+import sqlite3
+import hashlib
+from urllib.parse import urlparse
+
+from crawl_frontier import url_fingerprint
+
+# --- Configuration ---
+DEFAULT_MAX_SHARD_BYTES = 256 * 2**20 # Compressed bytes per shard before rotating
+SHARD_DIRNAME = "shards"
+SHARD_PREFIX = "crawl"
+INDEX_FILENAME = "output_index.sqlite3"
+
+# Output formats accepted by create_output_sink()
+OUTPUT_FORMATS = ("jsonl", "directory")
+
+# Rough token estimate used for budgeted splitting of the combined LLM input
+CHARS_PER_TOKEN = 4
+
+# How much of the combined LLM input is kept in memory for the final console preview
+COMBINED_PREVIEW_CHARS = 3000
+
+INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS output_index (
+    fingerprint INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    shard TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    content_hash TEXT NOT NULL
+);
+"""
+
+SHARD_NAME_PATTERN = re.compile(rf"^{SHARD_PREFIX}-(\d+)\.jsonl\.gz$")
+
+
+def generate_filename(url: str, suffix: str = "") -> str:
+    """Generates a safe filename from a URL using a hash for uniqueness."""
+    url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
+    parsed = urlparse(url)
+    # Use a cleaned version of the path, or just the hash if path is too generic
+    path_segment = parsed.path.strip('/').replace('/', '_').replace('.', '_').replace('-', '_')
+    if path_segment:
+        # Limit length to avoid excessively long filenames
+        clean_name = f"{path_segment[:50]}_{url_hash[:8]}"
+    else:
+        clean_name = url_hash
+    return f"{clean_name}{suffix}"
+
+
+class DirectorySink:
+    """Compatibility mode: one .html and one .md file per page under a per-domain folder."""
+
+    def __init__(self, output_dir: str):
+        self.output_dir = output_dir
+
+    def _paths(self, url: str) -> tuple[str, str, str]:
+        """The page's folder and its .html and .md file paths."""
+        # Sanitize domain name for directory
+        domain_folder = re.sub(r'[^a-zA-Z0-9_\-.]', '', urlparse(url).netloc)
+        page_output_dir = os.path.join(self.output_dir, domain_folder)
+        filename_base = generate_filename(url)
+        return page_output_dir, os.path.join(page_output_dir, f"{filename_base}.html"), os.path.join(page_output_dir, f"{filename_base}.md")
+
+    def write(self, url: str, html_content: str, markdown_content: str, status: int | None = None, title: str | None = None):
+        page_output_dir, html_filepath, md_filepath = self._paths(url)
+        os.makedirs(page_output_dir, exist_ok=True)
+
+        with open(html_filepath, 'w', encoding='utf-8') as f:
+            f.write(html_content)
+        print(f"    Saved HTML to: {html_filepath}")
+
+        with open(md_filepath, 'w', encoding='utf-8') as f:
+            f.write(markdown_content)
+        print(f"    Saved Markdown to: {md_filepath}")
+
+    def read(self, url: str) -> dict | None:
+        """Returns the stored page as {"url", "title", "html", "markdown"} (title is not stored: None), or None."""
+        _, html_filepath, md_filepath = self._paths(url)
+        if not os.path.exists(md_filepath):
+            return None
+        with open(md_filepath, encoding='utf-8') as f:
+            markdown_content = f.read()
+        html_content = None
+        if os.path.exists(html_filepath):
+            with open(html_filepath, encoding='utf-8') as f:
+                html_content = f.read()
+        return {"url": url, "title": None, "html": html_content, "markdown": markdown_content}
+
+    def close(self):
+        pass
+
+
+class ShardedJsonlSink:
+    """Appends page records to size-rotated, gzip-compressed JSONL shards with an offset index."""
+
+    def __init__(self, output_dir: str, max_shard_bytes: int = DEFAULT_MAX_SHARD_BYTES):
+        """
+        Args:
+            output_dir (str): Directory that receives the shards folder and the index.
+            max_shard_bytes (int): Compressed size at which the next shard is started.
+        """
+        self.output_dir = output_dir
+        self.shard_dir = os.path.join(output_dir, SHARD_DIRNAME)
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self.max_shard_bytes = max_shard_bytes
+
+        self.index = sqlite3.connect(os.path.join(output_dir, INDEX_FILENAME))
+        self.index.execute("PRAGMA journal_mode=WAL")
+        self.index.executescript(INDEX_SCHEMA)
+        self.index.commit()
+
+        # Never append to a shard left by an earlier (possibly interrupted) run
+        existing = [int(match.group(1)) for match in map(SHARD_NAME_PATTERN.match, os.listdir(self.shard_dir)) if match]
+        self._shard_number = max(existing) + 1 if existing else 0
+        self._shard_file = None
+        self._shard_name = None
+        self.records_written = 0
+        self.bytes_written = 0
+
+    def _open_next_shard(self):
+        if self._shard_file is not None:
+            self._shard_file.close()
+            self._shard_number += 1
+        self._shard_name = f"{SHARD_PREFIX}-{self._shard_number:05d}.jsonl.gz"
+        self._shard_file = open(os.path.join(self.shard_dir, self._shard_name), "ab")
+
+    def write(self, url: str, html_content: str, markdown_content: str, status: int | None = None, title: str | None = None):
+        """Appends one page record and indexes its position."""
+        if self._shard_file is None or self._shard_file.tell() >= self.max_shard_bytes:
+            self._open_next_shard()
+
+        fetched_at = time.time()
+        body_hash = hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+        record = {
+            "url": url,
+            "title": title,
+            "fetched_at": fetched_at,
+            "status": status,
+            "content_hash": body_hash,
+            "html": html_content,
+            "markdown": markdown_content,
+        }
+        member = gzip.compress((json.dumps(record, ensure_ascii=False) + "\n").encode('utf-8'))
+        offset = self._shard_file.tell()
+        self._shard_file.write(member)
+        self._shard_file.flush()
+
+        self.index.execute(
+            "INSERT OR REPLACE INTO output_index (fingerprint, url, shard, offset, length, fetched_at, content_hash) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url_fingerprint(url), url, self._shard_name, offset, len(member), fetched_at, body_hash),
+        )
+        self.index.commit()
+        self.records_written += 1
+        self.bytes_written += len(member)
+        print(f"    Appended record to {self._shard_name} (offset {offset}, {len(member) / 1024:.1f} KiB compressed)")
+
+    def read(self, url: str) -> dict | None:
+        """Returns the latest record stored for a URL, or None."""
+        row = self.index.execute(
+            "SELECT shard, offset, length FROM output_index WHERE fingerprint = ?", (url_fingerprint(url),)
+        ).fetchone()
+        if row is None:
+            return None
+        shard_name, offset, length = row
+        with open(os.path.join(self.shard_dir, shard_name), "rb") as f:
+            f.seek(offset)
+            return json.loads(gzip.decompress(f.read(length)))
+
+    def stats(self) -> dict:
+        return {"records": self.records_written, "compressed_bytes": self.bytes_written, "current_shard": self._shard_name}
+
+    def close(self):
+        if self._shard_file is not None:
+            self._shard_file.close()
+            self._shard_file = None
+        self.index.commit()
+        self.index.close()
+
+
+def create_output_sink(output_format: str, output_dir: str) -> DirectorySink | ShardedJsonlSink:
+    """Returns the sink for an output format: "jsonl" (sharded records) or "directory" (per-page files)."""
+    if output_format == "jsonl":
+        return ShardedJsonlSink(output_dir)
+    if output_format == "directory":
+        return DirectorySink(output_dir)
+    raise ValueError(f"Unknown output format '{output_format}', expected one of {OUTPUT_FORMATS}")
+
+
+class CombinedLlmInputWriter:
+    """Appends one markdown section per page to combined_llm_input.md (or to token-budgeted parts)."""
+
+    def __init__(self, output_dir: str, filename: str = "combined_llm_input.md", token_budget: int | None = None, append: bool = False):
+        """
+        Args:
+            output_dir (str): Directory that receives the combined file(s).
+            filename (str): Name of the combined file. With a token budget, parts are named
+                combined_llm_input_001.md, combined_llm_input_002.md, ...
+            token_budget (int, optional): Maximum estimated tokens (chars / CHARS_PER_TOKEN) per file.
+                A single section larger than the budget gets a file of its own.
+            append (bool): Continue the file(s) of a previous run (e.g. a resumed crawl) instead of
+                truncating them. Files are opened on the first page, so a caller may still reset
+                this before then (a resume that turns into a fresh crawl).
+        """
+        self.output_dir = output_dir
+        self.filename = filename
+        self.token_budget = token_budget
+        self.append = append
+        self.paths: list[str] = []
+        self.section_count = 0
+        self.preview = ""
+        self._file = None
+        self._file_tokens = 0
+
+    def _existing_paths(self) -> list[str]:
+        """The combined file(s) left by a previous run, in order."""
+        if self.token_budget is None:
+            path = os.path.join(self.output_dir, self.filename)
+            return [path] if os.path.exists(path) else []
+        stem, extension = os.path.splitext(self.filename)
+        part_pattern = re.compile(rf"{re.escape(stem)}_(\d{{3,}}){re.escape(extension)}")
+        parts = [name for name in os.listdir(self.output_dir) if part_pattern.fullmatch(name)] if os.path.isdir(self.output_dir) else []
+        return [os.path.join(self.output_dir, name) for name in sorted(parts, key=lambda name: int(part_pattern.fullmatch(name).group(1)))]
+
+    def _open_next_file(self):
+        if self._file is not None:
+            self._file.close()
+        if self.append and not self.paths:
+            existing_paths = self._existing_paths()
+            if existing_paths:
+                # Keep filling the last file of the previous run; numbering of new parts continues after it
+                self.paths = existing_paths
+                self._file = open(existing_paths[-1], "a", encoding="utf-8")
+                self._file_tokens = os.path.getsize(existing_paths[-1]) // CHARS_PER_TOKEN
+                return
+        if self.token_budget is None:
+            path = os.path.join(self.output_dir, self.filename)
+        else:
+            stem, extension = os.path.splitext(self.filename)
+            path = os.path.join(self.output_dir, f"{stem}_{len(self.paths) + 1:03d}{extension}")
+        self._file = open(path, "w", encoding="utf-8")
+        self._file_tokens = 0
+        self.paths.append(path)
+
+    def add_page(self, title: str, url: str, markdown_content: str | None):
+        """Writes the section for one page."""
+        section = f"## Source: {title} ({url})\n\n"
+        if markdown_content is not None and markdown_content.strip():
+            section += f"{markdown_content}\n\n---\n\n"
+        else:
+            section += "[Content not available for this page]\n\n---\n\n"
+
+        section_tokens = len(section) // CHARS_PER_TOKEN
+        if self._file is None or (self.token_budget is not None and self._file_tokens and self._file_tokens + section_tokens > self.token_budget):
+            self._open_next_file()
+        self._file.write(section)
+        self._file.flush()
+        self._file_tokens += section_tokens
+        self.section_count += 1
+        if len(self.preview) < COMBINED_PREVIEW_CHARS:
+            self.preview += section[:COMBINED_PREVIEW_CHARS - len(self.preview)]
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
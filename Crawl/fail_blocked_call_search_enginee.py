@@ -6,7 +6,7 @@ from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 import time
 from urllib.parse import urljoin, urlparse
-from markdownify import markdownify as md
+from html_to_markdown import convert_html_to_markdown
 import re
 
 # --- Configuration ---
@@ -151,48 +151,7 @@ def automate_and_extract(search_links):
     driver.quit()
     return all_extracted_content
 
-# --- 4. Python code that read the raw html and return as markdown ---
-def convert_html_to_markdown(html_content, base_url):
-    """
-    Converts raw HTML content to Markdown, including text, image blocks, and hyperlinks.
-    Handles relative links by converting them to absolute URLs.
-    """
-    
-    # Use markdownify to convert HTML to Markdown
-    # We'll use a custom converter for images to ensure full URLs if they are relative
-    
-    class CustomMarkdownConverter(md.MarkdownConverter):
-        def convert_img(self, el, text, parent_tags):
-            src = el.get('src')
-            alt = el.get('alt', '')
-            if src:
-                # Resolve relative URLs
-                absolute_src = urljoin(base_url, src)
-                return f"![{alt}]({absolute_src})\n\n" # Add newlines for block-like behavior
-            return ""
-
-        def convert_a(self, el, text, parent_tags):
-            href = el.get('href')
-            if href:
-                absolute_href = urljoin(base_url, href)
-                return f"[{text}]({absolute_href})"
-            return text # If no href, just return the text
-
-    converter = CustomMarkdownConverter(
-        strong_em_symbol='**',  # Use ** for bold
-        bullets='*',            # Use * for list items
-        code_language='python'  # Default for code blocks if no language specified
-    )
-    
-    markdown_output = converter.convert(html_content)
-
-    # Further cleanup or specific formatting adjustments for LLM can be done here
-    # For example, removing excessive whitespace or specific boilerplate text
-    markdown_output = re.sub(r'\n\s*\n', '\n\n', markdown_output) # Remove multiple blank lines
-    markdown_output = re.sub(r'\[]\(([^)]+)\)', r'(\1)', markdown_output) # Convert empty link text to just the URL in parentheses
-    
-    return markdown_output
-
+# --- 4. Raw HTML to markdown: convert_html_to_markdown() is shared, see html_to_markdown.py ---
 # --- Main Execution ---
 if __name__ == "__main__":
     print(f"Search query: \"{SEARCH_QUERY}\"")
@@ -0,0 +1,112 @@
+# Route-interception fetch profiles for Playwright crawls.
+
+# The crawlers only keep HTML/markdown, yet a plain page load downloads every
+# image, font, video and third-party tracker. A fetch profile lists resource
+# types and domains to abort; ResourceBlocker installs it on pages as a route
+# handler and counts, per page, how many requests (and roughly how many bytes)
+# were saved.
+
+#     "text": blocks images, media, fonts, stylesheets and known trackers (default for crawling)
+#     "full": blocks nothing (use it for screenshot runs)
+
+# Usage:
+#     resource_blocker = ResourceBlocker("text")
+#     page_pool = PagePool(browser_context, on_new_page=resource_blocker.attach)
+#     ...
+#     print(resource_blocker.pop_page_stats(page))
+
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Route
+
+# Third-party analytics/ad domains that never contribute page content
+TRACKER_DOMAINS = (
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "adservice.google.com", "facebook.net", "connect.facebook.net", "hotjar.com", "segment.io",
+    "segment.com", "mixpanel.com", "amplitude.com", "fullstory.com", "clarity.ms", "bat.bing.com",
+    "scorecardresearch.com", "taboola.com", "outbrain.com", "criteo.com", "nr-data.net",
+)
+
+FETCH_PROFILES = {
+    "text": {
+        "blocked_resource_types": ("image", "media", "font", "stylesheet"),
+        "blocked_domains": TRACKER_DOMAINS,
+    },
+    "full": {
+        "blocked_resource_types": (),
+        "blocked_domains": (),
+    },
+}
+
+# Aborted requests never report a size, so savings are estimated from typical response sizes
+ESTIMATED_BYTES_BY_RESOURCE_TYPE = {
+    "image": 40_000,
+    "media": 500_000,
+    "font": 30_000,
+    "stylesheet": 20_000,
+    "script": 30_000,
+}
+DEFAULT_ESTIMATED_BYTES = 5_000
+
+
+def _empty_stats() -> dict:
+    return {"blocked_requests": 0, "estimated_bytes_saved": 0, "blocked_by_type": {}}
+
+
+class ResourceBlocker:
+    """Aborts requests matching a fetch profile and tracks what was saved per page."""
+
+    def __init__(self, profile: str | dict = "text"):
+        """
+        Args:
+            profile (str | dict): A key of FETCH_PROFILES, or a dict with
+                "blocked_resource_types" and "blocked_domains".
+        """
+        if isinstance(profile, str):
+            if profile not in FETCH_PROFILES:
+                raise ValueError(f"Unknown fetch profile '{profile}'. Choose one of: {', '.join(FETCH_PROFILES)}")
+            profile = FETCH_PROFILES[profile]
+        self.blocked_resource_types = frozenset(profile.get("blocked_resource_types", ()))
+        self.blocked_domains = tuple(domain.lower() for domain in profile.get("blocked_domains", ()))
+        self._page_stats: dict[Page, dict] = {}
+        self.total_stats = _empty_stats()
+
+    @property
+    def blocks_anything(self) -> bool:
+        return bool(self.blocked_resource_types or self.blocked_domains)
+
+    def _is_blocked_domain(self, url: str) -> bool:
+        host = (urlparse(url).hostname or "").lower()
+        return any(host == domain or host.endswith("." + domain) for domain in self.blocked_domains)
+
+    def should_block(self, resource_type: str, url: str) -> bool:
+        """Returns True if a request of this type to this URL should be aborted."""
+        if resource_type == "document":
+            return False # Never block the page itself
+        return resource_type in self.blocked_resource_types or self._is_blocked_domain(url)
+
+    def _record(self, page: Page, resource_type: str):
+        estimated_bytes = ESTIMATED_BYTES_BY_RESOURCE_TYPE.get(resource_type, DEFAULT_ESTIMATED_BYTES)
+        for stats in (self._page_stats.setdefault(page, _empty_stats()), self.total_stats):
+            stats["blocked_requests"] += 1
+            stats["estimated_bytes_saved"] += estimated_bytes
+            stats["blocked_by_type"][resource_type] = stats["blocked_by_type"].get(resource_type, 0) + 1
+
+    async def attach(self, page: Page):
+        """Installs the profile's route handler on a page (a no-op for the "full" profile)."""
+        if not self.blocks_anything:
+            return
+
+        async def handle_route(route: Route):
+            request = route.request
+            if self.should_block(request.resource_type, request.url):
+                self._record(page, request.resource_type)
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await page.route("**/*", handle_route)
+
+    def pop_page_stats(self, page: Page) -> dict:
+        """Returns what was blocked on a page since the last call, and resets its counters."""
+        return self._page_stats.pop(page, None) or _empty_stats()
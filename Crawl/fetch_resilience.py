@@ -0,0 +1,294 @@
+# Retries with jittered exponential backoff and a per-host circuit breaker.
+
+# A failed fetch used to be logged once and dropped, and a host that went down kept
+# costing a full timeout for every queued URL. This module gives every fetch path the
+# same two tools:
+
+#     RetryPolicy    - classifies each failure as retryable (timeouts, connection errors,
+#                      408/425/429/5xx) or fatal (other 4xx, invalid URLs, programming
+#                      errors) and retries the retryable ones with "full jitter"
+#                      exponential backoff: sleep uniform(0, min(max_delay, base_delay * 2^attempt)).
+
+#     CircuitBreaker - per host: closed -> (failure_threshold consecutive failures) -> open
+#                      -> (after open_seconds) -> half-open: one probe request is let
+#                      through; success closes the circuit, failure opens it again with a
+#                      doubled open period. While a host is open its URLs are parked
+#                      (see CrawlFrontier.defer) instead of each burning a timeout.
+
+# CircuitBreaker.stats() estimates the time saved: every request rejected while a host
+# was open is counted at that host's average failed-request duration.
+
+import re
+import time
+import random
+import asyncio
+from urllib.parse import urlparse
+
+# --- Configuration ---
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_BASE_DELAY_SECONDS = 0.5
+DEFAULT_MAX_DELAY_SECONDS = 30.0
+
+DEFAULT_FAILURE_THRESHOLD = 5 # Consecutive failures that open a host's circuit
+DEFAULT_OPEN_SECONDS = 60.0 # First open period; doubles after each failed probe
+MAX_OPEN_SECONDS = 30 * 60
+PROBE_POLL_SECONDS = 1.0 # How long other requests wait while a half-open probe is in flight
+
+# Statuses worth retrying (and that count as host failures)
+RETRYABLE_STATUS_CODES = (408, 425, 429, 500, 502, 503, 504)
+
+# Exception class names (anywhere in the MRO) that mean a transient network problem.
+# Matched by name so requests, httpx and Playwright do not all have to be importable.
+RETRYABLE_EXCEPTION_NAMES = {
+    "TimeoutError", "TimeoutException", "Timeout", "ConnectTimeout", "ReadTimeout",
+    "ConnectionError", "ConnectionResetError", "ConnectError", "ReadError", "WriteError",
+    "RemoteProtocolError", "NetworkError", "ProtocolError", "ChunkedEncodingError",
+}
+
+# Chromium network errors Playwright reports as a generic Error
+RETRYABLE_BROWSER_ERROR_PATTERN = re.compile(
+    r"net::ERR_(TIMED_OUT|CONNECTION_\w+|NETWORK_\w+|INTERNET_DISCONNECTED|EMPTY_RESPONSE|ADDRESS_UNREACHABLE|NAME_NOT_RESOLVED|HTTP2_\w+)"
+)
+
+RETRYABLE, FATAL = "retryable", "fatal"
+
+
+def classify_failure(error: BaseException | None = None, status_code: int | None = None) -> str:
+    """Returns RETRYABLE or FATAL for an exception or an HTTP status."""
+    if error is not None:
+        if any(cls.__name__ in RETRYABLE_EXCEPTION_NAMES for cls in type(error).__mro__):
+            return RETRYABLE
+        if RETRYABLE_BROWSER_ERROR_PATTERN.search(str(error)):
+            return RETRYABLE
+        return FATAL
+    if status_code in RETRYABLE_STATUS_CODES:
+        return RETRYABLE
+    return FATAL
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open."""
+
+    def __init__(self, host: str, retry_in_seconds: float):
+        super().__init__(f"Circuit open for {host}; next probe in {retry_in_seconds:.0f}s")
+        self.host = host
+        self.retry_in_seconds = retry_in_seconds
+
+
+class _Circuit:
+    def __init__(self):
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.open_seconds = DEFAULT_OPEN_SECONDS
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self.failure_seconds_total = 0.0
+        self.failures = 0
+        self.rejected = 0
+        self.times_opened = 0
+
+
+class CircuitBreaker:
+    """Per-host closed / open / half-open circuit breaker."""
+
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, open_seconds: float = DEFAULT_OPEN_SECONDS):
+        """
+        Args:
+            failure_threshold (int): Consecutive failures that open a host's circuit.
+            open_seconds (float): How long a circuit stays open before the first probe.
+        """
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.circuits: dict[str, _Circuit] = {}
+
+    def _circuit(self, url: str) -> _Circuit:
+        host = urlparse(url).netloc
+        circuit = self.circuits.get(host)
+        if circuit is None:
+            circuit = self.circuits[host] = _Circuit()
+            circuit.open_seconds = self.open_seconds
+        return circuit
+
+    def seconds_until_probe(self, url: str) -> float:
+        """0 if a request to the URL's host may be sent now, otherwise how long until the next probe."""
+        circuit = self._circuit(url)
+        if circuit.state == "closed":
+            return 0.0
+        if circuit.state == "half_open":
+            return PROBE_POLL_SECONDS if circuit.probe_in_flight else 0.0
+        return max(0.0, circuit.opened_at + circuit.open_seconds - time.monotonic())
+
+    def allow(self, url: str) -> bool:
+        """True if a request may be sent (in half-open state only one probe at a time)."""
+        circuit = self._circuit(url)
+        if circuit.state == "open" and time.monotonic() >= circuit.opened_at + circuit.open_seconds:
+            circuit.state = "half_open"
+            circuit.probe_in_flight = False
+        if circuit.state == "closed":
+            return True
+        if circuit.state == "half_open" and not circuit.probe_in_flight:
+            circuit.probe_in_flight = True
+            print(f"  Circuit half-open for {urlparse(url).netloc}: sending a probe request")
+            return True
+        circuit.rejected += 1
+        return False
+
+    def record_success(self, url: str):
+        circuit = self._circuit(url)
+        if circuit.state != "closed":
+            print(f"  Circuit closed for {urlparse(url).netloc}: host is answering again")
+        circuit.state = "closed"
+        circuit.consecutive_failures = 0
+        circuit.open_seconds = self.open_seconds
+        circuit.probe_in_flight = False
+
+    def record_failure(self, url: str, elapsed_seconds: float = 0.0):
+        circuit = self._circuit(url)
+        circuit.failures += 1
+        circuit.failure_seconds_total += elapsed_seconds
+        circuit.consecutive_failures += 1
+        if circuit.state == "half_open":
+            circuit.open_seconds = min(MAX_OPEN_SECONDS, circuit.open_seconds * 2)
+            self._open(url, circuit)
+        elif circuit.state == "closed" and circuit.consecutive_failures >= self.failure_threshold:
+            self._open(url, circuit)
+
+    def _open(self, url: str, circuit: _Circuit):
+        circuit.state = "open"
+        circuit.opened_at = time.monotonic()
+        circuit.probe_in_flight = False
+        circuit.times_opened += 1
+        print(f"  Circuit open for {urlparse(url).netloc} after {circuit.consecutive_failures} failures; parking its URLs for {circuit.open_seconds:.0f}s")
+
+    def stats(self) -> dict:
+        """Per-host state and the estimated time saved by not sending requests to open hosts."""
+        hosts = {}
+        seconds_saved = 0.0
+        for host, circuit in self.circuits.items():
+            average_failure_seconds = circuit.failure_seconds_total / circuit.failures if circuit.failures else 0.0
+            host_seconds_saved = circuit.rejected * average_failure_seconds
+            seconds_saved += host_seconds_saved
+            if circuit.failures or circuit.rejected:
+                hosts[host] = {
+                    "state": circuit.state,
+                    "failures": circuit.failures,
+                    "times_opened": circuit.times_opened,
+                    "requests_parked": circuit.rejected,
+                    "estimated_seconds_saved": round(host_seconds_saved, 1),
+                }
+        return {"estimated_seconds_saved": round(seconds_saved, 1), "hosts": hosts}
+
+
+class RetryPolicy:
+    """Retries retryable failures with full-jitter exponential backoff."""
+
+    def __init__(self, max_attempts: int = DEFAULT_MAX_ATTEMPTS, base_delay_seconds: float = DEFAULT_BASE_DELAY_SECONDS, max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS):
+        """
+        Args:
+            max_attempts (int): Attempts per fetch, including the first one.
+            base_delay_seconds (float): Backoff ceiling before the first retry.
+            max_delay_seconds (float): Upper bound for any single backoff.
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay_seconds = base_delay_seconds
+        self.max_delay_seconds = max_delay_seconds
+        self.attempts = 0
+        self.retries = 0
+        self.recovered = 0 # Fetches that succeeded after at least one retry
+        self.gave_up = 0
+        self.fatal = 0
+        self.backoff_seconds = 0.0
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number `attempt` (0-based)."""
+        return random.uniform(0, min(self.max_delay_seconds, self.base_delay_seconds * 2 ** attempt))
+
+    def _before_attempt(self, url: str, breaker: CircuitBreaker | None):
+        if breaker is not None and not breaker.allow(url):
+            raise CircuitOpenError(urlparse(url).netloc, breaker.seconds_until_probe(url))
+        self.attempts += 1
+
+    def _after_attempt(self, url: str, attempt: int, breaker: CircuitBreaker | None, elapsed_seconds: float,
+                       error: BaseException | None = None, status_code: int | None = None) -> bool:
+        """Records the outcome; returns True if the fetch should be retried."""
+        failed = error is not None or status_code in RETRYABLE_STATUS_CODES
+        kind = classify_failure(error, status_code) if failed else None
+        if breaker is not None:
+            if kind == RETRYABLE:
+                breaker.record_failure(url, elapsed_seconds)
+            else:
+                breaker.record_success(url) # The host answered, even if this URL is broken
+        if not failed:
+            if attempt:
+                self.recovered += 1
+            return False
+        if kind == FATAL:
+            self.fatal += 1
+            return False
+        if attempt + 1 >= self.max_attempts:
+            self.gave_up += 1
+            return False
+        self.retries += 1
+        reason = f"{type(error).__name__}" if error is not None else f"HTTP {status_code}"
+        print(f"    Retrying {url} after {reason} (attempt {attempt + 2}/{self.max_attempts})")
+        return True
+
+    async def run(self, operation, url: str, breaker: CircuitBreaker | None = None, status_of=None):
+        """
+        Awaits `operation()` until it succeeds, fails fatally or runs out of attempts.
+
+        Args:
+            operation: Zero-argument coroutine function performing one fetch.
+            url (str): The URL being fetched (used for the breaker and logging).
+            breaker (CircuitBreaker, optional): Consulted before and updated after every attempt.
+            status_of (Callable, optional): Extracts the HTTP status from the result, so
+                retryable statuses (429/5xx) are retried too. The last result is returned
+                even if its status is still retryable.
+
+        Raises:
+            CircuitOpenError: The host's circuit is open.
+            Exception: The last error, when it is fatal or attempts are exhausted.
+        """
+        for attempt in range(self.max_attempts):
+            self._before_attempt(url, breaker)
+            start_time = time.monotonic()
+            try:
+                result = await operation()
+            except Exception as e:
+                if not self._after_attempt(url, attempt, breaker, time.monotonic() - start_time, error=e):
+                    raise
+            else:
+                status_code = status_of(result) if status_of else None
+                if not self._after_attempt(url, attempt, breaker, time.monotonic() - start_time, status_code=status_code):
+                    return result
+            delay = self.backoff(attempt)
+            self.backoff_seconds += delay
+            await asyncio.sleep(delay)
+
+    def run_blocking(self, operation, url: str, breaker: CircuitBreaker | None = None, status_of=None):
+        """Blocking version of run() for synchronous fetchers."""
+        for attempt in range(self.max_attempts):
+            self._before_attempt(url, breaker)
+            start_time = time.monotonic()
+            try:
+                result = operation()
+            except Exception as e:
+                if not self._after_attempt(url, attempt, breaker, time.monotonic() - start_time, error=e):
+                    raise
+            else:
+                status_code = status_of(result) if status_of else None
+                if not self._after_attempt(url, attempt, breaker, time.monotonic() - start_time, status_code=status_code):
+                    return result
+            delay = self.backoff(attempt)
+            self.backoff_seconds += delay
+            time.sleep(delay)
+
+    def stats(self) -> dict:
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "recovered_after_retry": self.recovered,
+            "gave_up": self.gave_up,
+            "fatal_errors": self.fatal,
+            "backoff_seconds": round(self.backoff_seconds, 1),
+        }
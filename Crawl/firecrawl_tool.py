@@ -1,7 +1,9 @@
 import asyncio
 import os
 import time
+import weakref
 from typing import Any
+from urllib.parse import urldefrag
 
 try:
     from firecrawl import FirecrawlApp
@@ -10,15 +12,133 @@ except ImportError as e:
     FirecrawlApp = None
 
 from rllm.tools.tool_base import Tool, ToolOutput
+from rllm.tools.web_tools.response_cache import ResponseCache, get_default_cache
 
 FIRECRAWL_API_KEY = os.getenv("FIRECRAWL_API_KEY", "")
 TIMEOUT = 10
+SCRAPE_PARAMS = {"formats": ["markdown", "links"], "onlyMainContent": True}
+
+# Status polling backs off exponentially between these bounds
+POLL_INITIAL_SECONDS = 0.5
+POLL_MAX_SECONDS = 4.0
+
+# async_forward calls arriving within this window share one batch job (up to MAX_BATCH_URLS URLs)
+BATCH_WINDOW_SECONDS = 0.05
+MAX_BATCH_URLS = 100
+# A batch job may run for the tool's timeout plus this much per URL beyond the first
+BATCH_TIMEOUT_PER_EXTRA_URL_SECONDS = 1.0
+
+
+class FirecrawlError(RuntimeError):
+    """A scrape that failed, timed out, or whose job could not be started."""
+
+
+def _job_finished(status: dict) -> bool:
+    """Whether a batch scrape job has stopped (``completed`` is a page count when ``total`` is reported)."""
+    if status.get("status") in ("completed", "failed", "cancelled"):
+        return True
+    completed, total = status.get("completed"), status.get("total")
+    if total is None:
+        return bool(completed)
+    return completed >= total
+
+
+def _source_url(page: dict) -> str:
+    """The URL a scraped page was requested as (``url`` is where it ended up after redirects)."""
+    metadata = page["metadata"]
+    return metadata.get("sourceURL") or metadata["url"]
+
+
+def _url_key(url: str) -> str:
+    """Form of a URL that survives Firecrawl's normalisation (fragment, trailing slash)."""
+    return urldefrag(url)[0].rstrip("/")
+
+
+class _ScrapeBatcher:
+    """Packs the concurrent scrape requests of one event loop into shared Firecrawl batch jobs."""
+
+    def __init__(self, tool: "FirecrawlTool"):
+        self.tool = tool
+        self.jobs_started = 0
+        self.urls_submitted = 0
+        self._pending: dict[str, list[asyncio.Future]] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._jobs: set[asyncio.Task] = set()
+
+    def scrape(self, url: str) -> asyncio.Future:
+        """Returns a future resolving to {page url: markdown}, or to a FirecrawlError."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(url, []).append(future)
+        if len(self._pending) >= MAX_BATCH_URLS:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(BATCH_WINDOW_SECONDS, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        waiters, self._pending = self._pending, {}
+        if waiters:
+            job = asyncio.ensure_future(self._run_job(waiters))
+            self._jobs.add(job)
+            job.add_done_callback(self._jobs.discard)
+
+    async def _run_job(self, waiters: dict[str, list[asyncio.Future]]):
+        """Runs one batch job, resolving each URL's futures as soon as its page is in the job status."""
+
+        def resolve(url: str, result: dict | FirecrawlError):
+            for future in waiters.pop(url, []):
+                if not future.done():
+                    future.set_result(result)
+
+        def resolve_remaining(error: FirecrawlError):
+            for url in list(waiters):
+                resolve(url, error)
+
+        app = self.tool.app
+        try:
+            job = await asyncio.to_thread(app.async_batch_scrape_urls, list(waiters), params=SCRAPE_PARAMS)
+        except Exception as e:
+            resolve_remaining(FirecrawlError(f"Firecrawl job could not start: {e}"))
+            return
+        if not job["success"]:
+            resolve_remaining(FirecrawlError("Firecrawl job failed to start"))
+            return
+        self.jobs_started += 1
+        self.urls_submitted += len(waiters)
+
+        # Pages are matched back to the submitted URL exactly or, if Firecrawl normalised it, by _url_key
+        submitted = {_url_key(url): url for url in waiters}
+        deadline = time.monotonic() + self.tool.timeout + BATCH_TIMEOUT_PER_EXTRA_URL_SECONDS * (len(waiters) - 1)
+        delay = POLL_INITIAL_SECONDS
+        try:
+            while waiters:
+                status = await asyncio.to_thread(app.check_batch_scrape_status, job["id"])
+                for page in status.get("data") or []:
+                    source_url = _source_url(page)
+                    url = source_url if source_url in waiters else submitted.get(_url_key(source_url))
+                    if url in waiters:
+                        resolve(url, {page["metadata"]["url"]: page["markdown"]})
+                if _job_finished(status):
+                    resolve_remaining(FirecrawlError(f"Firecrawl request errored: {status.get('error') or 'no result for this URL'}"))
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    resolve_remaining(FirecrawlError("Firecrawl request timed out"))
+                    break
+                await asyncio.sleep(min(delay, remaining))
+                delay = min(delay * 2, POLL_MAX_SECONDS)
+        except Exception as e:
+            resolve_remaining(FirecrawlError(f"Firecrawl request errored: {e}"))
 
 
 class FirecrawlTool(Tool):
     """A tool for extracting data from websites using the FireCrawl service."""
 
-    def __init__(self, timeout: int = TIMEOUT, api_key: str = FIRECRAWL_API_KEY, api_url: str | None = None):
+    def __init__(self, timeout: int = TIMEOUT, api_key: str = FIRECRAWL_API_KEY, api_url: str | None = None, cache: ResponseCache | None = None, use_cache: bool = True):
         """
         Initialize the Firecrawl tool.
 
@@ -26,12 +146,16 @@ class FirecrawlTool(Tool):
             timeout (int): Maximum time in seconds to wait for scraping results.
             api_key (str): API key for FireCrawl service.
             api_url (str, optional): Custom API URL endpoint.
+            cache (ResponseCache, optional): Response cache to use, defaults to the shared on-disk cache.
+            use_cache (bool): Whether to look up and store responses in the cache.
         """
         if FirecrawlApp is None:
             raise ImportError("Firecrawl is not installed. Please install it using 'pip install firecrawl'.")
         self.timeout = timeout
         self.api_key = api_key
         self.api_url = api_url
+        self.cache = (cache or get_default_cache()) if use_cache else None
+        self._batchers: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _ScrapeBatcher] = weakref.WeakKeyDictionary()
         self._init_app()
         super().__init__(name="firecrawl", description="FireCrawl is a tool that scrapes a url link and returns content as a markdown document along with any links.")
 
@@ -54,7 +178,7 @@ class FirecrawlTool(Tool):
             dict: Response from the FireCrawl API containing job information.
         """
         # crawl has many scrape options, potentially can let the agent choose
-        return self.app.async_batch_scrape_urls([url], params={"formats": ["markdown", "links"], "onlyMainContent": True})
+        return self.app.async_batch_scrape_urls([url], params=SCRAPE_PARAMS)
 
     @property
     def json(self):
@@ -71,6 +195,11 @@ class FirecrawlTool(Tool):
         Returns:
             ToolOutput: An object containing either the scraped content or an error message.
         """
+        cache_params = {"url": url, **SCRAPE_PARAMS}
+        cached = self.cache.get("firecrawl", cache_params) if self.cache else None
+        if cached is not None:
+            return ToolOutput(name=self.name or "firecrawl", output=cached)
+
         try:
             job = self._start_firecrawl_job(url)
         except Exception as e:
@@ -80,17 +209,22 @@ class FirecrawlTool(Tool):
             return ToolOutput(name=self.name or "firecrawl", error="Firecrawl job failed to start")
 
         job_id = job["id"]
-        start_time = time.monotonic()
+        deadline = time.monotonic() + self.timeout
+        delay = POLL_INITIAL_SECONDS
         while True:
             status = self.app.check_batch_scrape_status(job_id)
-            if status["completed"]:
+            if _job_finished(status):
                 break
-            time.sleep(1)
-            if time.monotonic() - start_time > self.timeout:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
                 return ToolOutput(name=self.name or "firecrawl", error="Firecrawl request timed out")
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 2, POLL_MAX_SECONDS)
 
         if status["success"]:
             results = {page["metadata"]["url"]: page["markdown"] for page in status["data"]}
+            if self.cache:
+                self.cache.set("firecrawl", cache_params, results)
             return ToolOutput(name=self.name or "firecrawl", output=results)
         return ToolOutput(name=self.name or "firecrawl", error=f"Firecrawl request errored: {status['error']}")
 
@@ -98,15 +232,32 @@ class FirecrawlTool(Tool):
         """
         Asynchronous version of the forward method.
 
+        Concurrent calls on the same event loop are packed into shared batch jobs; the
+        blocking SDK calls run in worker threads and each call returns as soon as its
+        own page is done, without waiting for the rest of the batch.
+
         Args:
             url (str): The URL to scrape.
 
         Returns:
             ToolOutput: An object containing either the scraped content or an error message.
         """
-        # For now, just call the synchronous version
-        # This could be optimized later to use async I/O properly
-        return self.forward(url=url)
+        cache_params = {"url": url, **SCRAPE_PARAMS}
+        cached = self.cache.get("firecrawl", cache_params) if self.cache else None
+        if cached is not None:
+            return ToolOutput(name=self.name or "firecrawl", output=cached)
+
+        loop = asyncio.get_running_loop()
+        batcher = self._batchers.get(loop)
+        if batcher is None:
+            batcher = self._batchers[loop] = _ScrapeBatcher(self)
+
+        result = await batcher.scrape(url)
+        if isinstance(result, FirecrawlError):
+            return ToolOutput(name=self.name or "firecrawl", error=str(result))
+        if self.cache:
+            self.cache.set("firecrawl", cache_params, result)
+        return ToolOutput(name=self.name or "firecrawl", output=result)
 
 
 if __name__ == "__main__":
@@ -118,8 +269,6 @@ if __name__ == "__main__":
     print(f"Time taken for sync: {end_time - start_time} seconds")
 
     # Test Async
-    import asyncio
-
     async def test_async():
         coro = search(url="https://agentica-project.com/", use_async=True)
 
@@ -129,5 +278,13 @@ if __name__ == "__main__":
         print("Async result:", result)
         print(f"Time taken for async: {end_time - start_time} seconds")
 
+        # Concurrent calls share one batch job
+        urls = ["https://agentica-project.com/", "https://docs.firecrawl.dev/", "https://www.python.org/"]
+        start_time = time.monotonic()
+        results = await asyncio.gather(*(search(url=url, use_async=True) for url in urls))
+        end_time = time.monotonic()
+        batcher = search._batchers[asyncio.get_running_loop()]
+        print(f"{len(results)} concurrent scrapes in {batcher.jobs_started} batch job(s), {end_time - start_time:.2f} seconds")
+
     # Run the async test
     asyncio.run(test_async())
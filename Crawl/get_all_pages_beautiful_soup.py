@@ -1,71 +1,355 @@
 import requests
+import httpx
+import asyncio
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import time
 import random
+from collections import deque
 
-def simple_crawler(start_url, max_pages=100, delay_min=1, delay_max=3):
-    visited_urls = set()
-    urls_to_visit = [start_url]
+from fetch_resilience import CircuitBreaker, CircuitOpenError, RetryPolicy
+from http_client import create_async_http_client
+from rate_limiter import AdaptiveRateLimiter
+from recrawl_state import ValidatorStore, content_hash
+from url_seen import SeenUrlStore
+
+# --- Configuration (async_simple_crawler) ---
+ASYNC_MAX_CONCURRENCY = 16 # Requests in flight across all hosts
+ASYNC_MAX_CONCURRENCY_PER_HOST = 4 # Replaces the random sleep as the politeness bound; it is the effective concurrency of a single-site crawl
+# --- Configuration (circuit_breaker) ---
+MAX_CIRCUIT_WAITS_PER_URL = 2 # Open-circuit waits before a URL is skipped; later URLs of that host are skipped without waiting
+# --- Configuration (--benchmark) ---
+BENCHMARK_RESPONSE_DELAY = 0.03 # Seconds the local test server waits before each response
+
+def simple_crawler(start_url, max_pages=100, delay_min=1, delay_max=3, validator_store=None, rate_limiter=None, retry_policy=None, circuit_breaker=None):
+    # With a validator_store (incremental recrawl), pages are requested conditionally and
+    # unchanged pages (304 or identical body) are skipped: no record is produced for them.
+    # With a rate_limiter (AdaptiveRateLimiter), its per-host adaptive rate replaces the
+    # random delay_min..delay_max sleep between pages.
+    # With a retry_policy (RetryPolicy), transient failures are retried with backoff; with a
+    # circuit_breaker as well, a host that keeps failing pauses the crawl until a probe succeeds,
+    # for at most MAX_CIRCUIT_WAITS_PER_URL waits; after that its URLs are skipped while the
+    # circuit stays open, so a host that is down for good cannot stall the crawl forever.
+    # Every URL ever queued (visited or still waiting) lives in one fingerprint store,
+    # so checking a link is O(1) instead of scanning the queue list.
+    seen_urls = SeenUrlStore()
+    seen_urls.add(start_url)
+    urls_to_visit = deque([start_url])
+    visited_count = 0
+    abandoned_hosts = set() # Hosts whose circuit stayed open through all the waits of a URL
     scraped_data = [] # To store the extracted data
 
     # Get the base domain to stay within the website
     base_domain = urlparse(start_url).netloc
 
-    while urls_to_visit and len(visited_urls) < max_pages:
-        current_url = urls_to_visit.pop(0) # Use pop(0) for BFS, pop() for DFS
-
-        if current_url in visited_urls:
-            continue
+    while urls_to_visit and visited_count < max_pages:
+        current_url = urls_to_visit.popleft() # Use popleft() for BFS, pop() for DFS
 
         print(f"Crawling: {current_url}")
-        visited_urls.add(current_url)
+        visited_count += 1
 
         try:
-            response = requests.get(current_url, timeout=10)
-            response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
-            soup = BeautifulSoup(response.text, 'html.parser')
-
-            # --- Data Extraction Logic (Customize this) ---
-            title = soup.find('title').get_text() if soup.find('title') else 'No Title'
-            paragraphs = [p.get_text() for p in soup.find_all('p')]
-            scraped_data.append({
-                'url': current_url,
-                'title': title,
-                'paragraphs': paragraphs
-            })
-            # -----------------------------------------------
-
-            # Find all links on the page
-            for link in soup.find_all('a', href=True):
-                href = link['href']
-                full_url = urljoin(current_url, href)
-                parsed_full_url = urlparse(full_url)
-
-                # Ensure it's an HTTP/HTTPS link and within the same domain
-                if parsed_full_url.scheme in ['http', 'https'] and parsed_full_url.netloc == base_domain:
-                    # Normalize URL (remove fragments like #section)
-                    normalized_url = parsed_full_url._replace(fragment="").geturl()
-
-                    if normalized_url not in visited_urls and normalized_url not in urls_to_visit:
-                        urls_to_visit.append(normalized_url)
+            headers = validator_store.conditional_headers(current_url) if validator_store else {}
+
+            def fetch_once():
+                if rate_limiter:
+                    rate_limiter.acquire_blocking(current_url)
+                try:
+                    response = requests.get(current_url, timeout=10, headers=headers)
+                except requests.exceptions.RequestException:
+                    if rate_limiter:
+                        rate_limiter.record(current_url, None)
+                    raise
+                if rate_limiter:
+                    rate_limiter.record(current_url, response.status_code, response.elapsed.total_seconds(), response.headers)
+                return response
+
+            for circuit_waits in range(MAX_CIRCUIT_WAITS_PER_URL + 1):
+                try:
+                    if retry_policy:
+                        response = retry_policy.run_blocking(fetch_once, current_url, circuit_breaker, status_of=lambda r: r.status_code)
+                    else:
+                        response = fetch_once()
+                    abandoned_hosts.discard(urlparse(current_url).netloc)
+                    break
+                except CircuitOpenError as e:
+                    if circuit_waits == MAX_CIRCUIT_WAITS_PER_URL or e.host in abandoned_hosts:
+                        abandoned_hosts.add(e.host)
+                        raise
+                    print(f"  {e}; waiting before probing again.")
+                    time.sleep(max(e.retry_in_seconds, 1))
 
+            if validator_store and response.status_code == 304:
+                # Not modified: keep following the links recorded last time
+                print(f"  Unchanged since the last crawl: {current_url}")
+                validator_store.mark_unchanged(current_url)
+                page_links = validator_store.stored_links(current_url)
+            else:
+                if validator_store and response.status_code in (404, 410):
+                    validator_store.mark_removed(current_url)
+                response.raise_for_status() # Raise an HTTPError for bad responses (4xx or 5xx)
+                soup = BeautifulSoup(response.text, 'html.parser')
+
+                # Find all links on the page
+                page_links = []
+                for link in soup.find_all('a', href=True):
+                    href = link['href']
+                    full_url = urljoin(current_url, href)
+                    parsed_full_url = urlparse(full_url)
+
+                    # Ensure it's an HTTP/HTTPS link and within the same domain
+                    if parsed_full_url.scheme in ['http', 'https'] and parsed_full_url.netloc == base_domain:
+                        # Normalize URL (remove fragments like #section)
+                        page_links.append(parsed_full_url._replace(fragment="").geturl())
+
+                body_hash = content_hash(response.content)
+                if validator_store and validator_store.is_unchanged(current_url, body_hash):
+                    print(f"  Unchanged since the last crawl: {current_url}")
+                    validator_store.mark_unchanged(current_url)
+                else:
+                    # --- Data Extraction Logic (Customize this) ---
+                    title = soup.find('title').get_text() if soup.find('title') else 'No Title'
+                    paragraphs = [p.get_text() for p in soup.find_all('p')]
+                    scraped_data.append({
+                        'url': current_url,
+                        'title': title,
+                        'paragraphs': paragraphs
+                    })
+                    # -----------------------------------------------
+                    if validator_store:
+                        validator_store.record_fetch(current_url, response.headers, body_hash, page_links)
+
+            for normalized_url in page_links:
+                if seen_urls.add(normalized_url):
+                    urls_to_visit.append(normalized_url)
+
+        except CircuitOpenError as e:
+            print(f"Skipping {current_url}: {e}")
         except requests.exceptions.RequestException as e:
             print(f"Error crawling {current_url}: {e}")
         except Exception as e:
             print(f"An unexpected error occurred: {e}")
 
-        # Be polite - add a random delay
-        time.sleep(random.uniform(delay_min, delay_max))
+        # Be polite - add a random delay (the rate limiter already spaces requests when given)
+        if not rate_limiter:
+            time.sleep(random.uniform(delay_min, delay_max))
 
     return scraped_data
 
+def _decode_like_requests(response):
+    # requests uses the charset from Content-Type, ISO-8859-1 for other text/* responses,
+    # and guesses otherwise; match the first two so both crawlers parse identical text
+    encoding = response.charset_encoding
+    if encoding is None:
+        content_type = response.headers.get('content-type', '')
+        encoding = 'ISO-8859-1' if 'text' in content_type else 'utf-8'
+    return response.content.decode(encoding, errors='replace')
+
+async def async_simple_crawler(start_url, max_pages=100, max_concurrency=ASYNC_MAX_CONCURRENCY, max_concurrency_per_host=ASYNC_MAX_CONCURRENCY_PER_HOST, validator_store=None, rate_limiter=None, retry_policy=None, circuit_breaker=None):
+    # Same crawl as simple_crawler, but pages are fetched concurrently over one pooled
+    # keep-alive client (HTTP/2 when available). Results are committed in the order the
+    # URLs were discovered, so the BFS order, the set of visited pages and the returned
+    # scraped_data records are exactly those of simple_crawler.
+    # A rate_limiter (AdaptiveRateLimiter) additionally paces each host adaptively, and
+    # retry_policy / circuit_breaker behave as in simple_crawler.
+    seen_urls = SeenUrlStore()
+    seen_urls.add(start_url)
+    urls_to_visit = deque([start_url]) # Only URLs that fall within max_pages are queued
+    discovered_count = 1
+    scraped_data = []
+
+    base_domain = urlparse(start_url).netloc
+    host_semaphores = {}
+    abandoned_hosts = set()
+
+    async def fetch_once(client, url, headers):
+        if rate_limiter is None:
+            return await client.get(url, headers=headers)
+        await rate_limiter.acquire(url)
+        request_start = time.monotonic()
+        try:
+            response = await client.get(url, headers=headers)
+        except httpx.HTTPError:
+            rate_limiter.record(url, None, time.monotonic() - request_start)
+            raise
+        rate_limiter.record(url, response.status_code, time.monotonic() - request_start, response.headers)
+        return response
+
+    async def fetch(client, url):
+        host = urlparse(url).netloc
+        semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(max_concurrency_per_host))
+        headers = validator_store.conditional_headers(url) if validator_store else {}
+        async with semaphore:
+            if retry_policy is None:
+                return await fetch_once(client, url, headers)
+            for circuit_waits in range(MAX_CIRCUIT_WAITS_PER_URL + 1):
+                try:
+                    response = await retry_policy.run(lambda: fetch_once(client, url, headers), url, circuit_breaker, status_of=lambda r: r.status_code)
+                    abandoned_hosts.discard(host)
+                    return response
+                except CircuitOpenError as e:
+                    if circuit_waits == MAX_CIRCUIT_WAITS_PER_URL or e.host in abandoned_hosts:
+                        abandoned_hosts.add(e.host)
+                        raise
+                    print(f"  {e}; waiting before probing again.")
+                    await asyncio.sleep(max(e.retry_in_seconds, 1))
+
+    async with create_async_http_client(max_connections=max_concurrency, max_keepalive_connections=max_concurrency) as client:
+        in_flight = deque() # (url, task) in discovery order
+        while urls_to_visit or in_flight:
+            while urls_to_visit and len(in_flight) < max_concurrency:
+                url = urls_to_visit.popleft()
+                in_flight.append((url, asyncio.create_task(fetch(client, url))))
+
+            current_url, task = in_flight.popleft()
+            print(f"Crawling: {current_url}")
+            try:
+                page_links = []
+                response = await task
+
+                if validator_store and response.status_code == 304:
+                    print(f"  Unchanged since the last crawl: {current_url}")
+                    validator_store.mark_unchanged(current_url)
+                    page_links = validator_store.stored_links(current_url)
+                else:
+                    if validator_store and response.status_code in (404, 410):
+                        validator_store.mark_removed(current_url)
+                    if response.status_code >= 400: # requests only raises for 4xx/5xx
+                        response.raise_for_status()
+                    soup = BeautifulSoup(_decode_like_requests(response), 'html.parser')
+
+                    for link in soup.find_all('a', href=True):
+                        full_url = urljoin(current_url, link['href'])
+                        parsed_full_url = urlparse(full_url)
+                        if parsed_full_url.scheme in ['http', 'https'] and parsed_full_url.netloc == base_domain:
+                            page_links.append(parsed_full_url._replace(fragment="").geturl())
+
+                    body_hash = content_hash(response.content)
+                    if validator_store and validator_store.is_unchanged(current_url, body_hash):
+                        print(f"  Unchanged since the last crawl: {current_url}")
+                        validator_store.mark_unchanged(current_url)
+                    else:
+                        title = soup.find('title').get_text() if soup.find('title') else 'No Title'
+                        paragraphs = [p.get_text() for p in soup.find_all('p')]
+                        scraped_data.append({
+                            'url': current_url,
+                            'title': title,
+                            'paragraphs': paragraphs
+                        })
+                        if validator_store:
+                            validator_store.record_fetch(current_url, response.headers, body_hash, page_links)
+
+                for normalized_url in page_links:
+                    if seen_urls.add(normalized_url) and discovered_count < max_pages:
+                        urls_to_visit.append(normalized_url)
+                        discovered_count += 1
+
+            except CircuitOpenError as e:
+                print(f"Skipping {current_url}: {e}")
+            except httpx.HTTPError as e:
+                print(f"Error crawling {current_url}: {e}")
+            except Exception as e:
+                print(f"An unexpected error occurred: {e}")
+
+    return scraped_data
+
+def benchmark_against_local_site(page_count=200, links_per_page=5, response_delay=BENCHMARK_RESPONSE_DELAY):
+    # Serves a generated static site from a temporary directory and crawls it with both
+    # versions. simple_crawler runs without its random sleep so only fetching is compared.
+    # Every response is held back by response_delay seconds to stand in for network and
+    # server latency, which a loopback server otherwise lacks. The async crawler runs once
+    # with its default per-host limit and once allowed to use all its connections on the one host.
+    import tempfile
+    import threading
+    from functools import partial
+    from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+    class QuietHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(response_delay)
+            super().do_GET()
+
+    class BenchmarkServer(ThreadingHTTPServer):
+        request_queue_size = 128 # The default listen backlog of 5 drops connections once more requests arrive at once
+
+    with tempfile.TemporaryDirectory() as site_dir:
+        for i in range(page_count):
+            links = "".join(f'<a href="/page-{(i * links_per_page + j) % page_count}.html">next</a>' for j in range(1, links_per_page + 1))
+            with open(f"{site_dir}/page-{i}.html", "w", encoding="utf-8") as f:
+                f.write(f"<html><head><title>Page {i}</title></head><body><p>Paragraph {i}.</p><p>More text.</p>{links}</body></html>")
+
+        server = BenchmarkServer(("127.0.0.1", 0), partial(QuietHandler, directory=site_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        start_url = f"http://127.0.0.1:{server.server_address[1]}/page-0.html"
+        try:
+            start_time = time.monotonic()
+            sync_data = simple_crawler(start_url, max_pages=page_count, delay_min=0, delay_max=0)
+            sync_seconds = time.monotonic() - start_time
+
+            async_runs = []
+            for per_host in (ASYNC_MAX_CONCURRENCY_PER_HOST, ASYNC_MAX_CONCURRENCY):
+                start_time = time.monotonic()
+                async_data = asyncio.run(async_simple_crawler(start_url, max_pages=page_count, max_concurrency_per_host=per_host))
+                async_runs.append((per_host, async_data, time.monotonic() - start_time))
+        finally:
+            server.shutdown()
+
+    print(f"\nResponse delay: {response_delay * 1000:.0f} ms per request")
+    print(f"simple_crawler:       {len(sync_data)} pages in {sync_seconds:.2f}s ({len(sync_data) / sync_seconds:.1f} pages/s)")
+    for per_host, async_data, async_seconds in async_runs:
+        print(f"async_simple_crawler: {len(async_data)} pages in {async_seconds:.2f}s ({len(async_data) / async_seconds:.1f} pages/s, "
+              f"{per_host} per host, {sync_seconds / async_seconds:.1f}x faster, identical scraped_data: {sync_data == async_data})")
+
 if __name__ == "__main__":
+    import os
+    import json
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Crawl a website with requests + BeautifulSoup.")
+    parser.add_argument("--incremental", action="store_true", help="Only refetch and re-extract pages that changed since the last run.")
+    parser.add_argument("--use-async", action="store_true", help="Use async_simple_crawler (concurrent, pooled connections).")
+    parser.add_argument("--benchmark", action="store_true", help="Compare both crawlers on a generated local static site and exit.")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        benchmark_against_local_site()
+        raise SystemExit
+
     start_website = "https://www.example.com" # Replace with the website you want to crawl
-    data = simple_crawler(start_website, max_pages=50) # Limit for demonstration
-    
+    validator_store = None
+    if args.incremental:
+        validator_store = ValidatorStore("scraped_data_validators.sqlite3")
+        validator_store.begin_run()
+
+    rate_limiter = AdaptiveRateLimiter() # Adaptive per-host pacing instead of a fixed random sleep
+    retry_policy = RetryPolicy() # Retry transient failures with jittered exponential backoff
+    circuit_breaker = CircuitBreaker() # Stop hammering a host that keeps failing
+    crawler_options = dict(max_pages=50, validator_store=validator_store, rate_limiter=rate_limiter, retry_policy=retry_policy, circuit_breaker=circuit_breaker)
+    if args.use_async:
+        data = asyncio.run(async_simple_crawler(start_website, **crawler_options))
+    else:
+        data = simple_crawler(start_website, **crawler_options) # Limit for demonstration
+    print(f"Rate limiter: {rate_limiter.stats()}")
+    print(f"Retries: {retry_policy.stats()}")
+    print(f"Circuit breaker (time saved on failing hosts): {circuit_breaker.stats()}")
+
+    if validator_store:
+        # Merge the deltas into the previous output instead of replacing it
+        previous_data = []
+        if os.path.exists("scraped_data.json"):
+            with open("scraped_data.json", "r", encoding="utf-8") as f:
+                previous_data = json.load(f)
+        report = validator_store.write_report("recrawl_report.json", crawl_complete=False)
+        records_by_url = {record['url']: record for record in previous_data if record['url'] not in report['removed']}
+        records_by_url.update({record['url']: record for record in data})
+        print(f"Recrawl: {len(report['changed'])} changed, {len(report['unchanged'])} unchanged, {len(report['removed'])} removed.")
+        data = list(records_by_url.values())
+        validator_store.close()
+
     # You can then save 'data' to a file (e.g., JSON)
-    import json
     with open("scraped_data.json", "w", encoding="utf-8") as f:
         json.dump(data, f, ensure_ascii=False, indent=4)
-    print(f"\nScraped {len(data)} pages. Data saved to scraped_data.json")
\ No newline at end of file
+    print(f"\nScraped {len(data)} pages. Data saved to scraped_data.json")
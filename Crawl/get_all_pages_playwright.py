@@ -21,18 +21,29 @@
 #     Configurable limits (max pages, max depth).
 
 import os
-import re
+import time
 import asyncio
-import hashlib
-from urllib.parse import urljoin, urlparse, urldefrag, parse_qs, urlencode
+import argparse
+from urllib.parse import urlparse, urldefrag
 
 # Ensure these are installed:
 # pip install playwright beautifulsoup4 markdownify
 # playwright install
 
-from playwright.async_api import async_playwright, Page, BrowserContext
-from markdownify import markdownify as md
-from bs4 import BeautifulSoup
+from playwright.async_api import async_playwright, BrowserContext
+
+from conversion_pool import ConversionPool
+from crawl_frontier import CrawlFrontier
+from crawl_output import COMBINED_PREVIEW_CHARS, OUTPUT_FORMATS, CombinedLlmInputWriter, create_output_sink
+from fetch_profiles import ResourceBlocker
+from fetch_resilience import RETRYABLE_STATUS_CODES, CircuitBreaker, CircuitOpenError, RetryPolicy
+from hybrid_fetcher import GONE_STATUS_CODES, HybridFetcher
+from near_duplicates import NearDuplicateIndex, convert_with_main_text
+from page_pool import PagePool
+from page_readiness import ReadinessEngine
+from rate_limiter import AdaptiveRateLimiter
+from recrawl_state import ValidatorStore, content_hash
+from relevance import RelevanceScorer
 
 # --- Configuration ---
 # Base directory for all scraped output
@@ -45,13 +56,64 @@ START_URL = "https://www.example.com" # <<< IMPORTANT: Change this to your targe
 # Maximum number of unique pages to crawl (set to None for no limit, but be careful!)
 MAX_PAGES_TO_CRAWL = 50
 
-# Delay between page navigations (in seconds) to be polite to the server
-CRAWL_DELAY_SECONDS = 1
+# Number of async workers sharing the URL queue (1 gives the old one-page-at-a-time crawl)
+NUM_CRAWL_WORKERS = 4
+
+# Maximum number of pages being fetched at the same time, across all hosts
+MAX_CONCURRENT_PAGES = 8
+
+# Maximum number of pages being fetched at the same time from a single host (politeness)
+MAX_CONCURRENT_PAGES_PER_HOST = 4
 
 # Maximum depth for crawling (0 for only the start URL, 1 for start URL and its direct links, etc.)
 # Set to None for no depth limit (use with caution on large sites!)
 MAX_CRAWL_DEPTH = 2
 
+# SQLite file (inside the output directory) holding the crawl frontier; `--resume` continues from it
+FRONTIER_DB_FILENAME = "crawl_frontier.sqlite3"
+
+# Incremental recrawls: per-URL validators (kept across runs) and the changed/unchanged/removed report
+VALIDATOR_DB_FILENAME = "page_validators.sqlite3"
+RECRAWL_REPORT_FILENAME = "recrawl_report.json"
+
+# How crawled pages are stored: "jsonl" appends records to compressed, size-rotated shards with an
+# offset index (see crawl_output.py); "directory" writes one .html and one .md file per page
+OUTPUT_FORMAT = "jsonl"
+
+# combined_llm_input.md is written section by section as pages complete. With a token budget
+# (estimated as characters / 4) it is split into combined_llm_input_001.md, _002.md, ... of at most
+# that many tokens each; None writes a single file
+COMBINED_LLM_INPUT_TOKEN_BUDGET = None
+
+# Research query for a focused crawl: links are scored by anchor text, URL tokens and the relevance
+# of the page they were found on, and the most promising URL is crawled first (see relevance.py).
+# None keeps the breadth-first order
+CRAWL_FOCUS_QUERY = None
+
+# Characters of each page's markdown kept in memory for the end-of-crawl summary
+EXCERPT_CHARS = 1000
+
+# Pages whose main text is at least this similar to an already crawled page are skipped
+# instead of being stored (1.0 only skips exact duplicates)
+DUPLICATE_SIMILARITY_THRESHOLD = 0.95
+
+# HTML-to-Markdown conversion and main-text extraction run in this many worker processes so they never
+# stall the event loop; at most CONVERSION_QUEUE_SIZE more pages wait for a worker before crawl workers are held back
+CONVERSION_PROCESSES = max(1, (os.cpu_count() or 2) - 1)
+CONVERSION_QUEUE_SIZE = 16
+
+# Times a URL is parked behind an open circuit before it is marked failed; once a URL of a host
+# reaches it, later URLs of that host fail at once while the circuit stays open, so a host that
+# never comes back cannot keep the crawl running
+MAX_DEFERRALS_PER_URL = 2
+
+# How long an idle worker waits before checking the frontier again while other workers are still busy
+IDLE_WORKER_POLL_SECONDS = 0.2
+
+# Fetch profile for route interception: "text" aborts images, media, fonts, stylesheets and trackers;
+# "full" loads everything (use it for screenshot runs)
+FETCH_PROFILE = "text"
+
 # Exclude common file extensions from crawling
 EXCLUDE_EXTENSIONS = (
     '.pdf', '.zip', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
@@ -59,209 +121,365 @@ EXCLUDE_EXTENSIONS = (
     '.css', '.js', '.xml', '.json', '.txt', '.csv', '.rss', '.atom'
 )
 
-# --- Helper Functions (Reused from previous discussions) ---
-
-def convert_html_to_markdown_for_llm(html_content: str, base_url: str = "") -> str:
-    """
-    Converts raw HTML content to Markdown, making it suitable for LLMs.
-    Handles relative links/images and performs additional cleanup.
-    """
-    if not html_content:
-        return ""
-
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        for img in soup.find_all('img', src=True):
-            img['src'] = urljoin(base_url, img['src'])
-        for a in soup.find_all('a', href=True):
-            a['href'] = urljoin(base_url, a['href'])
-
-        converter = md.MarkdownConverter(
-            strong_em_symbol='**',
-            bullets='*',
-            code_language='python',
-            strip=['script', 'style', 'header', 'footer', 'nav', 'aside', 'form', 'button', '.sidebar', '#comments']
-        )
-        markdown_output = converter.convert(str(soup))
-
-        markdown_output = re.sub(r'\n\s*\n', '\n\n', markdown_output).strip()
-        markdown_output = re.sub(r'\[]\(([^)]+)\)', r'(\1)', markdown_output)
-        markdown_output = re.sub(r'\n\n\n+', '\n\n', markdown_output)
-        
-        return markdown_output
-    except ImportError:
-        print("Warning: BeautifulSoup4 or markdownify not installed. Cannot convert HTML to Markdown.")
-        return html_content
-    except Exception as e:
-        print(f"Error converting HTML to Markdown: {e}")
-        return html_content
-
-def generate_filename(url: str, suffix: str = "") -> str:
-    """Generates a safe filename from a URL using a hash for uniqueness."""
-    url_hash = hashlib.md5(url.encode('utf-8')).hexdigest()
-    parsed = urlparse(url)
-    # Use a cleaned version of the path, or just the hash if path is too generic
-    path_segment = parsed.path.strip('/').replace('/', '_').replace('.', '_').replace('-', '_')
-    if path_segment:
-        # Limit length to avoid excessively long filenames
-        clean_name = f"{path_segment[:50]}_{url_hash[:8]}"
-    else:
-        clean_name = url_hash
-    return f"{clean_name}{suffix}"
-
-async def extract_content_and_save_with_playwright(page: Page, url: str, output_dir: str) -> tuple[str, str]:
-    """
-    Navigates Playwright to a URL, extracts HTML, converts to Markdown, and saves both.
-    Returns (markdown_content, html_content) or (None, None) if failed.
-    """
-    html_content = None
-    markdown_content = None
-    try:
-        await page.goto(url, wait_until="networkidle", timeout=60000)
-        html_content = await page.content()
-        markdown_content = convert_html_to_markdown_for_llm(html_content, url)
-
-        # Sanitize domain name for directory
-        parsed_url = urlparse(url)
-        domain_folder = re.sub(r'[^a-zA-Z0-9_\-.]', '', parsed_url.netloc)
-        page_output_dir = os.path.join(output_dir, domain_folder)
-        os.makedirs(page_output_dir, exist_ok=True)
+# Aborts requests the fetch profile does not need; installed on every page the crawler opens
+resource_blocker = ResourceBlocker(FETCH_PROFILE)
 
-        filename_base = generate_filename(url)
-        html_filepath = os.path.join(page_output_dir, f"{filename_base}.html")
-        md_filepath = os.path.join(page_output_dir, f"{filename_base}.md")
+# Decides when a navigated page is ready, learning per domain instead of always waiting for networkidle
+readiness_engine = ReadinessEngine()
 
-        with open(html_filepath, 'w', encoding='utf-8') as f:
-            f.write(html_content)
-        print(f"    Saved HTML to: {html_filepath}")
+# Per-host request rate: grows while a host answers quickly, backs off on 429/5xx/Retry-After,
+# never exceeds the robots.txt Crawl-delay
+rate_limiter = AdaptiveRateLimiter()
 
-        with open(md_filepath, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
-        print(f"    Saved Markdown to: {md_filepath}")
-
-        return markdown_content, html_content
-    except Exception as e:
-        print(f"  Playwright failed to load, extract, or save content from {url}: {e}")
-        return None, None
+# Retries transient failures with jittered exponential backoff; hosts that keep failing are
+# parked (their queued URLs deferred) until a probe request succeeds
+retry_policy = RetryPolicy()
+circuit_breaker = CircuitBreaker()
 
 # --- NEW: Core Website Crawler Function ---
 
-async def crawl_website(start_url: str, browser_context: BrowserContext, output_dir: str):
+async def crawl_website(start_url: str, browser_context: BrowserContext, output_dir: str, num_workers: int = NUM_CRAWL_WORKERS, page_pool: PagePool | None = None, resume: bool = False, incremental: bool = False, output_format: str = OUTPUT_FORMAT, llm_input_writer: CombinedLlmInputWriter | None = None, focus_query: str | None = CRAWL_FOCUS_QUERY):
     """
     Crawls a website starting from a given URL, extracts content, and saves it.
+    `num_workers` async workers share one URL frontier; concurrency is bounded by a
+    global cap and a per-host cap instead of a fixed delay between pages.
+    The frontier lives on disk (see crawl_frontier.py); with `resume=True` the crawl
+    continues where the previous run stopped instead of starting over.
+    With `incremental=True`, pages are requested conditionally and unchanged pages
+    are neither converted nor rewritten; a changed/unchanged/removed report is written.
+    Their sections in `llm_input_writer` come from the stored output, so the combined
+    input still covers every page crawled, not only the changed ones.
+    Pages come from `page_pool` (a private pool is created if none is given) and are
+    only used for pages the static HTTP tier cannot serve (see hybrid_fetcher.py).
+    `output_format` selects the page sink: "jsonl" shards or the "directory" layout.
+    Each saved page's section is streamed to `llm_input_writer` as soon as the page is done;
+    only metadata and a short excerpt per page are kept in memory and returned.
+    With a `focus_query`, the frontier is best-first: links are claimed in order of their
+    estimated relevance to the query, and the mean relevance per fetch is reported.
     """
     print(f"\nStarting website crawl from: {start_url}")
     print(f"Max pages to crawl: {MAX_PAGES_TO_CRAWL if MAX_PAGES_TO_CRAWL else 'No Limit'}")
     print(f"Max crawl depth: {MAX_CRAWL_DEPTH if MAX_CRAWL_DEPTH else 'No Limit'}")
-    print(f"Delay between pages: {CRAWL_DELAY_SECONDS} seconds")
+    print(f"Fetch profile: {FETCH_PROFILE}")
+    print(f"Output format: {output_format}")
+    print(f"Crawl order: {f'best-first for query {focus_query!r}' if focus_query else 'breadth-first'}")
+    print(f"Workers: {num_workers}, max concurrent pages: {MAX_CONCURRENT_PAGES} (per host: {MAX_CONCURRENT_PAGES_PER_HOST})")
 
     # Normalize the start URL to get the base domain
     parsed_start_url = urlparse(start_url)
-    base_domain = f"{parsed_start_url.scheme}://{parsed_start_url.netloc}"
-    
-    # Queue for URLs to visit (stores tuples of (url, depth))
-    to_visit_queue = asyncio.Queue()
-    await to_visit_queue.put((start_url, 0)) # Start with depth 0
-
-    # Set to keep track of visited URLs (normalized to avoid duplicates)
-    visited_urls = set()
-    
-    # List to store all collected content for final LLM input
+
+    # On-disk frontier: queued URLs with their depth, visited fingerprints and per-URL status.
+    # Claims happen under frontier_lock so two workers never take the same URL.
+    frontier = CrawlFrontier(os.path.join(output_dir, FRONTIER_DB_FILENAME))
+    frontier_lock = asyncio.Lock()
+    if resume and frontier.get_meta("start_url") == start_url:
+        requeued = frontier.requeue_in_progress()
+        print(f"Resuming previous crawl: {frontier.counts()} ({requeued} interrupted URLs requeued)")
+    else:
+        if resume:
+            print("No previous crawl of this start URL found; starting a fresh crawl.")
+            if llm_input_writer is not None:
+                llm_input_writer.append = False # Nothing to continue: start the combined input over
+        frontier.reset()
+        frontier.set_meta("start_url", start_url)
+        frontier.add(start_url, 0) # Start with depth 0
+        frontier.checkpoint()
+
+    # Concurrency caps replacing the fixed politeness delay
+    global_semaphore = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+    host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+    # Circuit-breaker parking: deferrals per URL, and hosts given up on until one of their fetches succeeds
+    deferral_counts: dict[str, int] = {}
+    abandoned_hosts: set[str] = set()
+
+    # Metadata and an excerpt of every saved page (this run only); full content goes straight to disk
     all_collected_content = []
-    
-    # Counter for crawled pages
-    crawled_count = 0
-
-    while not to_visit_queue.empty() and (MAX_PAGES_TO_CRAWL is None or crawled_count < MAX_PAGES_TO_CRAWL):
-        current_url, current_depth = await to_visit_queue.get()
-
-        # Normalize URL for visited check: remove fragment and sort query params
-        normalized_url, _ = urldefrag(current_url)
-        parsed_normalized_url = urlparse(normalized_url)
-        query_params = parse_qs(parsed_normalized_url.query)
-        # Sort query parameters to treat URLs with same params but different order as identical
-        sorted_query = urlencode(sorted(query_params.items()), doseq=True)
-        normalized_url = parsed_normalized_url._replace(query=sorted_query).geturl()
-
-        if normalized_url in visited_urls:
-            print(f"  Skipping already visited: {current_url}")
-            continue
-
-        if MAX_CRAWL_DEPTH is not None and current_depth > MAX_CRAWL_DEPTH:
-            print(f"  Skipping due to max depth reached ({current_depth}): {current_url}")
-            continue
-
-        # Add to visited set
-        visited_urls.add(normalized_url)
-        crawled_count += 1
-
-        print(f"  Crawling ({crawled_count}/{MAX_PAGES_TO_CRAWL if MAX_PAGES_TO_CRAWL else '∞'}, Depth: {current_depth}): {current_url}")
-
-        page = await browser_context.new_page()
-        markdown_content, html_content = await extract_content_and_save_with_playwright(page, current_url, output_dir)
-        
+
+    # Counter for crawled pages (includes pages crawled by earlier runs when resuming)
+    crawled_count = frontier.claimed_count()
+    crawled_this_run = 0
+    in_flight = 0
+
+    # Reuse pages across navigations instead of opening one per URL
+    owns_page_pool = page_pool is None
+    if owns_page_pool:
+        page_pool = PagePool(browser_context, max_size=MAX_CONCURRENT_PAGES, on_new_page=resource_blocker.attach)
+
+    # Plain HTTP first, Playwright only for pages that need JavaScript
+    hybrid_fetcher = HybridFetcher(page_pool, readiness_engine, resource_blocker)
+
+    # Where converted pages go (sharded JSONL records or per-page files)
+    output_sink = create_output_sink(output_format, output_dir)
+
+    # CPU-bound conversion runs in worker processes while this loop keeps navigating
+    conversion_pool = ConversionPool(convert_with_main_text, CONVERSION_PROCESSES, CONVERSION_QUEUE_SIZE)
+
+    # Fingerprints of the main text of every saved page, to skip print views, tracking-param and pagination copies
+    duplicate_index = NearDuplicateIndex(DUPLICATE_SIMILARITY_THRESHOLD)
+
+    # Link and page scoring against the focus query (best-first crawl)
+    relevance_scorer = RelevanceScorer(focus_query) if focus_query else None
+
+    # Incremental recrawl: per-URL validators and content hashes kept across runs
+    validator_store = None
+    if incremental:
+        validator_store = ValidatorStore(os.path.join(output_dir, VALIDATOR_DB_FILENAME))
+        run_id = validator_store.begin_run(resume=resume)
+        print(f"Incremental recrawl (run {run_id}): unchanged pages are skipped.")
+
+    def filter_crawlable_links(current_url: str, hrefs: list[str]) -> list[str]:
+        """Keeps the absolute links the crawl should follow from a page."""
+        crawlable_links = []
+        for absolute_url in hrefs:
+            parsed_absolute_url = urlparse(absolute_url)
+
+            # Filter links:
+            # 1. Must be HTTP/HTTPS
+            # 2. Must be within the same base domain
+            # 3. Must not be a common file extension
+            # 4. Must not be a fragment link on the same page
+            if parsed_absolute_url.scheme in ('http', 'https') and \
+               parsed_absolute_url.netloc == parsed_start_url.netloc and \
+               not any(absolute_url.lower().endswith(ext) for ext in EXCLUDE_EXTENSIONS) and \
+               urldefrag(absolute_url)[0] != urldefrag(current_url)[0]: # Avoid same-page fragment links
+                crawlable_links.append(absolute_url)
+        return crawlable_links
+
+    def queue_links(crawlable_links: list[str], current_depth: int, links: list[dict] | None = None, page_relevance: float = 0.0):
+        """
+        Adds links to the frontier if within the depth limit (the frontier ignores URLs it has already seen).
+        In a focused crawl each link is queued with its relevance score, using the anchor texts in `links`.
+        """
+        if MAX_CRAWL_DEPTH is None or current_depth < MAX_CRAWL_DEPTH:
+            anchor_texts = {}
+            if relevance_scorer and links:
+                for link in links:
+                    anchor_texts[link["href"]] = f"{anchor_texts.get(link['href'], '')} {link['text']}"
+            for absolute_url in crawlable_links:
+                priority = 0.0
+                if relevance_scorer:
+                    priority = relevance_scorer.score_link(absolute_url, anchor_texts.get(absolute_url, ""), page_relevance)
+                frontier.add(absolute_url, current_depth + 1, priority)
+
+    def add_stored_page_to_llm_input(url: str, title: str | None):
+        """Writes the combined-input section of an unchanged page from the output saved by an earlier run."""
+        record = output_sink.read(url)
+        if record is None:
+            print(f"    No saved output for unchanged page, leaving it out of the combined input: {url}")
+            return
+        llm_input_writer.add_page(title or record.get("title") or url, url, record["markdown"])
+
+    async def crawl_page(current_url: str, current_depth: int, page_number: int) -> str:
+        """Fetches one page (under the concurrency caps), saves it, and queues its links. Returns its final status."""
+        host = urlparse(current_url).netloc
+        host_semaphore = host_semaphores.setdefault(host, asyncio.Semaphore(MAX_CONCURRENT_PAGES_PER_HOST))
+
+        print(f"  Crawling ({page_number}/{MAX_PAGES_TO_CRAWL if MAX_PAGES_TO_CRAWL else '∞'}, Depth: {current_depth}): {current_url}")
+
+        conditional_headers = validator_store.conditional_headers(current_url) if validator_store else None
+
+        async def fetch_once() -> dict:
+            # Wait for the host's rate-limit token before taking a concurrency slot, and hold the
+            # slots only for the request itself: retry backoff sleeps happen outside them too, so a
+            # throttled or failing host does not keep slots other hosts could use
+            await rate_limiter.acquire(current_url)
+            async with global_semaphore, host_semaphore:
+                fetch_start = time.monotonic()
+                try:
+                    fetched = await hybrid_fetcher.fetch(current_url, conditional_headers)
+                except Exception:
+                    rate_limiter.record(current_url, None, time.monotonic() - fetch_start)
+                    raise
+                rate_limiter.record(current_url, fetched["status"], time.monotonic() - fetch_start, fetched["headers"])
+            return fetched
+
+        try:
+            fetched = await retry_policy.run(fetch_once, current_url, circuit_breaker, status_of=lambda result: result["status"])
+        except CircuitOpenError as e:
+            deferral_counts[current_url] = deferral_counts.get(current_url, 0) + 1
+            if deferral_counts[current_url] > MAX_DEFERRALS_PER_URL or host in abandoned_hosts:
+                abandoned_hosts.add(host)
+                print(f"    Giving up on {current_url}: {e}")
+                return "failed"
+            # Host is down: park the URL instead of spending another timeout on it
+            frontier.defer(current_url, time.time() + e.retry_in_seconds)
+            print(f"    Parked {current_url}: {e}")
+            return "deferred"
+        except Exception as e:
+            print(f"  Failed to load content from {current_url}: {e}")
+            return "failed"
+        abandoned_hosts.discard(host)
+
+        if fetched["status"] in RETRYABLE_STATUS_CODES:
+            print(f"    Still failing after {retry_policy.max_attempts} attempts (HTTP {fetched['status']}): {current_url}")
+            return "failed"
+
+        blocked_stats = fetched.get("blocked")
+        if blocked_stats and blocked_stats["blocked_requests"]:
+            print(f"    Blocked {blocked_stats['blocked_requests']} requests (~{blocked_stats['estimated_bytes_saved'] / 1024:.0f} KiB saved)")
+
+        if fetched["status"] in GONE_STATUS_CODES:
+            print(f"    Page is gone ({fetched['status']}): {current_url}")
+            if validator_store:
+                validator_store.mark_removed(current_url)
+            return "failed"
+
+        # Incremental recrawl: a 304 or an identical body is a no-op (no conversion, no rewrite)
+        if validator_store:
+            if fetched.get("not_modified"):
+                crawlable_links = validator_store.stored_links(current_url)
+            elif validator_store.is_unchanged(current_url, content_hash(fetched["html"])):
+                crawlable_links = filter_crawlable_links(current_url, [link["href"] for link in fetched["links"]])
+            else:
+                crawlable_links = None
+            if crawlable_links is not None:
+                print(f"    Unchanged since the last crawl, skipping conversion: {current_url}")
+                validator_store.mark_unchanged(current_url)
+                if llm_input_writer is not None:
+                    add_stored_page_to_llm_input(current_url, fetched["title"])
+                queue_links(crawlable_links, current_depth, fetched["links"])
+                return "done"
+
+        # Links were collected in one batch by the fetcher (in-page evaluation or HTML parse)
+        crawlable_links = filter_crawlable_links(current_url, [link["href"] for link in fetched["links"]])
+
+        # The worker parses the page once for both the markdown and the main text
+        try:
+            markdown_content, main_text = await conversion_pool.convert(fetched["html"], current_url)
+        except Exception as e:
+            print(f"  Failed to convert content from {current_url}: {e}")
+            return "failed"
+
+        page_relevance = 0.0
+        if relevance_scorer:
+            page_relevance = relevance_scorer.score_page(main_text)
+            print(f"    Relevance to focus query: {page_relevance:.2f}")
+
+        # Same content under another URL: skip storage, but keep following its links
+        duplicate_of = duplicate_index.check_and_add(current_url, main_text, len(fetched["html"]))
+        if duplicate_of:
+            print(f"    Duplicate of {duplicate_of}, not saving: {current_url}")
+            queue_links(crawlable_links, current_depth, fetched["links"], page_relevance)
+            return "duplicate"
+
+        try:
+            output_sink.write(current_url, fetched["html"], markdown_content, fetched["status"], fetched["title"])
+        except Exception as e:
+            print(f"  Failed to save content from {current_url}: {e}")
+            return "failed"
+
+        if validator_store:
+            validator_store.record_fetch(current_url, fetched["headers"], content_hash(fetched["html"]), crawlable_links)
+
         if markdown_content:
             all_collected_content.append({
-                "title": await page.title() if page.is_closed() == False else "No Title", # Get title if page is still open
+                "title": fetched["title"],
                 "url": current_url,
-                "markdown_content": markdown_content,
-                "html_content": html_content
+                "excerpt": markdown_content[:EXCERPT_CHARS],
+                "markdown_chars": len(markdown_content),
+                "tier": fetched["tier"]
             })
+            if llm_input_writer is not None:
+                llm_input_writer.add_page(fetched["title"], current_url, markdown_content)
+
+            # Queue new links for further crawling if within depth limit
+            queue_links(crawlable_links, current_depth, fetched["links"], page_relevance)
+        return "done"
+
+    async def crawl_worker():
+        """Claims URLs from the frontier until it is exhausted or the page limit is reached."""
+        nonlocal crawled_count, crawled_this_run, in_flight
+        while True:
+            async with frontier_lock:
+                if MAX_PAGES_TO_CRAWL is not None and crawled_count >= MAX_PAGES_TO_CRAWL:
+                    return
+                claimed = frontier.claim_next()
+                if claimed is None:
+                    if in_flight == 0 and frontier.next_deferred_time() is None:
+                        return # Nothing queued (or parked) and nobody left who could queue more
+                else:
+                    in_flight += 1
+                    crawled_count += 1
+                    crawled_this_run += 1
+                    page_number = crawled_count
+
+            if claimed is None:
+                await asyncio.sleep(IDLE_WORKER_POLL_SECONDS)
+                continue
+
+            current_url, current_depth = claimed
+            status = "failed"
+            try:
+                status = await crawl_page(current_url, current_depth, page_number)
+            except Exception as e:
+                print(f"  Unexpected error while crawling {current_url}: {e}")
+            finally:
+                if status == "deferred":
+                    crawled_count -= 1 # Parked URLs are claimed again later and only count once
+                    crawled_this_run -= 1
+                else:
+                    frontier.mark(current_url, status)
+                in_flight -= 1
 
-            # Extract new links for further crawling if within depth limit
-            if MAX_CRAWL_DEPTH is None or current_depth < MAX_CRAWL_DEPTH:
-                try:
-                    link_elements = await page.locator("a").all()
-                    for link_element in link_elements:
-                        href = await link_element.get_attribute("href")
-                        if href:
-                            absolute_url = urljoin(current_url, href)
-                            parsed_absolute_url = urlparse(absolute_url)
-
-                            # Filter links:
-                            # 1. Must be HTTP/HTTPS
-                            # 2. Must be within the same base domain
-                            # 3. Must not be a common file extension
-                            # 4. Must not be a fragment link on the same page
-                            if parsed_absolute_url.scheme in ('http', 'https') and \
-                               parsed_absolute_url.netloc == parsed_start_url.netloc and \
-                               not any(absolute_url.lower().endswith(ext) for ext in EXCLUDE_EXTENSIONS) and \
-                               urldefrag(absolute_url)[0] != urldefrag(current_url)[0]: # Avoid same-page fragment links
-                                
-                                # Normalize potential new URL for visited check
-                                new_normalized_url, _ = urldefrag(absolute_url)
-                                new_parsed_normalized_url = urlparse(new_normalized_url)
-                                new_query_params = parse_qs(new_parsed_normalized_url.query)
-                                new_sorted_query = urlencode(sorted(new_query_params.items()), doseq=True)
-                                new_normalized_url = new_parsed_normalized_url._replace(query=new_sorted_query).geturl()
-
-                                if new_normalized_url not in visited_urls:
-                                    await to_visit_queue.put((absolute_url, current_depth + 1))
-                                    # Add to visited set immediately to prevent other tasks from adding it
-                                    # (though main visited_urls check handles this for processing)
-                                    # visited_urls.add(new_normalized_url) # Can add here too for earlier filtering
-                except Exception as e:
-                    print(f"  Error extracting links from {current_url}: {e}")
-        
-        await page.close()
-        await asyncio.sleep(CRAWL_DELAY_SECONDS) # Be polite!
-
+    start_time = time.monotonic()
+    workers = [asyncio.create_task(crawl_worker()) for _ in range(max(1, num_workers))]
+    try:
+        await asyncio.gather(*workers)
+        if validator_store:
+            crawl_complete = frontier.counts().get("queued", 0) == 0
+            report_path = os.path.join(output_dir, RECRAWL_REPORT_FILENAME)
+            report = validator_store.write_report(report_path, crawl_complete)
+            print(f"Recrawl report: {len(report['changed'])} changed, {len(report['unchanged'])} unchanged, "
+                  f"{len(report['removed'])} removed, {len(report['not_reached'])} not reached (saved to '{report_path}')")
+    finally:
+        frontier.close() # Final checkpoint
+        conversion_pool.close()
+        output_sink.close()
+        if validator_store:
+            validator_store.close()
+    print(f"Fetch tiers: {hybrid_fetcher.stats()}")
+    print(f"Duplicate pages skipped: {duplicate_index.stats()}")
+    print(f"HTML-to-Markdown conversion: {conversion_pool.stats()}")
+    print(f"Retries: {retry_policy.stats()}")
+    print(f"Circuit breaker (time saved on failing hosts): {circuit_breaker.stats()}")
+    if relevance_scorer:
+        print(f"Focused crawl relevance: {relevance_scorer.stats()}")
+    await hybrid_fetcher.close()
+    if owns_page_pool:
+        await page_pool.close()
+
+    elapsed_seconds = time.monotonic() - start_time
+    pages_per_second = crawled_this_run / elapsed_seconds if elapsed_seconds > 0 else 0.0
     print(f"\nFinished crawling. Collected content from {len(all_collected_content)} unique pages.")
+    print(f"Crawled {crawled_this_run} pages in {elapsed_seconds:.1f}s ({pages_per_second:.2f} pages/sec with {num_workers} workers).")
     return all_collected_content
 
 # --- Main Orchestration ---
-async def main():
+async def main(resume: bool = False, incremental: bool = False, output_format: str = OUTPUT_FORMAT, token_budget: int | None = COMBINED_LLM_INPUT_TOKEN_BUDGET,
+               focus_query: str | None = CRAWL_FOCUS_QUERY):
     os.makedirs(OUTPUT_BASE_DIR, exist_ok=True)
     print(f"All scraped data will be saved in: {os.path.abspath(OUTPUT_BASE_DIR)}")
     print(f"\nStarting full website crawl for: \"{START_URL}\"")
 
+    llm_input_writer = CombinedLlmInputWriter(OUTPUT_BASE_DIR, token_budget=token_budget, append=resume) # A resumed crawl adds to the previous combined input
     async with async_playwright() as p:
         browser = await p.chromium.launch(headless=True) # Set headless=False to see browser UI
         browser_context = await browser.new_context()
-
-        all_collected_content = await crawl_website(START_URL, browser_context, OUTPUT_BASE_DIR)
-
+        page_pool = PagePool(browser_context, max_size=MAX_CONCURRENT_PAGES, on_new_page=resource_blocker.attach)
+
+        try:
+            all_collected_content = await crawl_website(START_URL, browser_context, OUTPUT_BASE_DIR, page_pool=page_pool, resume=resume,
+                                                        incremental=incremental, output_format=output_format, llm_input_writer=llm_input_writer,
+                                                        focus_query=focus_query)
+        finally:
+            llm_input_writer.close()
+
+        print(f"Page pool stats: {page_pool.stats()}")
+        print(f"Fetch profile '{FETCH_PROFILE}' savings: {resource_blocker.total_stats}")
+        print(f"Page readiness wait times: {readiness_engine.wait_stats()}")
+        print(f"Rate limiter: {rate_limiter.stats()}")
+        await page_pool.close()
         await browser_context.close() # Close browser context
         await browser.close() # Close browser
 
@@ -272,35 +490,25 @@ async def main():
                 print(f"Source URL: {item.get('url', 'N/A')}")
                 print(f"Title: {item.get('title', 'N/A')}")
                 print("Content (Excerpt):")
-                
-                markdown_content = item.get('markdown_content')
-                if markdown_content is not None:
-                    print(markdown_content[:1000] + ("..." if len(markdown_content) > 1000 else ""))
-                else:
-                    print("[No content extracted for this page]")
+                print(item['excerpt'] + ("..." if item['markdown_chars'] > len(item['excerpt']) else ""))
                 print("-" * 50)
 
-            combined_llm_input = ""
-            for item in all_collected_content:
-                markdown_content = item.get('markdown_content')
-                if markdown_content is not None and markdown_content.strip():
-                    combined_llm_input += f"## Source: {item.get('title', 'N/A')} ({item.get('url', 'N/A')})\n\n"
-                    combined_llm_input += f"{markdown_content}\n\n---\n\n"
-                else:
-                    combined_llm_input += f"## Source: {item.get('title', 'N/A')} ({item.get('url', 'N/A')})\n\n"
-                    combined_llm_input += "[Content not available for this page]\n\n---\n\n"
-
-
             print("\n--- Combined LLM Input (Full Excerpt) ---")
-            print(combined_llm_input[:3000] + ("..." if len(combined_llm_input) > 3000 else ""))
-            
-            final_combined_filename = os.path.join(OUTPUT_BASE_DIR, "combined_llm_input.md")
-            with open(final_combined_filename, "w", encoding="utf-8") as f:
-                f.write(combined_llm_input)
-            print(f"\nCombined content for LLM saved to '{final_combined_filename}'")
+            print(llm_input_writer.preview + ("..." if len(llm_input_writer.preview) >= COMBINED_PREVIEW_CHARS else ""))
+
+            saved_files = ", ".join(f"'{path}'" for path in llm_input_writer.paths)
+            print(f"\nCombined content for LLM ({llm_input_writer.section_count} sections) saved to {saved_files}")
 
         else:
             print("No content was collected.")
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Crawl a website with Playwright and save HTML + Markdown for every page.")
+    parser.add_argument("--resume", action="store_true", help="Continue the previous crawl from its on-disk frontier instead of starting over.")
+    parser.add_argument("--incremental", action="store_true", help="Send conditional requests and skip pages that did not change since the last run.")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default=OUTPUT_FORMAT, help="Sharded JSONL records (default) or one .html/.md file pair per page.")
+    parser.add_argument("--token-budget", type=int, default=COMBINED_LLM_INPUT_TOKEN_BUDGET, help="Split combined_llm_input.md into files of at most this many (estimated) tokens.")
+    parser.add_argument("--focus-query", default=CRAWL_FOCUS_QUERY, help="Crawl best-first: follow the links most relevant to this query first.")
+    args = parser.parse_args()
+    asyncio.run(main(resume=args.resume, incremental=args.incremental, output_format=args.output_format, token_budget=args.token_budget,
+                     focus_query=args.focus_query))
\ No newline at end of file
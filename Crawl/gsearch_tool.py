@@ -1,13 +1,38 @@
+import asyncio
 import os
+import time
 from typing import Any
+from urllib.parse import urldefrag
 
 import httpx
 
 from rllm.tools.tool_base import Tool, ToolOutput
+from rllm.tools.web_tools.http_pool import close_async_client, get_async_client
+from rllm.tools.web_tools.response_cache import ResponseCache, get_default_cache
 
 REFERENCE_COUNT = 8
 DEFAULT_SEARCH_ENGINE_TIMEOUT = 5
 GOOGLE_SEARCH_ENDPOINT = "https://customsearch.googleapis.com/customsearch/v1"
+MAX_QUERIES_PER_SECOND = 5  # Shared by every async search in the process
+RRF_K = 60  # Reciprocal-rank fusion constant; larger values flatten the rank differences
+
+
+class _QpsLimiter:
+    """Spaces request start times at least 1 / qps apart across all callers of the event loop."""
+
+    def __init__(self, qps: float):
+        self.interval = 1.0 / qps
+        self._next_slot = 0.0
+
+    async def wait(self):
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+_qps_limiter = _QpsLimiter(MAX_QUERIES_PER_SECOND)
 
 
 class GoogleSearchTool(Tool):
@@ -16,7 +41,7 @@ class GoogleSearchTool(Tool):
     NAME = "google_search"
     DESCRIPTION = f"Search a query using the Google search engine, returning the top {REFERENCE_COUNT} results along with a short snippet about their contents"
 
-    def __init__(self, name: str = NAME, description: str = DESCRIPTION, timeout: float = DEFAULT_SEARCH_ENGINE_TIMEOUT, reference_count: int = REFERENCE_COUNT):
+    def __init__(self, name: str = NAME, description: str = DESCRIPTION, timeout: float = DEFAULT_SEARCH_ENGINE_TIMEOUT, reference_count: int = REFERENCE_COUNT, cache: ResponseCache | None = None, use_cache: bool = True):
         """
         Initialize the GoogleSearch tool.
 
@@ -25,9 +50,12 @@ class GoogleSearchTool(Tool):
             description (str): A description of the tool's purpose, defaults to GoogleSearch.DESCRIPTION.
             timeout (float): Maximum time in seconds to wait for search results, defaults to DEFAULT_SEARCH_ENGINE_TIMEOUT.
             reference_count (int): Number of results to return, defaults to REFERENCE_COUNT.
+            cache (ResponseCache, optional): Response cache to use, defaults to the shared on-disk cache.
+            use_cache (bool): Whether to look up and store responses in the cache.
         """
         self.timeout = timeout
         self.reference_count = reference_count
+        self.cache = (cache or get_default_cache()) if use_cache else None
         self._init_client()
         super().__init__(name=name, description=description)
 
@@ -43,11 +71,8 @@ class GoogleSearchTool(Tool):
     def json(self):
         return {"type": "function", "function": {"name": self.name, "description": self.description, "parameters": {"type": "object", "properties": {"query": {"type": "string", "description": "Query to be submitted to Google search engine."}}, "required": ["query"]}}}
 
-    def _search_with_google(self, query: str):
-        """
-        Search with google and return the contexts.
-        """
-
+    def _google_params(self, query: str) -> tuple[dict[str, Any], dict[str, Any]]:
+        """Returns the request parameters and the cache key parameters (without the secret key) for a query."""
         secret_key = os.getenv("GOOGLE_SEARCH_SECRET_KEY")
         engine_id = os.getenv("GOOGLE_SEARCH_ENGINE_ID")
         if not secret_key or not engine_id:
@@ -58,9 +83,13 @@ class GoogleSearchTool(Tool):
             "q": query,
             "num": REFERENCE_COUNT,
         }
+        cache_params = {"cx": engine_id, "q": query, "num": REFERENCE_COUNT}
+        return params, cache_params
 
-        response = self.client.get(url=GOOGLE_SEARCH_ENDPOINT, params=params, timeout=DEFAULT_SEARCH_ENGINE_TIMEOUT)
+    def _contexts_from_response(self, response: httpx.Response, cache_params: dict[str, Any], strict: bool = False) -> list[dict]:
         if not response.is_success:
+            if strict:  # Not raise_for_status(): its message contains the request URL, secret key included
+                raise httpx.HTTPStatusError(f"Error: {response.status_code} - {response.text}", request=response.request, response=response)
             print(f"{response.status_code} {response.text}")
         json_content = response.json()
         try:
@@ -68,8 +97,42 @@ class GoogleSearchTool(Tool):
         except KeyError:
             print(f"Error encountered: {json_content}")
             return []
+        if self.cache:
+            self.cache.set("google_search", cache_params, contexts)
         return contexts
 
+    def _search_with_google(self, query: str):
+        """
+        Search with google and return the contexts.
+        """
+        params, cache_params = self._google_params(query)
+        cached = self.cache.get("google_search", cache_params) if self.cache else None
+        if cached is not None:
+            return cached
+
+        response = self.client.get(url=GOOGLE_SEARCH_ENDPOINT, params=params, timeout=DEFAULT_SEARCH_ENGINE_TIMEOUT)
+        return self._contexts_from_response(response, cache_params)
+
+    async def _async_search_with_google(self, query: str, strict: bool = False, timings: dict[str, float] | None = None) -> list[dict]:
+        """
+        Asynchronous version of _search_with_google, paced by the global QPS limit.
+        With `strict`, HTTP errors raise instead of returning no results; `timings` receives
+        the seconds spent waiting for the QPS limit and on the request itself.
+        """
+        params, cache_params = self._google_params(query)
+        cached = self.cache.get("google_search", cache_params) if self.cache else None
+        if cached is not None:
+            return cached
+
+        start_time = time.monotonic()
+        await _qps_limiter.wait()
+        request_start_time = time.monotonic()
+        response = await get_async_client().get(url=GOOGLE_SEARCH_ENDPOINT, params=params, timeout=self.timeout)
+        if timings is not None:
+            timings["queued_seconds"] = request_start_time - start_time
+            timings["latency_seconds"] = time.monotonic() - request_start_time
+        return self._contexts_from_response(response, cache_params, strict=strict)
+
     def forward(self, query: str) -> ToolOutput:
         """
         Execute a Google search with the given query.
@@ -88,6 +151,72 @@ class GoogleSearchTool(Tool):
         except Exception as e:
             return ToolOutput(name=self.name or "google_search", error=f"{type(e).__name__} - {str(e)}")
 
+    async def async_forward(self, query: str) -> ToolOutput:
+        """
+        Asynchronous version of the forward method, using the event loop's shared AsyncClient.
+
+        Args:
+            query (str): Query to be submitted to Google search engine.
+
+        Returns:
+            ToolOutput: An object containing either the search results or an error message.
+        """
+        try:
+            contexts = await self._async_search_with_google(query)
+            results = {c["link"]: c["snippet"] for c in contexts}
+            return ToolOutput(name=self.name or "google_search", output=results)
+        except Exception as e:
+            return ToolOutput(name=self.name or "google_search", error=f"{type(e).__name__} - {str(e)}")
+
+    async def async_batch_search(self, queries: list[str], max_results: int | None = None) -> ToolOutput:
+        """
+        Run several queries concurrently and merge their results with reciprocal-rank fusion.
+
+        Requests share the event loop's pooled AsyncClient and the global MAX_QUERIES_PER_SECOND
+        limit. Duplicate queries are sent once, and a link returned by several queries appears
+        once, scored sum(1 / (RRF_K + rank)) over the queries that returned it.
+
+        Args:
+            queries (list[str]): Queries to submit, e.g. reformulations of one question.
+            max_results (int, optional): Number of merged results to keep, defaults to all of them.
+
+        Returns:
+            ToolOutput: ``output`` holds ``results`` (merged ranking of {"link", "title", "snippet",
+            "score", "queries"}) and ``per_query`` ({query: {"latency_seconds", "queued_seconds",
+            "result_count", "error"}}),
+            or an error message if every query failed.
+        """
+        unique_queries = list(dict.fromkeys(" ".join(query.split()) for query in queries))
+
+        async def timed_search(query: str) -> tuple[list[dict], dict[str, float]]:
+            timings = {"latency_seconds": 0.0, "queued_seconds": 0.0}  # Stay at 0 for cached queries
+            contexts = await self._async_search_with_google(query, strict=True, timings=timings)
+            return contexts, timings
+
+        outcomes = await asyncio.gather(*(timed_search(query) for query in unique_queries), return_exceptions=True)
+
+        per_query: dict[str, dict[str, Any]] = {}
+        merged: dict[str, dict[str, Any]] = {}
+        for query, outcome in zip(unique_queries, outcomes, strict=True):
+            if isinstance(outcome, BaseException):
+                per_query[query] = {"latency_seconds": None, "queued_seconds": None, "result_count": 0, "error": f"{type(outcome).__name__} - {str(outcome)}"}
+                continue
+            contexts, timings = outcome
+            per_query[query] = {**{name: round(seconds, 3) for name, seconds in timings.items()}, "result_count": len(contexts), "error": None}
+            for rank, context in enumerate(contexts, start=1):
+                key = urldefrag(context["link"])[0].rstrip("/")
+                entry = merged.setdefault(key, {"link": context["link"], "title": context.get("title", ""), "snippet": context.get("snippet", ""), "score": 0.0, "queries": []})
+                entry["score"] += 1.0 / (RRF_K + rank)
+                entry["queries"].append(query)
+
+        if unique_queries and all(stats["error"] for stats in per_query.values()):
+            return ToolOutput(name=self.name or "google_search", error="; ".join(stats["error"] for stats in per_query.values()))
+
+        results = sorted(merged.values(), key=lambda entry: entry["score"], reverse=True)[:max_results]
+        for entry in results:
+            entry["score"] = round(entry["score"], 5)
+        return ToolOutput(name=self.name or "google_search", output={"results": results, "per_query": per_query})
+
     def __del__(self):
         try:
             self.client.close()
@@ -98,3 +227,11 @@ class GoogleSearchTool(Tool):
 if __name__ == "__main__":
     search = GoogleSearchTool()
     print(search(query="Give me current time right now in PST"))
+
+    async def test_batch():
+        reformulations = ["current time in PST", "what time is it in Pacific Time", "PST clock now", "current time Los Angeles"]
+        result = await search.async_batch_search(reformulations, max_results=5)
+        print(result)
+        await close_async_client()
+
+    asyncio.run(test_batch())
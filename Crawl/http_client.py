@@ -0,0 +1,34 @@
+# Shared factory for pooled async HTTP clients used by the crawlers.
+
+# One httpx.AsyncClient per crawl keeps connections alive across requests to the
+# same host. HTTP/2 is enabled when the optional `h2` package is installed
+# (pip install "httpx[http2]"), otherwise the client falls back to HTTP/1.1.
+
+import importlib.util
+
+import httpx
+
+# User-Agent sent by the static fetchers
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36'
+
+DEFAULT_TIMEOUT_SECONDS = 10
+DEFAULT_MAX_CONNECTIONS = 32
+DEFAULT_MAX_KEEPALIVE_CONNECTIONS = 16
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def create_async_http_client(
+    max_connections: int = DEFAULT_MAX_CONNECTIONS,
+    max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE_CONNECTIONS,
+    timeout: float = DEFAULT_TIMEOUT_SECONDS,
+    headers: dict | None = None,
+) -> httpx.AsyncClient:
+    """Creates a keep-alive, connection-pooled AsyncClient (HTTP/2 when available) that follows redirects."""
+    return httpx.AsyncClient(
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive_connections),
+        timeout=timeout,
+        follow_redirects=True,
+        headers={"User-Agent": DEFAULT_USER_AGENT, **(headers or {})},
+    )
@@ -0,0 +1,45 @@
+"""
+Process-wide pooled httpx.AsyncClient for the async web tools.
+
+An httpx.AsyncClient is bound to the event loop it was first used on, so one client
+is kept per running loop. Every tool on that loop shares its connection pool
+(keep-alive, connection limits, HTTP/2 when the optional `h2` package is installed)
+instead of opening a client, and a TLS handshake, per tool instance or per call.
+"""
+
+import asyncio
+import importlib.util
+import weakref
+
+import httpx
+
+MAX_CONNECTIONS = 100
+MAX_KEEPALIVE_CONNECTIONS = 20
+KEEPALIVE_EXPIRY_SECONDS = 30.0
+DEFAULT_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+# httpx raises on http2=True without the h2 package, so only ask for it when it is available
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Returns the shared AsyncClient of the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS, keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS),
+            timeout=DEFAULT_TIMEOUT,
+        )
+        _clients[loop] = client
+    return client
+
+
+async def close_async_client():
+    """Closes the running event loop's shared client (call before the loop shuts down)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,179 @@
+# Static-first hybrid fetcher with a headless-browser fallback.
+
+# Many crawled pages are server-rendered and do not need Chromium at all.
+# HybridFetcher tries a pooled async HTTP client first (like simple_crawler in
+# get_all_pages_beautiful_soup.py) and only escalates to Playwright when the HTML
+# looks like a "JS shell": almost no body text, an empty SPA mount point such as
+# <div id="root"></div>, or a <noscript> asking for JavaScript.
+
+#     Every result is tagged with the tier that served it ("static" or "browser").
+#     The decision is cached per host: once a host needs the browser, later pages
+#     from it skip the HTTP probe; once it serves real HTML, later pages go straight
+#     to the HTTP client (and are still escalated individually if they turn out to be shells).
+
+#     Only a 200 HTML response that looks like a shell decides that a host needs the
+#     browser. Throttling and server errors (429, 5xx) are returned as they are and
+#     request errors are raised, so the rate limiter and the retry policy see them;
+#     other unusable answers (e.g. 403, non-HTML) escalate just that page.
+
+#     Conditional requests (incremental recrawls): when validator headers are passed,
+#     the HTTP request is always made first, even for browser hosts, so a 304 can
+#     short-circuit the page without starting a render.
+
+import re
+from urllib.parse import urlparse
+
+from bs4 import BeautifulSoup
+
+from fetch_profiles import ResourceBlocker
+from fetch_resilience import RETRYABLE_STATUS_CODES
+from http_client import create_async_http_client
+from link_extractor import extract_links, extract_links_from_html
+from page_pool import PagePool
+from page_readiness import ReadinessEngine
+
+# --- Configuration ---
+# Pages with less visible body text than this are treated as JS shells
+MIN_STATIC_TEXT_CHARS = 200
+
+# Ids of common client-side app mount points (React, Vue, Next.js, Nuxt, Angular, ...)
+SPA_ROOT_IDS = ("root", "app", "__next", "__nuxt", "svelte", "ember-app", "app-root")
+
+# Statuses that mean the page is gone (no browser fallback)
+GONE_STATUS_CODES = (404, 410)
+
+NOSCRIPT_JS_REQUIRED_PATTERN = re.compile(r"enable javascript|javascript (is )?(required|disabled)|requires javascript", re.IGNORECASE)
+
+
+def looks_like_js_shell(html_content: str) -> bool:
+    """Heuristically decides whether HTML needs JavaScript to render its content."""
+    if not html_content or not html_content.strip():
+        return True
+    soup = BeautifulSoup(html_content, 'html.parser')
+    body = soup.body
+    if body is None:
+        return True
+
+    for noscript in body.find_all('noscript'):
+        if NOSCRIPT_JS_REQUIRED_PATTERN.search(noscript.get_text(" ")):
+            return True
+    for root_id in SPA_ROOT_IDS:
+        mount_point = body.find(id=root_id)
+        if mount_point is not None and not mount_point.get_text(strip=True):
+            return True
+
+    for tag in body.find_all(['script', 'style', 'noscript', 'template']):
+        tag.decompose()
+    visible_text = " ".join(body.get_text(" ").split())
+    return len(visible_text) < MIN_STATIC_TEXT_CHARS
+
+
+def _html_title(html_content: str) -> str:
+    soup = BeautifulSoup(html_content, 'html.parser')
+    return soup.title.get_text(strip=True) if soup.title else "No Title"
+
+
+class HybridFetcher:
+    """Fetches pages over plain HTTP when possible and with Playwright when necessary."""
+
+    def __init__(self, page_pool: PagePool, readiness_engine: ReadinessEngine | None = None, resource_blocker: ResourceBlocker | None = None):
+        """
+        Args:
+            page_pool (PagePool): Pool the browser tier takes pages from.
+            readiness_engine (ReadinessEngine, optional): Decides when a browser page is ready.
+            resource_blocker (ResourceBlocker, optional): Its per-page savings are reported on browser results.
+        """
+        self.page_pool = page_pool
+        self.readiness_engine = readiness_engine or ReadinessEngine()
+        self.resource_blocker = resource_blocker
+        self.http_client = create_async_http_client()
+        self.host_tiers: dict[str, str] = {}
+        self.tier_counts = {"static": 0, "browser": 0, "escalated": 0, "not_modified": 0}
+
+    async def _http_get(self, url: str, headers: dict | None = None):
+        """Returns the HTTP response; request errors propagate so the retry policy can classify them."""
+        return await self.http_client.get(url, headers=headers)
+
+    @staticmethod
+    def _status_result(url: str, response) -> dict:
+        """A static-tier result without content, for statuses that are passed on as they are."""
+        return {"url": url, "final_url": str(response.url), "status": response.status_code, "headers": dict(response.headers),
+                "html": None, "title": None, "links": [], "tier": "static"}
+
+    def _static_result(self, url: str, response, html_content: str) -> dict:
+        """Turns a 200 HTML response into a static-tier result."""
+        return {
+            "url": url,
+            "final_url": str(response.url),
+            "status": response.status_code,
+            "headers": dict(response.headers),
+            "html": html_content,
+            "title": _html_title(html_content),
+            "links": extract_links_from_html(html_content, str(response.url)),
+            "tier": "static",
+        }
+
+    async def _fetch_browser(self, url: str) -> dict:
+        async with self.page_pool.page() as page:
+            response = await self.readiness_engine.goto(page, url)
+            html_content = await page.content()
+            result = {
+                "url": url,
+                "final_url": page.url,
+                "status": response.status if response else None,
+                "headers": response.headers if response else {},
+                "html": html_content,
+                "title": await page.title(),
+                "links": await extract_links(page),
+                "tier": "browser",
+            }
+            if self.resource_blocker is not None:
+                result["blocked"] = self.resource_blocker.pop_page_stats(page)
+            return result
+
+    async def fetch(self, url: str, conditional_headers: dict | None = None) -> dict:
+        """
+        Fetches a URL through the cheapest tier that yields real content.
+
+        Args:
+            url (str): The page to fetch.
+            conditional_headers (dict, optional): If-None-Match / If-Modified-Since headers.
+
+        Returns:
+            dict: url, final_url, status, headers, html, title, links (as from link_extractor) and tier.
+                A 304 answer returns {"not_modified": True, "status": 304, ...} without html.
+        """
+        host = urlparse(url).netloc
+        host_tier = self.host_tiers.get(host)
+        if conditional_headers or host_tier != "browser":
+            response = await self._http_get(url, conditional_headers or None)
+            if response.status_code == 304:
+                self.tier_counts["not_modified"] += 1
+                return {**self._status_result(url, response), "not_modified": True}
+            if response.status_code in GONE_STATUS_CODES or response.status_code in RETRYABLE_STATUS_CODES:
+                # A missing page is missing in the browser too, and a throttled or failing server must not be
+                # hit again through Chromium: hand the status to the caller's retry / rate-limit handling
+                return self._status_result(url, response)
+
+            if host_tier != "browser":
+                is_html = response.status_code == 200 and "html" in response.headers.get("content-type", "")
+                html_content = response.text if is_html else ""
+                if is_html and not looks_like_js_shell(html_content):
+                    self.host_tiers.setdefault(host, "static")
+                    self.tier_counts["static"] += 1
+                    return self._static_result(url, response, html_content)
+                if is_html and host_tier is None:
+                    self.host_tiers[host] = "browser" # First page of this host was a shell: skip probing from now on
+                else:
+                    self.tier_counts["escalated"] += 1
+
+        result = await self._fetch_browser(url)
+        self.tier_counts["browser"] += 1
+        return result
+
+    def stats(self) -> dict:
+        """Returns how many pages each tier served and the cached per-host decisions."""
+        return {**self.tier_counts, "host_tiers": dict(self.host_tiers)}
+
+    async def close(self):
+        await self.http_client.aclose()
@@ -0,0 +1,192 @@
+# Near-duplicate page detection for crawls.
+
+# Sites serve the same article under print views, tracking parameters and
+# pagination variants. generate_filename() hashes the URL, not the content, so every
+# copy gets converted, saved and later embedded. NearDuplicateIndex fingerprints the
+# extracted main text of each page before it is stored and flags:
+
+#     exact duplicates - identical normalized main text (SHA-1 of the text)
+#     near duplicates  - 64-bit SimHash within `max_hamming_distance` bits of an earlier page
+
+# Lookups use the pigeonhole trick: with a distance limit of k, two fingerprints that
+# are close must agree exactly on at least one of k + 1 bit bands, so only pages
+# sharing a band are compared.
+
+# Usage:
+#     duplicate_index = NearDuplicateIndex(similarity_threshold=0.95)
+#     duplicate_of = duplicate_index.check_and_add(url, extract_main_text(html), len(html))
+#     if duplicate_of: skip conversion and storage
+
+# A crawler that converts every page anyway runs convert_with_main_text() in its
+# ConversionPool: the page is parsed once, in the worker, for both the markdown and the
+# main text, instead of a second time on the event loop.
+
+import re
+import hashlib
+
+from bs4 import BeautifulSoup
+
+from html_to_markdown import HTML_PARSER, soup_to_markdown
+
+# --- Configuration ---
+# Fraction of the 64 SimHash bits that must agree for two pages to count as near duplicates
+DEFAULT_SIMILARITY_THRESHOLD = 0.95
+
+# Words per shingle fed into SimHash
+SHINGLE_SIZE = 3
+
+# Texts shorter than this (in words) are only checked for exact duplicates; SimHash is unreliable on them
+MIN_WORDS_FOR_NEAR_DUPLICATES = 50
+
+# Texts shorter than this (in words) are not checked at all: empty or near-empty main text
+# (JS shells, image pages, failed extraction) would make unrelated pages "identical"
+MIN_WORDS_FOR_DUPLICATE_CHECK = 5
+
+# Tags that never hold the main content
+BOILERPLATE_TAGS = ['script', 'style', 'noscript', 'template', 'nav', 'header', 'footer', 'aside', 'form']
+
+WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def extract_main_text(html_content: str) -> str:
+    """Returns the normalized (lowercased, whitespace-collapsed) text of the page's main content."""
+    if not html_content:
+        return ""
+    return main_text_of_soup(BeautifulSoup(html_content, 'html.parser'))
+
+
+def main_text_of_soup(soup: BeautifulSoup) -> str:
+    """extract_main_text() for a parsed document. Removes the boilerplate tags from the tree."""
+    root = soup.find('main') or soup.find('article') or soup.find(attrs={"role": "main"}) or soup.body or soup
+    for tag in root.find_all(BOILERPLATE_TAGS):
+        tag.decompose()
+    return " ".join(root.get_text(" ").split()).lower()
+
+
+def convert_with_main_text(html_content: str, base_url: str = "") -> tuple[str, str]:
+    """
+    Returns (LLM markdown, main text) of a page from a single parse. A failed conversion
+    yields the HTML as the markdown, as convert_html_to_markdown_for_llm() does.
+    """
+    if not html_content:
+        return "", ""
+    soup = BeautifulSoup(html_content, HTML_PARSER)
+    try:
+        markdown_content = soup_to_markdown(soup, base_url, preset="llm")
+    except Exception as e:
+        print(f"Error converting HTML to Markdown: {e}")
+        markdown_content = html_content
+    return markdown_content, main_text_of_soup(soup) # Last: it strips the boilerplate the markdown keeps
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def simhash(text: str, shingle_size: int = SHINGLE_SIZE) -> int:
+    """Returns the 64-bit SimHash of a text built from word shingles."""
+    words = WORD_PATTERN.findall(text)
+    if len(words) < shingle_size:
+        shingles = [" ".join(words)] if words else []
+    else:
+        shingles = [" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)]
+
+    bit_weights = [0] * 64
+    for shingle in shingles:
+        shingle_hash = _hash64(shingle)
+        for bit in range(64):
+            bit_weights[bit] += 1 if (shingle_hash >> bit) & 1 else -1
+
+    fingerprint = 0
+    for bit, weight in enumerate(bit_weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class NearDuplicateIndex:
+    """Remembers page fingerprints and reports exact and near duplicates."""
+
+    def __init__(self, similarity_threshold: float = DEFAULT_SIMILARITY_THRESHOLD):
+        """
+        Args:
+            similarity_threshold (float): 0-1; pages whose SimHashes agree on at least this
+                fraction of bits are near duplicates (0.95 allows 3 differing bits).
+        """
+        if not 0 < similarity_threshold <= 1:
+            raise ValueError("similarity_threshold must be in (0, 1]")
+        self.max_hamming_distance = round((1 - similarity_threshold) * 64)
+        self.band_count = self.max_hamming_distance + 1
+        self.band_bits = 64 // self.band_count
+        self._exact: dict[str, str] = {}
+        self._bands: dict[tuple[int, int], list[tuple[int, str]]] = {}
+
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.too_short_to_check = 0
+        self.bytes_skipped = 0
+
+    def _band_keys(self, fingerprint: int) -> list[tuple[int, int]]:
+        mask = (1 << self.band_bits) - 1
+        keys = []
+        for band in range(self.band_count):
+            # The last band absorbs the leftover bits when 64 is not divisible by the band count
+            if band == self.band_count - 1:
+                value = fingerprint >> (band * self.band_bits)
+            else:
+                value = (fingerprint >> (band * self.band_bits)) & mask
+            keys.append((band, value))
+        return keys
+
+    def check_and_add(self, url: str, main_text: str, page_bytes: int = 0) -> str | None:
+        """
+        Checks a page against every page seen so far and indexes it if it is new.
+
+        Args:
+            url (str): The page URL.
+            main_text (str): Output of extract_main_text().
+            page_bytes (int): Size of the page, counted as skipped work when it is a duplicate.
+
+        Returns:
+            str | None: URL of the page this one duplicates, or None if it is new
+                (or its main text is too short to tell).
+        """
+        word_count = len(WORD_PATTERN.findall(main_text))
+        if word_count < MIN_WORDS_FOR_DUPLICATE_CHECK:
+            self.too_short_to_check += 1
+            return None
+
+        text_hash = hashlib.sha1(main_text.encode('utf-8')).hexdigest()
+        if text_hash in self._exact:
+            self.exact_duplicates += 1
+            self.bytes_skipped += page_bytes
+            return self._exact[text_hash]
+
+        if word_count >= MIN_WORDS_FOR_NEAR_DUPLICATES:
+            fingerprint = simhash(main_text)
+            band_keys = self._band_keys(fingerprint)
+            for band_key in band_keys:
+                for other_fingerprint, other_url in self._bands.get(band_key, ()):
+                    if hamming_distance(fingerprint, other_fingerprint) <= self.max_hamming_distance:
+                        self.near_duplicates += 1
+                        self.bytes_skipped += page_bytes
+                        return other_url
+            for band_key in band_keys:
+                self._bands.setdefault(band_key, []).append((fingerprint, url))
+
+        self._exact[text_hash] = url
+        return None
+
+    def stats(self) -> dict:
+        """Returns how many pages were skipped and how much storage that avoided."""
+        return {
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "pages_not_saved": self.exact_duplicates + self.near_duplicates,
+            "too_short_to_check": self.too_short_to_check,
+            "bytes_not_saved": self.bytes_skipped,
+        }
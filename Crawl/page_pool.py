@@ -0,0 +1,153 @@
+# A bounded pool of reusable Playwright pages.
+
+# Opening a fresh page per URL pays page-creation latency and renderer churn on
+# every navigation. The pool hands out idle pages instead, and only creates a
+# new one when none is free and the pool is below its size limit.
+
+#     A page is recycled (closed and replaced) after MAX_USES_PER_PAGE navigations
+#     or as soon as it crashes or is reported broken by the caller.
+
+#     Hits (an idle page was reused) and misses (a new page had to be created)
+#     are counted so the reuse rate can be checked at the end of a crawl.
+
+# Usage:
+#     page_pool = PagePool(browser_context, max_size=4)
+#     async with page_pool.page() as page:
+#         await page.goto(url)
+#     print(page_pool.stats())
+#     await page_pool.close()
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable
+
+from playwright.async_api import BrowserContext, Page
+
+# --- Configuration ---
+# Maximum number of pages open at once in a pool
+DEFAULT_POOL_SIZE = 4
+
+# Number of navigations after which a page is closed and replaced
+MAX_USES_PER_PAGE = 50
+
+
+class PagePool:
+    """A bounded pool of Playwright pages that are reused across navigations."""
+
+    def __init__(
+        self,
+        browser_context: BrowserContext,
+        max_size: int = DEFAULT_POOL_SIZE,
+        max_uses: int = MAX_USES_PER_PAGE,
+        on_new_page: Callable[[Page], Awaitable[None]] | None = None,
+    ):
+        """
+        Args:
+            browser_context (BrowserContext): The context new pages are opened in.
+            max_size (int): Maximum number of pages open at the same time.
+            max_uses (int): Navigations after which a page is recycled.
+            on_new_page (callable, optional): Coroutine run on every newly created page (e.g. to install routes).
+        """
+        self.browser_context = browser_context
+        self.max_size = max_size
+        self.max_uses = max_uses
+        self.on_new_page = on_new_page
+
+        self._idle_pages: list[Page] = []
+        self._use_counts: dict[Page, int] = {}
+        self._crashed_pages: set[Page] = set()
+        self._slots = asyncio.Semaphore(max_size)
+        self._closed = False
+
+        self.hits = 0
+        self.misses = 0
+        self.recycled = 0
+
+    async def _new_page(self) -> Page:
+        page = await self.browser_context.new_page()
+        page.on("crash", lambda crashed_page: self._crashed_pages.add(crashed_page))
+        self._use_counts[page] = 0
+        if self.on_new_page is not None:
+            await self.on_new_page(page)
+        return page
+
+    async def _discard(self, page: Page):
+        self._use_counts.pop(page, None)
+        self._crashed_pages.discard(page)
+        self.recycled += 1
+        try:
+            if not page.is_closed():
+                await page.close()
+        except Exception as e:
+            print(f"  Page pool: error closing recycled page: {e}")
+
+    async def acquire(self) -> Page:
+        """Waits for a free slot and returns an idle page, creating one if none is available."""
+        if self._closed:
+            raise RuntimeError("Page pool is closed")
+        await self._slots.acquire()
+        try:
+            while self._idle_pages:
+                page = self._idle_pages.pop()
+                if page.is_closed() or page in self._crashed_pages:
+                    await self._discard(page)
+                    continue
+                self.hits += 1
+                self._use_counts[page] += 1
+                return page
+
+            self.misses += 1
+            page = await self._new_page()
+            self._use_counts[page] += 1
+            return page
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, page: Page, broken: bool = False):
+        """
+        Returns a page to the pool.
+
+        Args:
+            page (Page): A page obtained from acquire().
+            broken (bool): Set when the page misbehaved, so it is recycled instead of reused.
+        """
+        try:
+            worn_out = self._use_counts.get(page, self.max_uses) >= self.max_uses
+            if self._closed or broken or worn_out or page.is_closed() or page in self._crashed_pages:
+                await self._discard(page)
+            else:
+                self._idle_pages.append(page)
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def page(self):
+        """Context manager yielding a pooled page; the page is recycled if the block raises."""
+        page = await self.acquire()
+        broken = False
+        try:
+            yield page
+        except BaseException:
+            broken = True
+            raise
+        finally:
+            await self.release(page, broken=broken)
+
+    def stats(self) -> dict:
+        """Returns hit/miss counters for the pool."""
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "recycled": self.recycled,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    async def close(self):
+        """Closes every idle page. Pages still checked out are closed when released."""
+        self._closed = True
+        while self._idle_pages:
+            page = self._idle_pages.pop()
+            self.recycled -= 1 # Closing at shutdown is not a recycle
+            await self._discard(page)
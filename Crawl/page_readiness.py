@@ -0,0 +1,165 @@
+# Adaptive page-readiness strategy for Playwright navigations.
+
+# `page.goto(url, wait_until="networkidle")` waits for network silence, which on
+# sites with analytics beacons or long-polling means waiting for the full timeout.
+# ReadinessEngine.goto() instead:
+
+#     1. Navigates with wait_until="domcontentloaded".
+#     2. Polls the main-content node count (main / article / [role=main] / body)
+#        until it stops changing, capped at a short STABILITY_CAP_MS.
+#     3. Learns per domain which strategy is sufficient:
+#          "domcontentloaded" - the DOM is already complete at DOMContentLoaded
+#          "dom_stable"       - the DOM settles shortly after (the default)
+#          "networkidle"      - the DOM stays empty or keeps changing; fall back to network silence
+#        Domains that were downgraded are re-probed every REPROBE_EVERY pages.
+
+# Every navigation's wait time is recorded so wait_stats() can report p50/p95.
+# Pass fixed_strategy="networkidle" to measure the old behaviour as a baseline.
+
+import time
+import asyncio
+from urllib.parse import urlparse
+
+from playwright.async_api import Page, Response
+
+# --- Configuration ---
+NAVIGATION_TIMEOUT_MS = 60000
+
+# DOM stability polling
+POLL_INTERVAL_MS = 250
+STABLE_POLLS_REQUIRED = 2 # Consecutive unchanged polls before the DOM counts as stable
+STABILITY_CAP_MS = 3000 # Give up polling after this long
+MIN_CONTENT_NODES = 10 # Fewer nodes than this means the page has not rendered yet
+
+# Upper bound for the networkidle fallback (beacons/long-polling would otherwise hit the full timeout)
+NETWORKIDLE_TIMEOUT_MS = 15000
+
+# Consecutive observations needed before a domain changes strategy
+LEARN_AFTER_PAGES = 3
+
+# Downgraded domains run a full DOM-stability probe every this many pages
+REPROBE_EVERY = 20
+
+STRATEGIES = ("domcontentloaded", "dom_stable", "networkidle")
+
+MAIN_CONTENT_NODE_COUNT_JS = """
+() => {
+    const root = document.querySelector('main, article, [role="main"]') || document.body;
+    return root ? root.getElementsByTagName('*').length : 0;
+}
+"""
+
+
+def _percentile(sorted_values: list[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class ReadinessEngine:
+    """Decides when a navigated page is ready to be read, learning per domain."""
+
+    def __init__(self, fixed_strategy: str | None = None, navigation_timeout_ms: int = NAVIGATION_TIMEOUT_MS):
+        """
+        Args:
+            fixed_strategy (str, optional): Always use this strategy instead of learning one.
+            navigation_timeout_ms (int): Timeout for the initial navigation.
+        """
+        if fixed_strategy is not None and fixed_strategy not in STRATEGIES:
+            raise ValueError(f"Unknown readiness strategy '{fixed_strategy}'. Choose one of: {', '.join(STRATEGIES)}")
+        self.fixed_strategy = fixed_strategy
+        self.navigation_timeout_ms = navigation_timeout_ms
+        self._domains: dict[str, dict] = {}
+        self.wait_records: list[dict] = []
+
+    def _domain_state(self, host: str) -> dict:
+        return self._domains.setdefault(host, {"strategy": "dom_stable", "quick_streak": 0, "slow_streak": 0, "pages": 0})
+
+    def strategy_for(self, url: str) -> str:
+        """Returns the strategy currently used for the URL's domain."""
+        if self.fixed_strategy is not None:
+            return self.fixed_strategy
+        return self._domain_state(urlparse(url).netloc)["strategy"]
+
+    async def _wait_for_dom_stability(self, page: Page) -> dict:
+        """Polls the main-content node count until it stops changing or the cap is reached."""
+        deadline = time.monotonic() + STABILITY_CAP_MS / 1000
+        previous_count = await page.evaluate(MAIN_CONTENT_NODE_COUNT_JS)
+        stable_polls = 0
+        changed = False
+        while time.monotonic() < deadline:
+            await asyncio.sleep(POLL_INTERVAL_MS / 1000)
+            current_count = await page.evaluate(MAIN_CONTENT_NODE_COUNT_JS)
+            if current_count == previous_count and current_count >= MIN_CONTENT_NODES:
+                stable_polls += 1
+                if stable_polls >= STABLE_POLLS_REQUIRED:
+                    return {"stable": True, "changed": changed, "node_count": current_count}
+            else:
+                changed = changed or current_count != previous_count
+                stable_polls = 0
+            previous_count = current_count
+        return {"stable": False, "changed": changed, "node_count": previous_count}
+
+    async def _wait_for_network_idle(self, page: Page):
+        try:
+            await page.wait_for_load_state("networkidle", timeout=NETWORKIDLE_TIMEOUT_MS)
+        except Exception:
+            pass # Never-idle pages are read as they are once the cap is reached
+
+    def _learn(self, host: str, strategy: str, observation: dict):
+        """Updates the domain's strategy from one DOM-stability observation."""
+        state = self._domain_state(host)
+        quick = observation["stable"] and not observation["changed"]
+        slow = not observation["stable"]
+        state["quick_streak"] = state["quick_streak"] + 1 if quick else 0
+        state["slow_streak"] = state["slow_streak"] + 1 if slow else 0
+
+        if strategy == "domcontentloaded" and not quick:
+            state["strategy"] = "dom_stable" # Content arrived after DOMContentLoaded after all
+        elif strategy == "dom_stable" and state["quick_streak"] >= LEARN_AFTER_PAGES:
+            state["strategy"] = "domcontentloaded"
+        elif strategy == "dom_stable" and state["slow_streak"] >= LEARN_AFTER_PAGES:
+            state["strategy"] = "networkidle"
+        elif strategy == "networkidle" and state["quick_streak"] >= LEARN_AFTER_PAGES:
+            state["strategy"] = "dom_stable"
+        if state["strategy"] != strategy:
+            state["quick_streak"] = state["slow_streak"] = 0
+            print(f"    Readiness: {host} now uses '{state['strategy']}' (was '{strategy}')")
+
+    async def goto(self, page: Page, url: str) -> Response | None:
+        """Navigates to a URL and returns once the page is ready, recording the wait time."""
+        host = urlparse(url).netloc
+        strategy = self.strategy_for(url)
+        state = self._domain_state(host)
+        state["pages"] += 1
+
+        start_time = time.monotonic()
+        response = await page.goto(url, wait_until="domcontentloaded", timeout=self.navigation_timeout_ms)
+
+        observation = None
+        if strategy == "networkidle":
+            await self._wait_for_network_idle(page)
+            if self.fixed_strategy is None and state["pages"] % REPROBE_EVERY == 0:
+                observation = await self._wait_for_dom_stability(page)
+        elif strategy == "dom_stable" or (self.fixed_strategy is None and state["pages"] % REPROBE_EVERY == 0):
+            observation = await self._wait_for_dom_stability(page)
+
+        wait_ms = (time.monotonic() - start_time) * 1000
+        self.wait_records.append({"url": url, "strategy": strategy, "wait_ms": wait_ms})
+        if observation is not None and self.fixed_strategy is None:
+            self._learn(host, strategy, observation)
+        return response
+
+    def wait_stats(self) -> dict:
+        """Returns count and p50/p95 wait times overall and per strategy."""
+        def summarize(records: list[dict]) -> dict:
+            waits = sorted(record["wait_ms"] for record in records)
+            return {"count": len(waits), "p50_ms": round(_percentile(waits, 0.5), 1), "p95_ms": round(_percentile(waits, 0.95), 1)}
+
+        by_strategy = {}
+        for strategy in STRATEGIES:
+            records = [record for record in self.wait_records if record["strategy"] == strategy]
+            if records:
+                by_strategy[strategy] = summarize(records)
+        return {**summarize(self.wait_records), "by_strategy": by_strategy}
@@ -0,0 +1,246 @@
+# Per-host adaptive rate limiting (token bucket + AIMD).
+
+# A fixed sleep between requests is too slow for fast hosts and still too fast for
+# hosts that are struggling. AdaptiveRateLimiter keeps one token bucket per host and
+# tunes its rate from the responses, like TCP congestion control:
+
+#     additive increase       - every healthy response (non-error status, latency under
+#                               the threshold) raises the host's rate by `additive_increase` req/s
+#     multiplicative decrease - 429, 5xx, timeouts and connection errors multiply the rate
+#                               by `multiplicative_decrease`
+#     Retry-After             - blocks the host until the given time (seconds or HTTP date)
+#     robots.txt Crawl-delay  - caps the host's rate at 1 / Crawl-delay
+
+# Usage (async crawlers):
+#     await rate_limiter.acquire(url)
+#     ... fetch ...
+#     rate_limiter.record(url, status_code, latency_seconds, response_headers)
+
+# Blocking crawlers call rate_limiter.acquire_blocking(url) instead of acquire().
+
+import time
+import asyncio
+import threading
+import urllib.request
+import urllib.robotparser
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+from http_client import DEFAULT_USER_AGENT
+
+# --- Configuration ---
+DEFAULT_INITIAL_RATE = 1.0 # Requests per second for a host we know nothing about
+DEFAULT_MIN_RATE = 0.1
+DEFAULT_MAX_RATE = 20.0
+DEFAULT_ADDITIVE_INCREASE = 0.25 # req/s added per healthy response
+DEFAULT_MULTIPLICATIVE_DECREASE = 0.5 # Rate factor applied on throttling or server errors
+DEFAULT_BURST = 2 # Tokens a host can accumulate while idle
+
+# Responses slower than this (smoothed) stop the rate from increasing
+DEFAULT_LATENCY_THRESHOLD_SECONDS = 2.0
+LATENCY_SMOOTHING = 0.3 # Weight of the newest sample in the latency moving average
+
+# Statuses that mean "slow down"
+THROTTLE_STATUS_CODES = (429, 503)
+
+ROBOTS_TIMEOUT_SECONDS = 10
+MAX_RETRY_AFTER_SECONDS = 600 # Ignore absurd Retry-After values
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Returns the number of seconds a Retry-After header asks for, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = float(value)
+    else:
+        try:
+            seconds = parsedate_to_datetime(value).timestamp() - time.time()
+        except (TypeError, ValueError):
+            return None
+    return min(max(0.0, seconds), MAX_RETRY_AFTER_SECONDS)
+
+
+def _get_header(headers, name: str) -> str | None:
+    """Case-insensitive lookup that also works on plain dicts."""
+    value = headers.get(name)
+    if value is None:
+        value = next((value for key, value in headers.items() if key.lower() == name), None)
+    return value
+
+
+class _HostState:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.tokens = burst
+        self.last_refill = time.monotonic()
+        self.blocked_until = 0.0
+        self.max_rate: float | None = None # From robots.txt Crawl-delay
+        self.latency_average: float | None = None
+        self.robots_checked = False
+        self.increases = 0
+        self.decreases = 0
+
+
+class AdaptiveRateLimiter:
+    """Per-host token buckets whose rates follow AIMD on response status and latency."""
+
+    def __init__(
+        self,
+        initial_rate: float = DEFAULT_INITIAL_RATE,
+        min_rate: float = DEFAULT_MIN_RATE,
+        max_rate: float = DEFAULT_MAX_RATE,
+        additive_increase: float = DEFAULT_ADDITIVE_INCREASE,
+        multiplicative_decrease: float = DEFAULT_MULTIPLICATIVE_DECREASE,
+        burst: float = DEFAULT_BURST,
+        latency_threshold_seconds: float = DEFAULT_LATENCY_THRESHOLD_SECONDS,
+        respect_robots: bool = True,
+        user_agent: str = DEFAULT_USER_AGENT,
+    ):
+        """
+        Args:
+            initial_rate (float): Starting requests/second per host.
+            min_rate, max_rate (float): Bounds for the adapted rate.
+            additive_increase (float): req/s added after each healthy response.
+            multiplicative_decrease (float): Factor (0-1) applied to the rate on 429/5xx/errors.
+            burst (float): Bucket capacity (requests allowed back to back after idling).
+            latency_threshold_seconds (float): Smoothed latency above which the rate stops growing.
+            respect_robots (bool): Read each host's robots.txt once and honour its Crawl-delay.
+            user_agent (str): User agent matched against robots.txt groups.
+        """
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.additive_increase = additive_increase
+        self.multiplicative_decrease = multiplicative_decrease
+        self.burst = burst
+        self.latency_threshold_seconds = latency_threshold_seconds
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.hosts: dict[str, _HostState] = {}
+        self.total_wait_seconds = 0.0
+        self.retry_after_events = 0
+        self._lock = threading.Lock() # acquire_blocking may be called from several threads
+
+    # --- robots.txt ---
+
+    def _read_crawl_delay(self, url: str) -> float | None:
+        parsed_url = urlparse(url)
+        robots_url = f"{parsed_url.scheme}://{parsed_url.netloc}/robots.txt"
+        parser = urllib.robotparser.RobotFileParser(robots_url)
+        try:
+            request = urllib.request.Request(robots_url, headers={"User-Agent": self.user_agent})
+            with urllib.request.urlopen(request, timeout=ROBOTS_TIMEOUT_SECONDS) as response:
+                parser.parse(response.read().decode('utf-8', errors='replace').splitlines())
+        except Exception:
+            return None # No robots.txt (or unreachable): no Crawl-delay
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is None:
+            request_rate = parser.request_rate(self.user_agent)
+            if request_rate is not None and request_rate.requests:
+                delay = request_rate.seconds / request_rate.requests
+        return float(delay) if delay else None
+
+    def set_crawl_delay(self, host: str, delay_seconds: float | None):
+        """Caps a host's rate at one request per `delay_seconds` (None removes the cap)."""
+        state = self._state(host)
+        state.robots_checked = True
+        if delay_seconds:
+            state.max_rate = 1.0 / delay_seconds
+            state.rate = min(state.rate, state.max_rate)
+            print(f"  robots.txt Crawl-delay for {host}: {delay_seconds:g}s")
+
+    # --- Token bucket ---
+
+    def _state(self, host: str) -> _HostState:
+        state = self.hosts.get(host)
+        if state is None:
+            state = self.hosts[host] = _HostState(self.initial_rate, self.burst)
+        return state
+
+    def _reserve(self, host: str) -> float:
+        """Takes a token for the host and returns how long the caller must wait before sending."""
+        with self._lock:
+            state = self._state(host)
+            now = time.monotonic()
+            state.tokens = min(self.burst, state.tokens + (now - state.last_refill) * state.rate)
+            state.last_refill = now
+            state.tokens -= 1 # May go negative: later callers queue up behind earlier reservations
+            delay = -state.tokens / state.rate if state.tokens < 0 else 0.0
+            delay = max(delay, state.blocked_until - now)
+            self.total_wait_seconds += delay
+            return delay
+
+    async def acquire(self, url: str):
+        """Waits until the URL's host may be sent another request."""
+        host = urlparse(url).netloc
+        state = self._state(host)
+        if self.respect_robots and not state.robots_checked:
+            state.robots_checked = True
+            self.set_crawl_delay(host, await asyncio.to_thread(self._read_crawl_delay, url))
+        delay = self._reserve(host)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_blocking(self, url: str):
+        """Blocking version of acquire() for synchronous crawlers."""
+        host = urlparse(url).netloc
+        state = self._state(host)
+        if self.respect_robots and not state.robots_checked:
+            state.robots_checked = True
+            self.set_crawl_delay(host, self._read_crawl_delay(url))
+        delay = self._reserve(host)
+        if delay > 0:
+            time.sleep(delay)
+
+    # --- Feedback ---
+
+    def record(self, url: str, status_code: int | None, latency_seconds: float | None = None, headers=None):
+        """
+        Adapts the host's rate to a response.
+
+        Args:
+            url (str): The requested URL.
+            status_code (int | None): HTTP status, or None if the request failed (timeout, connection error).
+            latency_seconds (float, optional): Time the request took.
+            headers (Mapping, optional): Response headers (Retry-After is honoured).
+        """
+        with self._lock:
+            state = self._state(urlparse(url).netloc)
+            if latency_seconds is not None:
+                if state.latency_average is None:
+                    state.latency_average = latency_seconds
+                else:
+                    state.latency_average += LATENCY_SMOOTHING * (latency_seconds - state.latency_average)
+
+            retry_after = parse_retry_after(_get_header(headers, "retry-after")) if headers else None
+            if retry_after is not None and (status_code in THROTTLE_STATUS_CODES or (status_code or 0) >= 500):
+                state.blocked_until = max(state.blocked_until, time.monotonic() + retry_after)
+                self.retry_after_events += 1
+
+            if status_code is None or status_code in THROTTLE_STATUS_CODES or status_code >= 500:
+                state.rate = max(self.min_rate, state.rate * self.multiplicative_decrease)
+                state.tokens = min(state.tokens, 0.0) # Drop any accumulated burst
+                state.decreases += 1
+            elif state.latency_average is None or state.latency_average <= self.latency_threshold_seconds:
+                ceiling = min(self.max_rate, state.max_rate) if state.max_rate else self.max_rate
+                state.rate = min(ceiling, state.rate + self.additive_increase)
+                state.increases += 1
+
+    def stats(self) -> dict:
+        """Returns the current rate and adjustment counts per host, plus total time spent waiting."""
+        return {
+            "total_wait_seconds": round(self.total_wait_seconds, 2),
+            "retry_after_events": self.retry_after_events,
+            "hosts": {
+                host: {
+                    "rate_per_second": round(state.rate, 2),
+                    "crawl_delay_cap": round(1.0 / state.max_rate, 2) if state.max_rate else None,
+                    "latency_average_seconds": round(state.latency_average, 3) if state.latency_average is not None else None,
+                    "increases": state.increases,
+                    "decreases": state.decreases,
+                }
+                for host, state in self.hosts.items()
+            },
+        }
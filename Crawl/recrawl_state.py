@@ -0,0 +1,201 @@
+# Per-URL validators for incremental recrawls.
+
+# Re-running a crawler normally refetches, reconverts and rewrites every page even
+# when nothing changed. ValidatorStore remembers, per URL, the ETag and
+# Last-Modified headers, a hash of the body and the page's outgoing links, so the
+# next run can:
+
+#     send conditional requests (If-None-Match / If-Modified-Since),
+#     treat 304 responses and unchanged body hashes as no-ops (no conversion, no rewrite),
+#     keep crawling through unchanged pages using their stored links,
+#     and report which pages changed, stayed the same or were removed, so downstream
+#     re-embedding only has to touch the deltas.
+
+# The store is an SQLite file that lives next to the crawl output and survives across runs.
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+
+from crawl_frontier import url_fingerprint
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS page_validators (
+    fingerprint INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    content_hash TEXT,
+    links_json TEXT NOT NULL DEFAULT '[]',
+    first_seen_run INTEGER NOT NULL,
+    last_seen_run INTEGER NOT NULL,
+    outcome TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_page_validators_run ON page_validators (last_seen_run, outcome);
+CREATE TABLE IF NOT EXISTS recrawl_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+# Outcomes recorded for a URL in the current run
+NEW, CHANGED, UNCHANGED, REMOVED = "new", "changed", "unchanged", "removed"
+
+
+def content_hash(body: str | bytes) -> str:
+    """Returns a stable hash of a response body."""
+    if isinstance(body, str):
+        body = body.encode('utf-8')
+    return hashlib.sha256(body).hexdigest()
+
+
+class ValidatorStore:
+    """Stores HTTP validators and content hashes per URL across crawl runs."""
+
+    def __init__(self, db_path: str):
+        """
+        Args:
+            db_path (str): SQLite file holding the validators (created if missing).
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+        self.connection.commit()
+        self.run_id = self._get_run_id()
+
+    def _get_run_id(self) -> int:
+        row = self.connection.execute("SELECT value FROM recrawl_meta WHERE key = 'run_id'").fetchone()
+        return int(row[0]) if row else 0
+
+    def begin_run(self, resume: bool = False) -> int:
+        """Starts a new run (or keeps the current one when resuming) and returns its id."""
+        if not resume or self.run_id == 0:
+            self.run_id += 1
+            self.connection.execute("INSERT OR REPLACE INTO recrawl_meta (key, value) VALUES ('run_id', ?)", (str(self.run_id),))
+            self.connection.commit()
+        return self.run_id
+
+    def _row(self, url: str):
+        return self.connection.execute(
+            "SELECT etag, last_modified, content_hash, links_json, first_seen_run FROM page_validators WHERE fingerprint = ?",
+            (url_fingerprint(url),),
+        ).fetchone()
+
+    def conditional_headers(self, url: str) -> dict:
+        """Returns If-None-Match / If-Modified-Since headers for a known URL ({} if unknown)."""
+        row = self._row(url)
+        headers = {}
+        if row is not None:
+            etag, last_modified = row[0], row[1]
+            if etag:
+                headers["If-None-Match"] = etag
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
+        return headers
+
+    def stored_links(self, url: str) -> list[str]:
+        """Returns the outgoing links recorded the last time the page changed."""
+        row = self._row(url)
+        return json.loads(row[3]) if row is not None else []
+
+    def is_unchanged(self, url: str, body_hash: str) -> bool:
+        """True if the page was seen before with exactly this body hash."""
+        row = self._row(url)
+        return row is not None and row[2] == body_hash
+
+    def _upsert(self, url: str, outcome: str, **fields):
+        row = self._row(url)
+        now = time.time()
+        if row is None:
+            self.connection.execute(
+                "INSERT INTO page_validators (fingerprint, url, etag, last_modified, content_hash, links_json, first_seen_run, last_seen_run, outcome, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url_fingerprint(url), url, fields.get("etag"), fields.get("last_modified"), fields.get("content_hash"),
+                 json.dumps(fields.get("links", [])), self.run_id, self.run_id, outcome, now),
+            )
+        else:
+            assignments = ["last_seen_run = ?", "outcome = ?", "updated_at = ?"]
+            values = [self.run_id, outcome, now]
+            for column in ("etag", "last_modified", "content_hash"):
+                if column in fields:
+                    assignments.append(f"{column} = ?")
+                    values.append(fields[column])
+            if "links" in fields:
+                assignments.append("links_json = ?")
+                values.append(json.dumps(fields["links"]))
+            self.connection.execute(
+                f"UPDATE page_validators SET {', '.join(assignments)} WHERE fingerprint = ?", (*values, url_fingerprint(url))
+            )
+        self.connection.commit()
+
+    def record_fetch(self, url: str, headers: dict, body_hash: str, links: list[str]) -> str:
+        """Records a fetched (200) page and returns NEW or CHANGED."""
+        outcome = NEW if self._row(url) is None else CHANGED
+        self._upsert(
+            url, outcome,
+            etag=headers.get("etag"), last_modified=headers.get("last-modified"),
+            content_hash=body_hash, links=links,
+        )
+        return outcome
+
+    def mark_unchanged(self, url: str):
+        """Records a 304 or an identical body: the page is kept as it is."""
+        self._upsert(url, UNCHANGED)
+
+    def mark_removed(self, url: str):
+        """Records a page that is gone (404/410)."""
+        self._upsert(url, REMOVED)
+
+    def report(self, crawl_complete: bool) -> dict:
+        """
+        Summarizes the current run.
+
+        A URL is removed if it answered 404/410 this run or, once the crawl is complete, if
+        no page reached this run links to it any more. Known URLs that are still linked but were
+        not recorded this run (failed, deferred by the circuit breaker or rate limiter, skipped as
+        near-duplicates) keep their previous state and are listed under "not_reached".
+
+        Args:
+            crawl_complete (bool): True if the crawl exhausted its frontier. Only then are
+                known URLs that are no longer linked counted as removed.
+
+        Returns:
+            dict: "changed" (new or modified URLs), "unchanged", "removed" and "not_reached" URL lists.
+        """
+        def urls_where(condition: str, *params) -> list[str]:
+            rows = self.connection.execute(f"SELECT url FROM page_validators WHERE {condition} ORDER BY url", params).fetchall()
+            return [row[0] for row in rows]
+
+        removed = urls_where("last_seen_run = ? AND outcome = ?", self.run_id, REMOVED)
+        not_reached = []
+        if crawl_complete:
+            linked = set()
+            rows = self.connection.execute("SELECT links_json FROM page_validators WHERE last_seen_run = ? AND outcome != ?", (self.run_id, REMOVED))
+            for (links_json,) in rows:
+                linked.update(url_fingerprint(link) for link in json.loads(links_json))
+            for url in urls_where("last_seen_run < ? AND outcome != ?", self.run_id, REMOVED):
+                (not_reached if url_fingerprint(url) in linked else removed).append(url)
+        return {
+            "run_id": self.run_id,
+            "changed": urls_where("last_seen_run = ? AND outcome IN (?, ?)", self.run_id, NEW, CHANGED),
+            "unchanged": urls_where("last_seen_run = ? AND outcome = ?", self.run_id, UNCHANGED),
+            "removed": removed,
+            "not_reached": not_reached,
+        }
+
+    def write_report(self, report_path: str, crawl_complete: bool) -> dict:
+        """Writes report() as JSON and returns it."""
+        report = self.report(crawl_complete)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        return report
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
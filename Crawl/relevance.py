@@ -0,0 +1,141 @@
+# Query-focused (best-first) crawling with cheap lexical scoring.
+
+# With a page budget, a FIFO frontier spends most fetches on navigation, legal, tag
+# and archive pages. RelevanceScorer scores every candidate link against the research
+# query before it is fetched, and the frontier pops the highest-scoring URL first:
+
+#     link score = ANCHOR_WEIGHT * query coverage of the anchor text
+#                + URL_WEIGHT    * query coverage of the URL's path/query tokens
+#                + PARENT_WEIGHT * relevance of the page the link was found on
+#                - BOILERPLATE_PENALTY if the URL looks like login/legal/tag/feed/etc.
+
+#     page relevance = query coverage of the fetched page's text, lightly boosted by
+#     how often the query terms occur (used for the parent term and for reporting).
+
+# "Query coverage" is the fraction of the query's terms present in a text, after
+# lowercasing, dropping stopwords and stripping a trailing plural "s".
+
+# PriorityFrontier is the in-memory heap used by step3 of the Tavily + Playwright
+# scripts; crawl_website stores the same scores in CrawlFrontier's priority column.
+# relevance_per_fetch() reports how much useful content the budget bought.
+
+import re
+import math
+import heapq
+import itertools
+from urllib.parse import urlparse, unquote
+
+# --- Configuration ---
+ANCHOR_WEIGHT = 0.45
+URL_WEIGHT = 0.25
+PARENT_WEIGHT = 0.30
+BOILERPLATE_PENALTY = 0.5
+
+# URL path segments / query keys that almost never hold the content we want
+# (matched after the same normalisation as URL tokens, see _BOILERPLATE_TOKENS)
+BOILERPLATE_URL_TOKENS = {
+    "login", "signin", "signup", "register", "logout", "account", "cart", "checkout",
+    "privacy", "terms", "legal", "cookie", "cookies", "imprint", "disclaimer",
+    "tag", "tags", "category", "categories", "archive", "archives", "author",
+    "feed", "rss", "search", "share", "print", "sitemap", "careers", "jobs", "contact",
+}
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "is", "it",
+    "of", "on", "or", "that", "the", "this", "to", "was", "what", "when", "where", "which",
+    "who", "why", "with", "www", "http", "https", "html", "htm", "php", "com", "org", "net",
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased word tokens without stopwords, with a trailing plural "s" stripped."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token in STOPWORDS or len(token) < 2:
+            continue
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            token = token[:-1]
+        tokens.append(token)
+    return tokens
+
+
+# Normalised like every other token ("terms" -> "term", "careers" -> "career") so they can match url_tokens()
+_BOILERPLATE_TOKENS = frozenset(tokenize(" ".join(BOILERPLATE_URL_TOKENS)))
+
+
+def url_tokens(url: str) -> list[str]:
+    """Tokens of a URL's path and query string (the host is the same for every candidate)."""
+    parsed_url = urlparse(url)
+    return tokenize(unquote(f"{parsed_url.path} {parsed_url.query}"))
+
+
+class RelevanceScorer:
+    """Scores links and pages against a query by lexical term overlap."""
+
+    def __init__(self, query: str):
+        self.query = query
+        self.query_terms = set(tokenize(query))
+        self.pages_scored = 0
+        self.relevance_total = 0.0
+
+    def coverage(self, tokens) -> float:
+        """Fraction of query terms that occur in `tokens`."""
+        if not self.query_terms:
+            return 0.0
+        return len(self.query_terms.intersection(tokens)) / len(self.query_terms)
+
+    def score_link(self, url: str, anchor_text: str = "", parent_relevance: float = 0.0) -> float:
+        """Priority of a candidate link (higher is fetched earlier)."""
+        tokens_in_url = url_tokens(url)
+        score = (
+            ANCHOR_WEIGHT * self.coverage(tokenize(anchor_text))
+            + URL_WEIGHT * self.coverage(tokens_in_url)
+            + PARENT_WEIGHT * parent_relevance
+        )
+        if _BOILERPLATE_TOKENS.intersection(tokens_in_url):
+            score -= BOILERPLATE_PENALTY
+        return round(score, 4)
+
+    def score_page(self, text: str) -> float:
+        """Relevance (0-1) of a fetched page's text; also counted towards relevance_per_fetch()."""
+        tokens = tokenize(text)
+        relevance = 0.0
+        if tokens and self.query_terms:
+            matches = sum(1 for token in tokens if token in self.query_terms)
+            density_boost = 1 - math.exp(-1000 * matches / len(tokens) / len(self.query_terms)) # Saturates at ~3 hits per 1000 words per term
+            relevance = self.coverage(tokens) * (0.5 + 0.5 * density_boost)
+        self.pages_scored += 1
+        self.relevance_total += relevance
+        return relevance
+
+    def relevance_per_fetch(self) -> float:
+        """Mean page relevance over every page scored so far."""
+        return self.relevance_total / self.pages_scored if self.pages_scored else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "query": self.query,
+            "pages_scored": self.pages_scored,
+            "relevance_per_fetch": round(self.relevance_per_fetch(), 3),
+        }
+
+
+class PriorityFrontier:
+    """In-memory max-priority URL queue; equal scores pop in insertion (BFS) order."""
+
+    def __init__(self):
+        self._heap: list[tuple[float, int, str, int]] = []
+        self._counter = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def push(self, url: str, score: float = 0.0, depth: int = 0):
+        heapq.heappush(self._heap, (-score, next(self._counter), url, depth))
+
+    def pop(self) -> tuple[str, float, int]:
+        """Removes and returns (url, score, depth) of the highest-scoring URL."""
+        negative_score, _, url, depth = heapq.heappop(self._heap)
+        return url, -negative_score, depth
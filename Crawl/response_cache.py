@@ -0,0 +1,230 @@
+"""
+On-disk response cache shared by the web tools (Tavily, Google, Firecrawl).
+
+Agent loops repeat the same searches and extractions constantly. Each successful
+response is stored in an SQLite file under a content-addressed key, the SHA-256 of
+the tool name plus its normalized request parameters (API keys are never part of the key):
+
+    entries: key -> (tool, JSON value, size in bytes, expires_at, last_access)
+
+Entries expire after a per-tool TTL (TOOL_TTL_SECONDS), and once the stored values
+exceed `max_bytes` the least recently used entries are evicted. Setting
+RLLM_WEB_CACHE_BYPASS=1 (or `cache.bypass = True`) skips lookups while still
+refreshing the stored responses. stats() reports hits, misses and evictions.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+DEFAULT_CACHE_PATH = os.getenv("RLLM_WEB_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "rllm", "web_tools_cache.sqlite3"))
+DEFAULT_MAX_BYTES = 512 * 2**20
+DEFAULT_TTL_SECONDS = 3600
+
+# Search results go stale quickly, page contents much more slowly
+TOOL_TTL_SECONDS = {
+    "tavily_search": 6 * 3600,
+    "google_search": 6 * 3600,
+    "tavily_extract": 7 * 86400,
+    "firecrawl": 7 * 86400,
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    tool TEXT NOT NULL,
+    value TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_last_access ON entries (last_access);
+"""
+
+
+def _normalize(value: Any) -> Any:
+    """Drops None values and collapses whitespace in strings so equivalent requests share a key."""
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items() if v is not None}
+    if isinstance(value, list | tuple):
+        return [_normalize(v) for v in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def cache_key(tool: str, params: dict[str, Any]) -> str:
+    """Returns the content-addressed key of a tool request."""
+    payload = json.dumps({"tool": tool, "params": _normalize(params)}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """SQLite-backed TTL cache with size-based LRU eviction."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: dict[str, float] | None = None, bypass: bool | None = None):
+        """
+        Initialize the response cache.
+
+        Args:
+            path (str): SQLite file holding the cache (":memory:" for a private, per-process cache).
+            max_bytes (int): Total size of stored values above which least recently used entries are evicted.
+            ttl_seconds (dict[str, float], optional): Per-tool TTL overrides, merged into TOOL_TTL_SECONDS.
+            bypass (bool, optional): Skip lookups (responses are still stored). Defaults to the RLLM_WEB_CACHE_BYPASS env var.
+        """
+        if path != ":memory:" and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = {**TOOL_TTL_SECONDS, **(ttl_seconds or {})}
+        self.bypass = os.getenv("RLLM_WEB_CACHE_BYPASS", "").lower() in ("1", "true", "yes") if bypass is None else bypass
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._lock = threading.Lock()  # Tools are called from worker threads as well as the event loop
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+        self._connection.commit()
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+
+    def get(self, tool: str, params: dict[str, Any]) -> Any | None:
+        """Returns the cached response for a request, or None on a miss (or when bypassed)."""
+        if self.bypass:
+            self.misses += 1
+            return None
+        key = cache_key(tool, params)
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute("SELECT value, expires_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None or row[1] <= now:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE entries SET last_access = ? WHERE key = ?", (now, key))
+            self._connection.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, tool: str, params: dict[str, Any], value: Any, ttl_seconds: float | None = None):
+        """Stores a (JSON-serializable) response for a request."""
+        key = cache_key(tool, params)
+        serialized = json.dumps(value, ensure_ascii=False)
+        size = len(serialized.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds.get(tool, DEFAULT_TTL_SECONDS)
+        now = time.time()
+        with self._lock:
+            previous = self._connection.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entries (key, tool, value, size, expires_at, last_access) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, tool, serialized, size, now + ttl, now),
+            )
+            self._total_bytes += size - (previous[0] if previous else 0)
+            self.stores += 1
+            if self._total_bytes > self.max_bytes:
+                self._evict(now)
+            self._connection.commit()
+
+    def _evict(self, now: float):
+        """Deletes expired entries, then least recently used ones, until the cache fits in max_bytes. Caller holds the lock."""
+        self._connection.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+        self._total_bytes = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        evicted_keys = []
+        for key, size in self._connection.execute("SELECT key, size FROM entries ORDER BY last_access"):
+            if self._total_bytes <= self.max_bytes:
+                break
+            evicted_keys.append((key,))
+            self._total_bytes -= size
+        self._connection.executemany("DELETE FROM entries WHERE key = ?", evicted_keys)
+        self.evictions += len(evicted_keys)
+
+    def clear(self):
+        """Removes every cached response."""
+        with self._lock:
+            self._connection.execute("DELETE FROM entries")
+            self._connection.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self._total_bytes,
+            "bypass": self.bypass,
+        }
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+_default_cache: ResponseCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """Returns the process-wide cache shared by all web tools (created on first use)."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
+
+
+if __name__ == "__main__":
+    # Exercise the cache against a local HTTP stand-in for a search API
+    import urllib.parse
+    import urllib.request
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    request_count = 0
+
+    class StandInHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            global request_count
+            request_count += 1
+            body = json.dumps({"results": [{"url": f"https://example.com{self.path}", "content": "x" * 2000}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+
+    cache = ResponseCache(":memory:", max_bytes=20_000)  # Room for ~9 responses
+
+    def search(query: str) -> dict:
+        params = {"query": query}
+        cached = cache.get("tavily_search", params)
+        if cached is not None:
+            return cached
+        with urllib.request.urlopen(f"{endpoint}/search?q={urllib.parse.quote(query)}") as response:
+            result = json.loads(response.read())
+        cache.set("tavily_search", params, result)
+        return result
+
+    queries = [f"hot query {i % 4}" if i % 3 else f"cold query {i}" for i in range(60)]  # Repeats plus one-off queries
+    start = time.monotonic()
+    for query in queries:
+        search(query)
+    print(f"{len(queries)} calls, {request_count} upstream requests in {time.monotonic() - start:.3f}s")
+    print(f"Cache stats: {cache.stats()}")
+    server.shutdown()
@@ -1,17 +1,41 @@
+import asyncio
 import os
+from urllib.parse import urldefrag, urlsplit
 
 import httpx
 
 from rllm.tools.tool_base import Tool, ToolOutput
+from rllm.tools.web_tools.http_pool import close_async_client, get_async_client
+from rllm.tools.web_tools.response_cache import ResponseCache, get_default_cache
 
 TAVILY_EXTRACT_ENDPOINT = "https://api.tavily.com/extract"
 TAVILY_SEARCH_ENDPOINT = "https://api.tavily.com/search"
+TAVILY_EXTRACT_BATCH_SIZE = 20  # Maximum URLs per extract request
+
+
+def _batches(items: list[str], size: int) -> list[list[str]]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _url_key(url: str) -> str:
+    """Form of a URL that survives Tavily's normalisation (scheme, www., fragment, trailing slash)."""
+    parts = urlsplit(urldefrag(url)[0])
+    host = parts.netloc.lower().removeprefix("www.")
+    return f"{host}{parts.path.rstrip('/')}{'?' + parts.query if parts.query else ''}"
 
 
 class TavilyExtractTool(Tool):
     """A tool for extracting data from websites."""
 
-    def __init__(self):
+    def __init__(self, cache: ResponseCache | None = None, use_cache: bool = True):
+        """
+        Initialize the Tavily extract tool.
+
+        Args:
+            cache (ResponseCache, optional): Response cache to use, defaults to the shared on-disk cache.
+            use_cache (bool): Whether to look up and store responses in the cache.
+        """
+        self.cache = (cache or get_default_cache()) if use_cache else None
         self._init_client()
         super().__init__(name="tavily_extract", description="Extract web page content from one or more specified URLs")
 
@@ -27,6 +51,50 @@ class TavilyExtractTool(Tool):
             self.client.close()
         self.client = None
 
+    def _split_cached(self, urls: list[str]) -> tuple[dict[str, str], list[str]]:
+        """Returns the cached contents of `urls` and the URLs that still have to be extracted."""
+        output = {}
+        missing_urls = []
+        for url in urls:
+            cached = self.cache.get("tavily_extract", {"url": url, "extract_depth": "basic"}) if self.cache else None
+            if cached is None:
+                missing_urls.append(url)
+            else:
+                output[url] = cached
+        return output, missing_urls
+
+    def _record_batch(self, batch: list[str], response: httpx.Response | Exception, output: dict[str, str], failed: dict[str, str]):
+        """
+        Adds one batch's extracted contents to `output` (and the cache), and the error of every
+        URL without content to `failed`. Results are keyed by the requested URL, even when Tavily
+        reports them under a normalised one, so that the cache lookups in _split_cached hit.
+        """
+        if isinstance(response, Exception):
+            failed.update(dict.fromkeys(batch, f"{type(response).__name__} - {str(response)}"))
+            return
+        if not response.is_success:
+            failed.update(dict.fromkeys(batch, f"Error: {response.status_code} - {response.text}"))
+            return
+        body = response.json()
+        requested = {url: url for url in batch}
+        requested.update((_url_key(url), url) for url in batch)
+        for res in body["results"]:
+            url = requested.get(res["url"]) or requested.get(_url_key(res["url"]), res["url"])
+            output[url] = res["raw_content"]
+            if self.cache and url in batch:
+                self.cache.set("tavily_extract", {"url": url, "extract_depth": "basic"}, res["raw_content"])
+        errors = {_url_key(res["url"]): res.get("error") for res in body.get("failed_results") or []}
+        for url in batch:
+            if url not in output:
+                failed[url] = errors.get(_url_key(url)) or "No content extracted"
+
+    def _tool_output(self, output: dict[str, str], failed: dict[str, str]) -> ToolOutput:
+        """The extracted contents ({url: content}); URLs that failed are listed in the error, never in the output."""
+        if not failed:
+            return ToolOutput(name=self.name or "tavily_extract", output=output)
+        error = "Failed to extract " + "; ".join(f"{url}: {error}" for url, error in failed.items())
+        return ToolOutput(name=self.name or "tavily_extract", output=output or None, error=error)
+
     def forward(self, urls: list[str]) -> ToolOutput:
         """
         Extract content from provided URLs using Tavily API.
@@ -45,17 +113,49 @@ class TavilyExtractTool(Tool):
             raise RuntimeError("HTTP client is not initialized")
 
         try:
-            params = {"urls": urls, "include_images": False, "extract_depth": "basic"}
+            # Each URL is cached on its own, so only the URLs never extracted before are sent
+            output, missing_urls = self._split_cached(urls)
+            failed: dict[str, str] = {}
             headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+            for batch in _batches(missing_urls, TAVILY_EXTRACT_BATCH_SIZE):
+                params = {"urls": batch, "include_images": False, "extract_depth": "basic"}
+                try:
+                    response = self.client.post(url=TAVILY_EXTRACT_ENDPOINT, json=params, headers=headers)
+                except Exception as e:
+                    response = e
+                self._record_batch(batch, response, output, failed)
+            return self._tool_output(output, failed)
+        except Exception as e:
+            return ToolOutput(name=self.name or "tavily_extract", error=f"{type(e).__name__} - {str(e)}")
 
-            response = self.client.post(url=TAVILY_EXTRACT_ENDPOINT, json=params, headers=headers)
+    async def async_forward(self, urls: list[str]) -> ToolOutput:
+        """
+        Asynchronous version of the forward method.
 
-            if not response.is_success:
-                return ToolOutput(name=self.name or "tavily_extract", error=f"Error: {response.status_code} - {response.text}")
+        URLs are sent in batches of TAVILY_EXTRACT_BATCH_SIZE, all batches concurrently,
+        over the event loop's shared AsyncClient.
 
-            results = response.json()["results"]
-            output = {res["url"]: res["raw_content"] for res in results}
-            return ToolOutput(name=self.name or "tavily_extract", output=output)
+        Args:
+            urls (List[str]): List of URLs to extract content from.
+
+        Returns:
+            ToolOutput: An object containing either the extracted content or an error message.
+        """
+        api_key = os.getenv("TAVILY_API_KEY")
+        if not api_key:
+            raise ValueError("TAVILY_API_KEY is not set")
+
+        try:
+            output, missing_urls = self._split_cached(urls)
+            failed: dict[str, str] = {}
+            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+            client = get_async_client()
+            batches = _batches(missing_urls, TAVILY_EXTRACT_BATCH_SIZE)
+            requests = [client.post(url=TAVILY_EXTRACT_ENDPOINT, json={"urls": batch, "include_images": False, "extract_depth": "basic"}, headers=headers) for batch in batches]
+            responses = await asyncio.gather(*requests, return_exceptions=True)
+            for batch, response in zip(batches, responses, strict=True):
+                self._record_batch(batch, response, output, failed)
+            return self._tool_output(output, failed)
         except Exception as e:
             return ToolOutput(name=self.name or "tavily_extract", error=f"{type(e).__name__} - {str(e)}")
 
@@ -67,7 +167,15 @@ class TavilyExtractTool(Tool):
 class TavilySearchTool(Tool):
     """A tool for searching the web using Tavily API."""
 
-    def __init__(self):
+    def __init__(self, cache: ResponseCache | None = None, use_cache: bool = True):
+        """
+        Initialize the Tavily search tool.
+
+        Args:
+            cache (ResponseCache, optional): Response cache to use, defaults to the shared on-disk cache.
+            use_cache (bool): Whether to look up and store responses in the cache.
+        """
+        self.cache = (cache or get_default_cache()) if use_cache else None
         self._init_client()
         super().__init__(name="tavily_search", description="Search the web for information on a specific query")
 
@@ -100,6 +208,24 @@ class TavilySearchTool(Tool):
             self.client.close()
         self.client = None
 
+    def _search_params(self, query: str, search_depth: str, include_domains: list[str] | None, exclude_domains: list[str] | None, max_results: int) -> dict:
+        params = {"query": query, "search_depth": search_depth, "max_results": max_results}
+
+        if include_domains:
+            params["include_domains"] = include_domains
+        if exclude_domains:
+            params["exclude_domains"] = exclude_domains
+        return params
+
+    def _search_output(self, params: dict, response: httpx.Response) -> ToolOutput:
+        if not response.is_success:
+            return ToolOutput(name=self.name or "tavily_search", error=f"Error: {response.status_code} - {response.text}")
+
+        result = response.json()
+        if self.cache:
+            self.cache.set("tavily_search", params, result)
+        return ToolOutput(name=self.name or "tavily_search", output=result)
+
     def forward(self, query: str, search_depth: str = "basic", include_domains: list[str] | None = None, exclude_domains: list[str] | None = None, max_results: int = 5) -> ToolOutput:
         """
         Search the web using Tavily API.
@@ -122,22 +248,48 @@ class TavilySearchTool(Tool):
             raise RuntimeError("HTTP client is not initialized")
 
         try:
-            params = {"query": query, "search_depth": search_depth, "max_results": max_results}
+            params = self._search_params(query, search_depth, include_domains, exclude_domains, max_results)
 
-            if include_domains:
-                params["include_domains"] = include_domains
-            if exclude_domains:
-                params["exclude_domains"] = exclude_domains
+            cached = self.cache.get("tavily_search", params) if self.cache else None
+            if cached is not None:
+                return ToolOutput(name=self.name or "tavily_search", output=cached)
 
             headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
 
             response = self.client.post(url=TAVILY_SEARCH_ENDPOINT, json=params, headers=headers)
+            return self._search_output(params, response)
+        except Exception as e:
+            return ToolOutput(name=self.name or "tavily_search", error=f"{type(e).__name__} - {str(e)}")
+
+    async def async_forward(self, query: str, search_depth: str = "basic", include_domains: list[str] | None = None, exclude_domains: list[str] | None = None, max_results: int = 5) -> ToolOutput:
+        """
+        Asynchronous version of the forward method, using the event loop's shared AsyncClient.
+
+        Args:
+            query (str): The search query.
+            search_depth (str, optional): The depth of search. Defaults to "basic".
+            include_domains (List[str], optional): List of domains to include in the search.
+            exclude_domains (List[str], optional): List of domains to exclude from the search.
+            max_results (int, optional): Maximum number of search results to return. Defaults to 5.
 
-            if not response.is_success:
-                return ToolOutput(name=self.name or "tavily_search", error=f"Error: {response.status_code} - {response.text}")
+        Returns:
+            ToolOutput: An object containing either the search results or an error message.
+        """
+        api_key = os.getenv("TAVILY_API_KEY")
+        if not api_key:
+            raise ValueError("TAVILY_API_KEY is not set")
 
-            result = response.json()
-            return ToolOutput(name=self.name or "tavily_search", output=result)
+        try:
+            params = self._search_params(query, search_depth, include_domains, exclude_domains, max_results)
+
+            cached = self.cache.get("tavily_search", params) if self.cache else None
+            if cached is not None:
+                return ToolOutput(name=self.name or "tavily_search", output=cached)
+
+            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+
+            response = await get_async_client().post(url=TAVILY_SEARCH_ENDPOINT, json=params, headers=headers)
+            return self._search_output(params, response)
         except Exception as e:
             return ToolOutput(name=self.name or "tavily_search", error=f"{type(e).__name__} - {str(e)}")
 
@@ -159,8 +311,6 @@ if __name__ == "__main__":
     print("\nSearch Tool Result:")
     print(search_result)
 
-    import asyncio
-
     async def test_async():
         print("\nStarting async requests...")
 
@@ -176,4 +326,8 @@ if __name__ == "__main__":
         print("Async search completed!")
         print(search_result)
 
+        await close_async_client()
+
     asyncio.run(test_async())
+
+    print(f"\nResponse cache: {search_tool.cache.stats()}")
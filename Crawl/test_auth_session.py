@@ -0,0 +1,196 @@
+# Checks AuthSession's single-flight re-login against a local mock login site.
+
+# The site (http.server) issues a session cookie on POST /login and serves /feed only to
+# a valid cookie, redirecting everyone else to /login, as LinkedIn does. Browser contexts
+# are stand-ins that only hold cookies, and the stubbed `login` posts to the site directly,
+# so no browser is needed. Run with pytest or directly: python test_auth_session.py
+
+import asyncio
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from auth_session import AuthSession
+
+NUM_WORKERS = 8
+
+
+class MockLoginSite:
+    def __init__(self):
+        self.accept_logins = True
+        self.login_attempts = 0
+        self.valid_tokens: set[str] = set()
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                site.login_attempts += 1
+                if not site.accept_logins:
+                    self.send_response(401)
+                    self.end_headers()
+                    return
+                token = f"token-{site.login_attempts}"
+                site.valid_tokens.add(token)
+                self.send_response(200)
+                self.send_header("Set-Cookie", f"li_at={token}")
+                self.end_headers()
+
+            def do_GET(self):
+                if self.path == "/feed" and self.headers.get("Cookie", "").removeprefix("li_at=") not in site.valid_tokens:
+                    self.send_response(302)
+                    self.send_header("Location", "/login")
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.end_headers()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def expire_sessions(self):
+        self.valid_tokens.clear()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeResponse:
+    def __init__(self, url: str, status: int):
+        self.url = url
+        self.status = status
+
+
+class FakeContext:
+    def __init__(self, storage_state: dict | None = None):
+        self.cookies = list((storage_state or {}).get("cookies", []))
+
+    async def storage_state(self):
+        return {"cookies": list(self.cookies), "origins": []}
+
+    async def clear_cookies(self):
+        self.cookies = []
+
+    async def add_cookies(self, cookies):
+        self.cookies.extend(cookies)
+
+    async def close(self):
+        pass
+
+    async def goto(self, url: str) -> FakeResponse:
+        """Fetches the URL with the context's cookies, following redirects like a browser."""
+        def fetch():
+            request = urllib.request.Request(url, headers={"Cookie": "; ".join(f"{c['name']}={c['value']}" for c in self.cookies)})
+            with urllib.request.urlopen(request) as response:
+                return FakeResponse(response.url, response.status)
+        return await asyncio.to_thread(fetch)
+
+
+class FakeBrowser:
+    async def new_context(self, storage_state: dict | None = None, **options):
+        return FakeContext(storage_state)
+
+
+def make_login(site: MockLoginSite):
+    async def login(context: FakeContext) -> bool:
+        def post():
+            request = urllib.request.Request(f"{site.base_url}/login", data=b"user=test&password=test", method="POST")
+            try:
+                with urllib.request.urlopen(request) as response:
+                    return response.headers["Set-Cookie"]
+            except urllib.error.HTTPError:
+                return None
+        cookie = await asyncio.to_thread(post)
+        await asyncio.sleep(0.05) # Keep the login in flight while the other workers notice the expiry
+        if cookie is None:
+            return False
+        name, value = cookie.split("=", 1)
+        await context.add_cookies([{"name": name, "value": value, "domain": "127.0.0.1", "path": "/"}])
+        return True
+    return login
+
+
+async def visit_feed(session: AuthSession, context: FakeContext, feed_url: str) -> int:
+    """Mirrors extract_content_and_save_with_playwright: on expiry, re-login once and retry."""
+    response = await context.goto(feed_url)
+    if session.is_expired(response):
+        logged_in = await session.relogin(session.generation_of(context))
+        await session.refresh(context, logged_in)
+        if not logged_in:
+            return 0
+        response = await context.goto(feed_url)
+    return 0 if session.is_expired(response) else response.status
+
+
+async def _run_concurrent_expirations(accept_relogin: bool, **session_options) -> tuple[MockLoginSite, AuthSession, list[int]]:
+    site = MockLoginSite()
+    try:
+        session = AuthSession(FakeBrowser(), make_login(site), expired_url_pattern=r"/login\b", **session_options)
+        assert await session.start()
+        contexts = [await session.new_context() for _ in range(NUM_WORKERS)]
+        site.expire_sessions()
+        site.accept_logins = accept_relogin
+        statuses = await asyncio.gather(*(visit_feed(session, context, f"{site.base_url}/feed") for context in contexts))
+        return site, session, statuses
+    finally:
+        site.close()
+
+
+def test_concurrent_expirations_share_one_login():
+    site, session, statuses = asyncio.run(_run_concurrent_expirations(accept_relogin=True))
+    assert site.login_attempts == 2 # The initial login plus exactly one re-login for all workers
+    assert statuses == [200] * NUM_WORKERS
+    assert session.stats()["logins"] == 2
+
+
+def test_failed_relogin_is_not_repeated_by_waiters():
+    site, session, statuses = asyncio.run(_run_concurrent_expirations(accept_relogin=False))
+    assert site.login_attempts == 2 # The initial login plus one failed re-login, none by the waiting workers
+    assert 200 not in statuses
+    assert session.failed_logins == 1
+
+
+def test_failed_logins_back_off_then_give_up():
+    async def run():
+        site = MockLoginSite()
+        site.accept_logins = False
+        try:
+            session = AuthSession(FakeBrowser(), make_login(site), max_login_failures=3, login_retry_backoff_seconds=0.0)
+            assert not await session.start()
+            for _ in range(10):
+                results = await asyncio.gather(*(session.relogin(0) for _ in range(NUM_WORKERS)))
+                assert not any(results)
+            return site, session
+        finally:
+            site.close()
+
+    site, session = asyncio.run(run())
+    assert site.login_attempts == 3
+    assert session.gave_up
+
+    async def failed_start_backs_off():
+        site = MockLoginSite()
+        site.accept_logins = False
+        try:
+            session = AuthSession(FakeBrowser(), make_login(site), login_retry_backoff_seconds=60.0)
+            assert not await session.start()
+            results = await asyncio.gather(*(session.relogin(session.generation) for _ in range(NUM_WORKERS)))
+            return site, results
+        finally:
+            site.close()
+
+    site, results = asyncio.run(failed_start_backs_off())
+    assert site.login_attempts == 1 # Workers hitting the expired page during the backoff do not log in
+    assert not any(results)
+
+
+if __name__ == "__main__":
+    test_concurrent_expirations_share_one_login()
+    test_failed_relogin_is_not_repeated_by_waiters()
+    test_failed_logins_back_off_then_give_up()
+    print("AuthSession tests passed.")
@@ -0,0 +1,29 @@
+# Checks that RelevanceScorer penalises boilerplate URLs, including plural path segments
+# that tokenize() singularises. Run with pytest or directly: python test_relevance.py
+
+from relevance import BOILERPLATE_PENALTY, BOILERPLATE_URL_TOKENS, RelevanceScorer
+
+
+def test_every_boilerplate_segment_is_penalised():
+    scorer = RelevanceScorer("transformer attention")
+    for segment in BOILERPLATE_URL_TOKENS:
+        assert scorer.score_link(f"https://example.com/{segment}") == -BOILERPLATE_PENALTY, segment
+
+
+def test_plural_boilerplate_urls_are_penalised():
+    scorer = RelevanceScorer("transformer attention")
+    for url in ("https://example.com/terms", "https://example.com/careers", "https://example.com/jobs/123", "https://example.com/blog/categories/ml"):
+        assert scorer.score_link(url) < 0, url
+
+
+def test_content_urls_are_not_penalised():
+    scorer = RelevanceScorer("transformer attention")
+    assert scorer.score_link("https://example.com/blog/attention-is-all-you-need", "Transformer attention explained") > 0
+    assert scorer.score_link("https://example.com/research/papers") == 0.0
+
+
+if __name__ == "__main__":
+    test_every_boilerplate_segment_is_penalised()
+    test_plural_boilerplate_urls_are_penalised()
+    test_content_urls_are_not_penalised()
+    print("Relevance tests passed.")
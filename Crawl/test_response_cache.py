@@ -0,0 +1,150 @@
+# Checks ResponseCache expiry, LRU eviction and bypass, and that the Tavily tools key the
+# cache without the API key and only send uncached URLs upstream. The Tavily API is replaced
+# by a local http.server stand-in that records every request it receives.
+# Run with pytest or directly: python test_response_cache.py
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from rllm.tools.web_tools import tavily_tool
+from rllm.tools.web_tools.response_cache import ResponseCache, cache_key
+
+
+class TavilyStandIn:
+    """Answers /extract and /search like the Tavily API and records the request bodies."""
+
+    def __init__(self):
+        self.requests: list[dict] = []
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                stand_in.requests.append(body)
+                if self.path == "/extract":
+                    result = {"results": [{"url": url, "raw_content": f"content of {url}"} for url in body["urls"]], "failed_results": []}
+                else:
+                    result = {"query": body["query"], "results": [{"url": "https://example.com/result", "content": "result"}]}
+                payload = json.dumps(result).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def __enter__(self):
+        self._endpoints = (tavily_tool.TAVILY_EXTRACT_ENDPOINT, tavily_tool.TAVILY_SEARCH_ENDPOINT, os.environ.get("TAVILY_API_KEY"))
+        tavily_tool.TAVILY_EXTRACT_ENDPOINT = f"{self.base_url}/extract"
+        tavily_tool.TAVILY_SEARCH_ENDPOINT = f"{self.base_url}/search"
+        return self
+
+    def __exit__(self, *exc_info):
+        tavily_tool.TAVILY_EXTRACT_ENDPOINT, tavily_tool.TAVILY_SEARCH_ENDPOINT, api_key = self._endpoints
+        if api_key is None:
+            os.environ.pop("TAVILY_API_KEY", None)
+        else:
+            os.environ["TAVILY_API_KEY"] = api_key
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def test_entries_expire_after_their_ttl():
+    cache = ResponseCache(":memory:", ttl_seconds={"tavily_search": 0.2})
+    cache.set("tavily_search", {"query": "q"}, {"results": [1]})
+    assert cache.get("tavily_search", {"query": "q"}) == {"results": [1]}
+    time.sleep(0.3)
+    assert cache.get("tavily_search", {"query": "q"}) is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_entries_are_evicted_first():
+    value = "x" * 100
+    entry_bytes = len(json.dumps(value))
+    cache = ResponseCache(":memory:", max_bytes=3 * entry_bytes)
+    for name in ("a", "b", "c"):
+        cache.set("firecrawl", {"url": name}, value)
+        time.sleep(0.01) # Distinct last_access times
+    assert cache.get("firecrawl", {"url": "a"}) == value # "a" is now more recent than "b" and "c"
+    time.sleep(0.01)
+    cache.set("firecrawl", {"url": "d"}, value)
+    assert cache.get("firecrawl", {"url": "b"}) is None
+    for name in ("c", "a", "d"):
+        assert cache.get("firecrawl", {"url": name}) == value
+        time.sleep(0.01)
+    cache.set("firecrawl", {"url": "e"}, value)
+    assert cache.get("firecrawl", {"url": "c"}) is None # Least recently read of the three
+    assert cache.get("firecrawl", {"url": "a"}) == value
+    stats = cache.stats()
+    assert stats["evictions"] == 2 and stats["entries"] == 3 and stats["bytes"] <= cache.max_bytes
+
+
+def test_bypass_skips_lookups_but_still_stores():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, "cache.sqlite3")
+        bypassed = ResponseCache(path, bypass=True)
+        bypassed.set("tavily_search", {"query": "q"}, {"results": ["fresh"]})
+        assert bypassed.get("tavily_search", {"query": "q"}) is None
+        assert bypassed.stats()["stores"] == 1 and bypassed.stats()["entries"] == 1
+        bypassed.close()
+
+        cache = ResponseCache(path, bypass=False)
+        assert cache.get("tavily_search", {"query": "q"}) == {"results": ["fresh"]}
+        cache.close()
+
+
+def test_api_keys_are_not_part_of_the_key():
+    with TavilyStandIn() as stand_in, tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, "cache.sqlite3")
+        cache = ResponseCache(path)
+        search_tool = tavily_tool.TavilySearchTool(cache=cache)
+        extract_tool = tavily_tool.TavilyExtractTool(cache=cache)
+        for api_key in ("tvly-first-secret", "tvly-second-secret"):
+            os.environ["TAVILY_API_KEY"] = api_key
+            assert search_tool.forward("transformer attention").error is None
+            assert extract_tool.forward(["https://example.com/a"]).error is None
+        assert len(stand_in.requests) == 2 # The second key reuses both responses
+        search_params = search_tool._search_params("transformer attention", "basic", None, None, 5)
+        assert cache.get("tavily_search", search_params) is not None
+        assert "api_key" not in search_params
+        cache.close()
+
+        with open(path, "rb") as f:
+            assert b"secret" not in f.read()
+        with sqlite3.connect(path) as connection:
+            assert not connection.execute("SELECT 1 FROM entries WHERE value LIKE '%secret%' OR key LIKE '%secret%'").fetchall()
+        assert cache_key("tavily_search", {"query": "q"}) == cache_key("tavily_search", {"query": " q ", "topic": None})
+
+
+def test_extract_sends_only_uncached_urls():
+    with TavilyStandIn() as stand_in:
+        os.environ["TAVILY_API_KEY"] = "tvly-test"
+        tool = tavily_tool.TavilyExtractTool(cache=ResponseCache(":memory:"))
+        first = tool.forward(["https://example.com/a", "https://example.com/b"])
+        second = tool.forward(["https://example.com/a", "https://example.com/b", "https://example.com/c"])
+        third = tool.forward(["https://example.com/c", "https://example.com/a"])
+
+        assert [request["urls"] for request in stand_in.requests] == [["https://example.com/a", "https://example.com/b"], ["https://example.com/c"]]
+        assert first.error is None and second.error is None and third.error is None
+        assert second.output == {url: f"content of {url}" for url in ("https://example.com/a", "https://example.com/b", "https://example.com/c")}
+        assert set(third.output) == {"https://example.com/c", "https://example.com/a"}
+
+
+if __name__ == "__main__":
+    test_entries_expire_after_their_ttl()
+    test_least_recently_used_entries_are_evicted_first()
+    test_bypass_skips_lookups_but_still_stores()
+    test_api_keys_are_not_part_of_the_key()
+    test_extract_sends_only_uncached_urls()
+    print("ResponseCache tests passed.")
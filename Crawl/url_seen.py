@@ -0,0 +1,252 @@
+# Memory-bounded "have we seen this URL?" store shared by the crawlers.
+
+# A Python set of full URL strings costs well over 100 bytes per URL, and checking
+# `url not in urls_to_visit` against a list is O(n) per link, which makes a crawl
+# quadratic. SeenUrlStore keeps only 64-bit fingerprints instead:
+
+#     FingerprintSet       - open-addressing hash set over a flat array('Q') of fingerprints
+#                            (about 16 bytes per URL at the default load factor), exact up to
+#                            64-bit hash collisions.
+#     ScalableBloomFilter  - optional front that answers most "never seen" lookups without
+#                            touching the set, or (exact=False) replaces it entirely when a
+#                            small false-positive rate is acceptable for a fixed, tiny memory cost.
+
+# Every crawler uses the same API: store.add(url) -> True if new, url in store / store.contains(url).
+
+# Run this file directly for a benchmark of memory per million URLs and check rate:
+#     python url_seen.py 1000000
+
+import sys
+import math
+import time
+import hashlib
+import tracemalloc
+from array import array
+
+# --- Configuration ---
+DEFAULT_INITIAL_CAPACITY = 1 << 14
+
+# FingerprintSet grows (doubles) when it is fuller than this
+MAX_LOAD_FACTOR = 0.7
+
+# Bloom filter sizing
+DEFAULT_BLOOM_CAPACITY = 1 << 16
+DEFAULT_BLOOM_ERROR_RATE = 0.001
+BLOOM_GROWTH_FACTOR = 2 # Each new filter holds this many times more items than the last
+BLOOM_ERROR_TIGHTENING = 0.8 # ...and has this fraction of the previous error rate
+
+_UINT64_MASK = (1 << 64) - 1
+
+
+def fingerprint64(value: str) -> int:
+    """Returns an unsigned 64-bit fingerprint of a string."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class FingerprintSet:
+    """Hash set of 64-bit integers stored in one flat array (linear probing, 0 marks an empty slot)."""
+
+    def __init__(self, initial_capacity: int = DEFAULT_INITIAL_CAPACITY):
+        capacity = 1 << max(4, math.ceil(math.log2(max(1, initial_capacity) / MAX_LOAD_FACTOR)))
+        self._slots = array('Q', bytes(8 * capacity))
+        self._mask = capacity - 1
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _key(fingerprint: int) -> int:
+        fingerprint &= _UINT64_MASK
+        return fingerprint or 1 # 0 is the empty-slot marker
+
+    def _grow(self):
+        old_slots = self._slots
+        self._slots = array('Q', bytes(16 * len(old_slots)))
+        self._mask = len(self._slots) - 1
+        slots, mask = self._slots, self._mask
+        for key in old_slots:
+            if key:
+                index = key & mask
+                while slots[index]:
+                    index = (index + 1) & mask
+                slots[index] = key
+
+    def add(self, fingerprint: int) -> bool:
+        """Adds a fingerprint. Returns True if it was not present before."""
+        if (self._size + 1) > MAX_LOAD_FACTOR * len(self._slots):
+            self._grow()
+        key = self._key(fingerprint)
+        slots, mask = self._slots, self._mask
+        index = key & mask
+        while True:
+            current = slots[index]
+            if current == 0:
+                slots[index] = key
+                self._size += 1
+                return True
+            if current == key:
+                return False
+            index = (index + 1) & mask
+
+    def __contains__(self, fingerprint: int) -> bool:
+        key = self._key(fingerprint)
+        slots, mask = self._slots, self._mask
+        index = key & mask
+        while True:
+            current = slots[index]
+            if current == 0:
+                return False
+            if current == key:
+                return True
+            index = (index + 1) & mask
+
+    def memory_bytes(self) -> int:
+        return self._slots.itemsize * len(self._slots)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over 64-bit fingerprints (double hashing)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.bit_count = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.bit_count / capacity * math.log(2)))
+        self._bits = bytearray((self.bit_count + 7) // 8)
+        self.count = 0
+
+    def _positions(self, fingerprint: int):
+        low = fingerprint & 0xFFFFFFFF
+        high = (fingerprint >> 32) | 1
+        for i in range(self.hash_count):
+            yield (low + i * high) % self.bit_count
+
+    def add(self, fingerprint: int):
+        for position in self._positions(fingerprint):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, fingerprint: int) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(fingerprint))
+
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+
+class ScalableBloomFilter:
+    """Bloom filter that adds larger, stricter filters as it fills, keeping the overall error rate bounded."""
+
+    def __init__(self, initial_capacity: int = DEFAULT_BLOOM_CAPACITY, error_rate: float = DEFAULT_BLOOM_ERROR_RATE):
+        # The series error_rate * (1 - r) * (1 + r + r^2 + ...) stays below error_rate
+        self._next_error_rate = error_rate * (1 - BLOOM_ERROR_TIGHTENING)
+        self._filters = [BloomFilter(initial_capacity, self._next_error_rate)]
+
+    def add(self, fingerprint: int):
+        current = self._filters[-1]
+        if current.count >= current.capacity:
+            self._next_error_rate *= BLOOM_ERROR_TIGHTENING
+            current = BloomFilter(current.capacity * BLOOM_GROWTH_FACTOR, self._next_error_rate)
+            self._filters.append(current)
+        current.add(fingerprint)
+
+    def __contains__(self, fingerprint: int) -> bool:
+        return any(fingerprint in bloom_filter for bloom_filter in self._filters)
+
+    def memory_bytes(self) -> int:
+        return sum(bloom_filter.memory_bytes() for bloom_filter in self._filters)
+
+
+class SeenUrlStore:
+    """Compact set of seen URLs with the same add/contains API for every crawler."""
+
+    def __init__(self, use_bloom_front: bool = False, exact: bool = True, initial_capacity: int = DEFAULT_INITIAL_CAPACITY):
+        """
+        Args:
+            use_bloom_front (bool): Put a scalable Bloom filter in front of the exact set so most
+                unseen URLs are rejected without probing the set.
+            exact (bool): Keep the exact fingerprint set. With exact=False only the Bloom filter
+                is kept (minimal memory, a small chance of treating a new URL as seen).
+            initial_capacity (int): Expected number of URLs before the first resize.
+        """
+        if not exact:
+            use_bloom_front = True
+        self._fingerprints = FingerprintSet(initial_capacity) if exact else None
+        self._bloom = ScalableBloomFilter(max(initial_capacity, DEFAULT_BLOOM_CAPACITY)) if use_bloom_front else None
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def contains_fingerprint(self, fingerprint: int) -> bool:
+        if self._bloom is not None and fingerprint not in self._bloom:
+            return False
+        if self._fingerprints is None:
+            return True
+        return fingerprint in self._fingerprints
+
+    def add_fingerprint(self, fingerprint: int) -> bool:
+        """Adds a precomputed 64-bit fingerprint. Returns True if it was new."""
+        if self._fingerprints is not None:
+            is_new = self._fingerprints.add(fingerprint)
+        else:
+            is_new = fingerprint not in self._bloom
+        if is_new:
+            if self._bloom is not None:
+                self._bloom.add(fingerprint)
+            self._count += 1
+        return is_new
+
+    def contains(self, url: str) -> bool:
+        return self.contains_fingerprint(fingerprint64(url))
+
+    def __contains__(self, url: str) -> bool:
+        return self.contains(url)
+
+    def add(self, url: str) -> bool:
+        """Marks a URL as seen. Returns True if it was not seen before."""
+        return self.add_fingerprint(fingerprint64(url))
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by the fingerprint set and Bloom filters."""
+        total = 0
+        if self._fingerprints is not None:
+            total += self._fingerprints.memory_bytes()
+        if self._bloom is not None:
+            total += self._bloom.memory_bytes()
+        return total
+
+
+def benchmark_seen_stores(url_count: int = 1_000_000):
+    """Compares memory per million URLs and add/check rates of set[str] and SeenUrlStore variants."""
+    urls = [f"https://www.example.com/section-{i % 97}/article-{i}?ref=nav&page={i % 13}" for i in range(url_count)]
+    missing_urls = [url + "-missing" for url in urls[:100_000]]
+
+    candidates = {
+        "set[str]": set,
+        "SeenUrlStore (exact)": lambda: SeenUrlStore(),
+        "SeenUrlStore (exact + bloom front)": lambda: SeenUrlStore(use_bloom_front=True),
+        "SeenUrlStore (bloom only)": lambda: SeenUrlStore(exact=False),
+    }
+    print(f"Benchmarking {url_count:,} URLs")
+    for name, factory in candidates.items():
+        tracemalloc.start()
+        store = factory()
+        start_time = time.monotonic()
+        for url in urls:
+            store.add(url)
+        add_seconds = time.monotonic() - start_time
+        memory_bytes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        start_time = time.monotonic()
+        hits = sum(1 for url in urls[:100_000] if url in store)
+        misses = sum(1 for url in missing_urls if url not in store)
+        check_seconds = time.monotonic() - start_time
+
+        print(f"  {name:<36} {memory_bytes / url_count * 1_000_000 / 2**20:8.1f} MiB per million URLs | "
+              f"{url_count / add_seconds:>10,.0f} adds/s | {200_000 / check_seconds:>10,.0f} checks/s "
+              f"(hits {hits:,}/100,000, correct misses {misses:,}/100,000)")
+
+
+if __name__ == "__main__":
+    benchmark_seen_stores(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -1,4 +1,5 @@
 import asyncio
+import json
 import re
 from datetime import datetime
 import os
@@ -6,13 +7,107 @@ from bs4 import BeautifulSoup
 
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig
 
-async def crawl_ycombinator_blogs(num_blogs_to_crawl: int = 100):
+# --- Configuration ---
+MAX_CONCURRENT_POSTS = 5 # Blog posts fetched at the same time
+MANIFEST_FILENAME = "manifest.json" # Saved posts, kept in the output directory
+
+def load_manifest(manifest_path: str) -> dict:
+    """Loads the manifest of already-saved posts: {url: {"published": "YYYY-MM-DD" or None, "file": filename}}."""
+    if not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"  Warning: Could not read manifest {manifest_path} ({e}). Re-crawling all posts.")
+        return {}
+
+def save_manifest(manifest_path: str, manifest: dict):
+    """Writes the manifest atomically, so an interrupted run never leaves it half-written."""
+    temp_path = f"{manifest_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(temp_path, manifest_path)
+
+def manifest_date(entry: dict) -> datetime:
+    """Publish date of a manifest entry as a datetime (datetime.min if unknown)."""
+    try:
+        return datetime.strptime(entry.get("published") or "", '%Y-%m-%d')
+    except ValueError:
+        return datetime.min
+
+async def crawl_and_save_blog_post(crawler: AsyncWebCrawler, blog_url: str, config: CrawlerRunConfig, output_directory: str, listing_date: datetime) -> dict | None:
+    """
+    Crawls one blog post and saves it as Markdown.
+
+    Returns:
+        dict | None: The post's manifest entry, or None if nothing was saved.
+    """
+    try:
+        # Crawl the individual blog post page
+        blog_result = await crawler.arun(url=blog_url, config=config)
+
+        if not blog_result.markdown:
+            print(f"    ⚠️ Warning: No markdown content extracted for {blog_url}. Skipping.")
+            return None
+
+        # Use BeautifulSoup to extract the precise title and datetime from the HTML
+        # This is more reliable than trying to parse from markdown or assuming structure
+        blog_soup = BeautifulSoup(blog_result.html, 'html.parser')
+
+        # Find the title using its specific classes
+        title_tag = blog_soup.select_one('h1.font-bold.text-\\[32px\\].text-vc-purple-900.leading-snug-38')
+        # Find the time tag and get its 'datetime' attribute (which is in ISO format)
+        datetime_tag = blog_soup.select_one('time[datetime]')
+
+        blog_title = title_tag.text.strip() if title_tag else "Untitled_Blog_Post"
+        # Get ISO format date (e.g., "2024-07-23")
+        post_datetime_iso = datetime_tag['datetime'] if datetime_tag and 'datetime' in datetime_tag.attrs else "undated"
+
+        # Sanitize the title for use in a filename
+        # Replace non-alphanumeric, non-space, non-underscore, non-hyphen characters
+        sanitized_title = re.sub(r'[^a-zA-Z0-9_\- ]', '', blog_title).replace(' ', '_')
+
+        # Format datetime for filename (e.g., "YYYY-MM-DD")
+        try:
+            file_datetime_part = datetime.strptime(post_datetime_iso, '%Y-%m-%d').strftime('%Y-%m-%d')
+        except ValueError:
+            file_datetime_part = "undated"
+            print(f"    ⚠️ Warning: Could not parse ISO date '{post_datetime_iso}' for filename for {blog_title}. Using 'undated'.")
+
+        # Construct the filename: "Blog_Title_YYYY-MM-DD.md"
+        filename = f"{sanitized_title}_{file_datetime_part}.md"
+        filepath = os.path.join(output_directory, filename)
+
+        # Save the Markdown content to the file
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write(f"# {blog_title}\n\n") # Add title as a Markdown heading
+            f.write(f"**Published Date:** {post_datetime_iso}\n\n") # Add date
+            f.write(blog_result.markdown) # The main Markdown content
+        print(f"    ✅ Saved: {filepath}")
+
+        if file_datetime_part != "undated":
+            published = file_datetime_part
+        else:
+            published = listing_date.strftime('%Y-%m-%d') if listing_date != datetime.min else None
+        return {"published": published, "file": filename}
+
+    except Exception as e:
+        print(f"    ❌ Error processing {blog_url}: {e}")
+        return None
+
+async def crawl_ycombinator_blogs(num_blogs_to_crawl: int = 100, max_concurrent_posts: int = MAX_CONCURRENT_POSTS):
     """
     Crawls the Y Combinator blog to extract the most recent N blog posts,
     converts their content to Markdown, and saves them to files.
 
+    Saved posts are recorded in a manifest in the output directory. Repeat runs stop
+    clicking "Load More" once the listing reaches a known post and only fetch the
+    posts that are not saved yet.
+
     Args:
         num_blogs_to_crawl (int): The number of most recent blog posts to crawl and save.
+        max_concurrent_posts (int): Maximum number of blog posts fetched at the same time.
     """
     base_blog_listing_url = "https://www.ycombinator.com/blog"
     output_directory = "ycombinator_blog_markdowns"
@@ -20,6 +115,11 @@ async def crawl_ycombinator_blogs(num_blogs_to_crawl: int = 100):
     # Create the output directory if it doesn't exist
     os.makedirs(output_directory, exist_ok=True)
 
+    manifest_path = os.path.join(output_directory, MANIFEST_FILENAME)
+    manifest = load_manifest(manifest_path)
+    if manifest:
+        print(f"📒 Manifest lists {len(manifest)} already-saved posts; only new posts will be fetched.")
+
     # Dictionary to store unique blog post URLs and their publication dates
     # This helps in de-duplication and sorting by recency
     blog_post_candidates = {} # Format: {full_url: datetime_object}
@@ -79,6 +179,7 @@ async def crawl_ycombinator_blogs(num_blogs_to_crawl: int = 100):
                 break
 
             new_posts_added_in_iteration = False
+            reached_known_post = False
             for post_element in post_elements:
                 link_tag = post_element.select_one('.ycdc-blog-post-card-title a')
                 date_tag = post_element.select_one('.ycdc-blog-post-card-date')
@@ -89,6 +190,8 @@ async def crawl_ycombinator_blogs(num_blogs_to_crawl: int = 100):
 
                     if relative_href and relative_href.startswith('/blog/'):
                         full_blog_url = f"https://www.ycombinator.com{relative_href}"
+                        if full_blog_url in manifest:
+                            reached_known_post = True
                         try:
                             # Convert date string to datetime object for proper sorting
                             post_date = datetime.strptime(date_text, '%b %d, %Y')
@@ -104,6 +207,11 @@ async def crawl_ycombinator_blogs(num_blogs_to_crawl: int = 100):
             # Check if the "Load More" button is still present on the page
             load_more_button_on_page = soup.select_one('button.w-full.text-center.py-6.border-b.border-gray-100.font-bold.text-vc-purple-500')
             
+            # The listing is newest first, so everything past a saved post is already saved (or older)
+            if reached_known_post:
+                print("  Stopping pagination: Reached posts saved by a previous run.")
+                break
+
             # Stop if we have enough candidates, no new posts found in this iteration, or no more "Load More" button
             if len(blog_post_candidates) >= num_blogs_to_crawl * 1.5 or not new_posts_added_in_iteration or not load_more_button_on_page:
                 print("  Stopping pagination: Collected sufficient links, or no more 'Load More' button/new posts.")
@@ -113,72 +221,44 @@ async def crawl_ycombinator_blogs(num_blogs_to_crawl: int = 100):
             # letting js_code handle the navigation (button click) on the existing page content.
 
 
-    if not blog_post_candidates:
-        print("🔴 No blog posts found after collection. Exiting.")
-        return
+        if not blog_post_candidates:
+            print("🔴 No blog posts found after collection. Exiting.")
+            return
 
-    # Sort the collected blog posts by date, most recent first
-    # Using lambda function to sort by the datetime object stored in the dictionary values
-    sorted_blog_urls = sorted(blog_post_candidates.keys(), 
-                              key=lambda url: blog_post_candidates[url], 
-                              reverse=True)
-    
-    # Take only the desired number of most recent blogs
-    top_blogs_to_process = sorted_blog_urls[:num_blogs_to_crawl]
+        # Rank collected and previously saved posts together, most recent first,
+        # so the top N reflects the whole blog rather than just the pages loaded this run
+        all_post_dates = {url: manifest_date(entry) for url, entry in manifest.items()}
+        all_post_dates.update(blog_post_candidates)
+        sorted_blog_urls = sorted(all_post_dates.keys(),
+                                  key=lambda url: all_post_dates[url],
+                                  reverse=True)
 
-    print(f"\n✅ Successfully collected {len(blog_post_candidates)} blog post links. ")
-    print(f"📚 Proceeding to crawl the top {len(top_blogs_to_process)} most recent blog posts...")
+        # Take only the desired number of most recent blogs, skipping those already saved
+        top_blogs_to_process = [url for url in sorted_blog_urls[:num_blogs_to_crawl] if url not in manifest]
 
-    # Configure the crawler for individual blog post pages (no special JS needed)
-    individual_blog_crawler_config = CrawlerRunConfig(cache_mode="bypass")
+        print(f"\n✅ Successfully collected {len(blog_post_candidates)} blog post links. ")
+        if not top_blogs_to_process:
+            print(f"📚 The {num_blogs_to_crawl} most recent blog posts are already saved. Nothing to crawl.")
+            return
+        print(f"📚 Proceeding to crawl {len(top_blogs_to_process)} new blog posts, {max_concurrent_posts} at a time...")
 
-    for i, blog_url in enumerate(top_blogs_to_process):
-        print(f"  ({i+1}/{len(top_blogs_to_process)}) Crawling: {blog_url}")
-        try:
-            # Crawl the individual blog post page
-            blog_result = await crawler.arun(url=blog_url, config=individual_blog_crawler_config)
+        # Configure the crawler for individual blog post pages (no special JS needed)
+        individual_blog_crawler_config = CrawlerRunConfig(cache_mode="bypass")
+        semaphore = asyncio.Semaphore(max_concurrent_posts)
 
-            if not blog_result.markdown:
-                print(f"    ⚠️ Warning: No markdown content extracted for {blog_url}. Skipping.")
-                continue
+        async def process_post(i: int, blog_url: str):
+            async with semaphore:
+                print(f"  ({i+1}/{len(top_blogs_to_process)}) Crawling: {blog_url}")
+                entry = await crawl_and_save_blog_post(crawler, blog_url, individual_blog_crawler_config, output_directory, blog_post_candidates.get(blog_url, datetime.min))
+            if entry is not None:
+                manifest[blog_url] = entry
 
-            # Use BeautifulSoup to extract the precise title and datetime from the HTML
-            # This is more reliable than trying to parse from markdown or assuming structure
-            blog_soup = BeautifulSoup(blog_result.html, 'html.parser')
-            
-            # Find the title using its specific classes
-            title_tag = blog_soup.select_one('h1.font-bold.text-\\[32px\\].text-vc-purple-900.leading-snug-38')
-            # Find the time tag and get its 'datetime' attribute (which is in ISO format)
-            datetime_tag = blog_soup.select_one('time[datetime]')
-
-            blog_title = title_tag.text.strip() if title_tag else "Untitled_Blog_Post"
-            # Get ISO format date (e.g., "2024-07-23")
-            post_datetime_iso = datetime_tag['datetime'] if datetime_tag and 'datetime' in datetime_tag.attrs else "undated"
-
-            # Sanitize the title for use in a filename
-            # Replace non-alphanumeric, non-space, non-underscore, non-hyphen characters
-            sanitized_title = re.sub(r'[^a-zA-Z0-9_\- ]', '', blog_title).replace(' ', '_')
-            
-            # Format datetime for filename (e.g., "YYYY-MM-DD")
-            try:
-                file_datetime_part = datetime.strptime(post_datetime_iso, '%Y-%m-%d').strftime('%Y-%m-%d')
-            except ValueError:
-                file_datetime_part = "undated"
-                print(f"    ⚠️ Warning: Could not parse ISO date '{post_datetime_iso}' for filename for {blog_title}. Using 'undated'.")
-
-            # Construct the filename: "Blog_Title_YYYY-MM-DD.md"
-            filename = f"{sanitized_title}_{file_datetime_part}.md"
-            filepath = os.path.join(output_directory, filename)
-
-            # Save the Markdown content to the file
-            with open(filepath, "w", encoding="utf-8") as f:
-                f.write(f"# {blog_title}\n\n") # Add title as a Markdown heading
-                f.write(f"**Published Date:** {post_datetime_iso}\n\n") # Add date
-                f.write(blog_result.markdown) # The main Markdown content
-            print(f"    ✅ Saved: {filepath}")
-
-        except Exception as e:
-            print(f"    ❌ Error processing {blog_url}: {e}")
+        try:
+            await asyncio.gather(*(process_post(i, blog_url) for i, blog_url in enumerate(top_blogs_to_process)))
+        finally:
+            # Record whatever was saved, even if the run is interrupted
+            save_manifest(manifest_path, manifest)
+        print(f"📒 Manifest updated: {manifest_path} ({len(manifest)} posts)")
 
     print("\n🎉 Deep crawling completed. Check the 'ycombinator_blog_markdowns' directory for your files.")
 